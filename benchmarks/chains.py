@@ -0,0 +1,95 @@
+"""Measure the chains against the local OpenAI stub, so the time is the bot's own plus the stub's set latency.
+
+With the default of no latency and no token limit, the results are the overhead of building prompts,
+parsing responses and formatting them.
+
+Usage: uv run python benchmarks/chains.py [--repeat N] [--concurrency N] [--latency S] [--tokens-per-second N]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import threading
+from collections.abc import Callable
+from datetime import UTC
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from openai_stub import StubConfig
+from openai_stub import add_stub_arguments
+from openai_stub import serve_stub
+from openai_stub import use_stub
+from suite import FIXTURES
+from suite import get_commit
+from suite import measure
+
+from bot.loaders.utils import html_to_markdown
+
+# The bot's async OpenAI client is bound to the loop it was first used on, so every stream runs on this one
+_loop = asyncio.new_event_loop()
+threading.Thread(target=_loop.run_forever, daemon=True).start()
+
+
+def collect(prompt: str) -> str:
+    from bot.llm import stream_generate
+
+    async def run() -> str:
+        return "".join([chunk async for chunk in stream_generate(prompt, chain="translate")])
+
+    return asyncio.run_coroutine_threadsafe(run(), _loop).result()
+
+
+def make_cases() -> list[tuple[str, Callable[[], Any]]]:
+    from bot import chains
+
+    article = html_to_markdown((FIXTURES / "html" / "news.html").read_bytes())
+    # Prompts differ on every call, so nothing is answered from a cache
+    n = itertools.count()
+    return [
+        ("summarize news.html", lambda: chains.summarize(f"{article}\n{next(n)}")),
+        ("polish", lambda: chains.polish(f"this sentence have some grammar mistake {next(n)}")),
+        ("extract_keywords", lambda: chains.extract_keywords(f"台北有哪些好吃的夜市 {next(n)}")),
+        ("extract_product", lambda: chains.extract_product(f"Ultralight Down Jacket, NT$2,990, navy {next(n)}")),
+        ("generate_recipe", lambda: chains.generate_recipe(f"番茄炒蛋 {next(n)}")),
+        ("stream_generate", lambda: collect(f"用一句話介紹台北 {next(n)}")),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this")
+    parser.add_argument("--output", type=Path, help="Write the results here instead of stdout")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency, args.tokens_per_second)
+    with serve_stub(config) as base_url:
+        use_stub(base_url)
+        cases = [
+            {"name": name, **measure(func, args.repeat, args.concurrency)}
+            for name, func in make_cases()
+            if args.filter in name
+        ]
+
+    results = {
+        "commit": get_commit(),
+        "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "stub": {"latency": config.latency, "tokens_per_second": config.tokens_per_second},
+        "cases": cases,
+    }
+
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
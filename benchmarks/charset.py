@@ -0,0 +1,63 @@
+"""Compare decoding HTML with charset_normalizer on the whole document against the charset fast path.
+
+Usage: uv run python benchmarks/charset.py [--repeat N]
+"""
+
+import argparse
+import json
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import charset_normalizer
+
+from bot.loaders.charset import decode_html
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "loaders" / "fixtures" / "html"
+
+
+def measure(func: Callable[[], str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def make_cases() -> list[tuple[str, bytes, str | None]]:
+    cases: list[tuple[str, bytes, str | None]] = []
+    for path in sorted(FIXTURES.glob("*.html")):
+        content = path.read_bytes()
+        cases.append((path.name, content, None))
+        # Large pages, as served with and without a charset in the Content-Type header
+        cases.append((f"{path.name} x100", content * 100, None))
+        cases.append((f"{path.name} x100 (header)", content * 100, "text/html; charset=utf-8"))
+
+    undeclared = (FIXTURES / "blog_zh.html").read_text().replace('<meta charset="utf-8">', "")
+    cases.append(("blog_zh.html x100 (big5, undeclared)", undeclared.encode("big5") * 100, None))
+    return cases
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = []
+    for name, content, content_type in make_cases():
+        detect_time = measure(lambda: str(charset_normalizer.from_bytes(content).best()), args.repeat)  # noqa: B023
+        fast_time = measure(lambda: decode_html(content, content_type), args.repeat)  # noqa: B023
+        results.append(
+            {
+                "case": name,
+                "bytes": len(content),
+                "charset_normalizer_ms": round(detect_time * 1000, 3),
+                "fast_path_ms": round(fast_time * 1000, 3),
+                "speedup": round(detect_time / fast_time, 1),
+            }
+        )
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
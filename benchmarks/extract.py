@@ -0,0 +1,47 @@
+"""Compare main-content extraction with converting the whole page, on the HTML fixture corpus.
+
+Usage: uv run python benchmarks/extract.py [--repeat N]
+"""
+
+import argparse
+import json
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from bot.loaders.utils import html_to_markdown
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "loaders" / "fixtures" / "html"
+
+
+def measure(func: Callable[[], str], repeat: int) -> tuple[float, str]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    results = []
+    for path in sorted(FIXTURES.glob("*.html")):
+        content = path.read_text()
+        whole_time, whole = measure(lambda: html_to_markdown(content, extract=False), args.repeat)  # noqa: B023
+        main_time, main = measure(lambda: html_to_markdown(content), args.repeat)  # noqa: B023
+        results.append(
+            {
+                "fixture": path.name,
+                "html_bytes": len(content.encode("utf-8")),
+                "whole_page": {"ms": round(whole_time * 1000, 3), "chars": len(whole)},
+                "main_content": {"ms": round(main_time * 1000, 3), "chars": len(main)},
+            }
+        )
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
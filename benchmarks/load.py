@@ -0,0 +1,391 @@
+"""Load the real bot with synthetic updates, served by a local fake Bot API, to find where latency falls apart.
+
+The bot is built by create_app and polls the fake API, which hands out updates at the given rates and answers
+every other method with a plausible result. Reports per command the latency from an update being available
+to its handler returning, the time spent in the handler, and the throughput, along with the event loop lag.
+
+The LLM and the quote APIs are whatever the environment points at, unless --stub-llm answers the LLM calls
+from the local OpenAI stub, uncached, and --quote-latency answers /t from fake quote sources. URLs for /s are
+served from the fixture corpus, with a distinct query per update so loads are not shared. With both options
+the whole run is offline.
+
+Usage: uv run python benchmarks/load.py [--mix s=1,t=2,gpt=1] [--rates 5,10,20] [--duration 30] [--output FILE]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from collections import defaultdict
+from collections.abc import Callable
+from collections.abc import Coroutine
+from contextlib import ExitStack
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qsl
+
+from loguru import logger
+from openai_stub import StubConfig
+from openai_stub import serve_stub
+from openai_stub import use_stub
+from suite import serve_fixtures
+from telegram.ext import Application
+from telegram.ext import CommandHandler
+
+from bot.bot import create_app
+from bot.tools.quotes import QuoteSource
+from bot.tools.quotes import get_quote_service
+
+BOT_TOKEN = "123456:LOADTEST"
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "Load Test Bot", "username": "load_test_bot"}
+FIRST_CHAT_ID = 1000
+
+COMMAND_TEXTS = {
+    "s": "/s {base_url}/html/news.html?n={n}",
+    "t": "/t AAPL 2330",
+    "gpt": "/gpt 用一句話介紹台北 #{n}",
+    "polish": "/polish this sentence have some grammar mistake that need fixing #{n}",
+}
+
+# Seconds between event loop lag samples
+LAG_INTERVAL = 0.05
+
+
+def percentiles(values: list[float]) -> dict[str, float | None]:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    cuts = statistics.quantiles(values, n=100, method="inclusive") if len(values) > 1 else [values[0]] * 99
+    return {
+        "p50": round(cuts[49] * 1000, 1),
+        "p95": round(cuts[94] * 1000, 1),
+        "p99": round(cuts[98] * 1000, 1),
+        "max": round(max(values) * 1000, 1),
+    }
+
+
+class FakeBotAPI:
+    """The Bot API methods the bot calls, with updates queued by the harness for getUpdates."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls: Counter[str] = Counter()
+        self._updates: list[dict[str, Any]] = []
+        self._available_at: dict[int, float] = {}
+        self._condition = threading.Condition()
+        self._message_ids = itertools.count(1)
+        self._update_ids = itertools.count(1)
+
+    def next_message_id(self) -> int:
+        return next(self._message_ids)
+
+    def add_update(self, chat_id: int, text: str) -> int:
+        update_id = next(self._update_ids)
+        command = text.split(" ", 1)[0]
+        message = self.message(chat_id, text)
+        message["from"] = {"id": chat_id, "is_bot": False, "first_name": "User"}
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(command)}]
+        with self._condition:
+            self._updates.append({"update_id": update_id, "message": message})
+            self._available_at[update_id] = time.perf_counter()
+            self._condition.notify_all()
+        return update_id
+
+    def available_at(self, update_id: int) -> float:
+        with self._condition:
+            return self._available_at[update_id]
+
+    def message(self, chat_id: int, text: str) -> dict[str, Any]:
+        return {
+            "message_id": self.next_message_id(),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": text,
+        }
+
+    def get_updates(self, params: dict[str, Any]) -> list[dict[str, Any]]:
+        offset = int(params.get("offset") or 0)
+        # Short of the bot's long-polling timeout, so stopping the updater does not wait long
+        timeout = min(float(params.get("timeout") or 0), 1.0)
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._updates = [update for update in self._updates if update["update_id"] >= offset]
+            while not self._updates and (remaining := deadline - time.monotonic()) > 0:
+                self._condition.wait(remaining)
+            return self._updates[:100]
+
+    def call(self, method: str, params: dict[str, Any]) -> Any:
+        self.calls[method] += 1
+        if method == "getUpdates":
+            return self.get_updates(params)
+
+        if self.latency:
+            time.sleep(self.latency)
+        if method == "getMe":
+            return BOT_USER
+        if method in ("sendMessage", "editMessageText", "sendDocument", "sendPhoto"):
+            chat_id = int(params.get("chat_id") or FIRST_CHAT_ID)
+            message = self.message(chat_id, str(params.get("text", "")))
+            if method == "editMessageText" and params.get("message_id"):
+                message["message_id"] = int(params["message_id"])
+            message["from"] = BOT_USER
+            return message
+        return True
+
+
+def make_handler(api: FakeBotAPI) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        # Keep connections alive, as the bot's client pools them
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately, which Nagle's algorithm would hold back for a delayed ACK
+        disable_nagle_algorithm = True
+
+        def do_POST(self) -> None:  # noqa: N802
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            content_type = self.headers.get("Content-Type", "")
+            if content_type.startswith("application/json"):
+                params = json.loads(body or b"{}")
+            elif content_type.startswith("application/x-www-form-urlencoded"):
+                params = dict(parse_qsl(body.decode()))
+            else:
+                # Files are sent as multipart, and only the method matters for them
+                params = {}
+
+            method = self.path.rsplit("/", 1)[-1]
+            payload = json.dumps({"ok": True, "result": api.call(method, params)}).encode()
+            try:
+                self.send_response(HTTPStatus.OK)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            except (BrokenPipeError, ConnectionResetError):
+                # The bot hung up, e.g. on a long poll cancelled while the harness shuts down
+                self.close_connection = True
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return Handler
+
+
+@dataclass
+class Sample:
+    command: str
+    available_at: float
+    started_at: float
+    finished_at: float
+    ok: bool
+
+
+@dataclass
+class Recorder:
+    api: FakeBotAPI
+    samples: list[Sample] = field(default_factory=list)
+    lags: list[float] = field(default_factory=list)
+
+    def wrap(
+        self, command: str, callback: Callable[..., Coroutine[Any, Any, Any]]
+    ) -> Callable[..., Coroutine[Any, Any, Any]]:
+        async def timed(update: Any, context: Any) -> Any:
+            started_at = time.perf_counter()
+            ok = False
+            try:
+                result = await callback(update, context)
+                ok = True
+                return result
+            finally:
+                available_at = self.api.available_at(update.update_id)
+                self.samples.append(Sample(command, available_at, started_at, time.perf_counter(), ok))
+
+        return timed
+
+    async def watch_event_loop(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lags.append(time.perf_counter() - start - LAG_INTERVAL)
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        command, _, weight = part.partition("=")
+        if command not in COMMAND_TEXTS:
+            raise argparse.ArgumentTypeError(f"Unknown command: {command}, expected one of {', '.join(COMMAND_TEXTS)}")
+        mix[command] = float(weight or 1)
+    return mix
+
+
+def use_fake_quotes(latency: float) -> None:
+    def fetch(symbols: list[str]) -> dict[str, str]:
+        time.sleep(latency)
+        return {symbol: f"{symbol} 100\\.00 🔺 1\\.00%" for symbol in symbols}
+
+    get_quote_service().sources = (QuoteSource(name="fake", fetch=fetch),)
+
+
+async def run_stage(
+    app: Application,
+    api: FakeBotAPI,
+    recorder: Recorder,
+    mix: dict[str, float],
+    rate: float,
+    duration: float,
+    users: int,
+    fixtures_url: str,
+    rng: random.Random,
+) -> dict[str, Any]:
+    """Offer updates at a fixed rate, whether or not the bot keeps up, then wait for it to finish them."""
+    recorder.samples.clear()
+    recorder.lags.clear()
+    sent: Counter[str] = Counter()
+    commands, weights = list(mix), list(mix.values())
+
+    start = time.perf_counter()
+    for n in range(int(rate * duration)):
+        delay = start + n / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        command = rng.choices(commands, weights)[0]
+        text = COMMAND_TEXTS[command].format(base_url=fixtures_url, n=n)
+        api.add_update(FIRST_CHAT_ID + n % users, text)
+        sent[command] += 1
+    offered_for = time.perf_counter() - start
+
+    while len(recorder.samples) < sum(sent.values()) and time.perf_counter() - start < duration * 10:
+        await asyncio.sleep(0.1)
+    elapsed = time.perf_counter() - start
+
+    by_command: defaultdict[str, list[Sample]] = defaultdict(list)
+    for sample in recorder.samples:
+        by_command[sample.command].append(sample)
+
+    results = {}
+    for command in commands:
+        samples = by_command[command]
+        results[command] = {
+            "sent": sent[command],
+            "completed": sum(sample.ok for sample in samples),
+            "failed": sum(not sample.ok for sample in samples),
+            "throughput_per_second": round(len(samples) / elapsed, 2),
+            "latency_ms": percentiles([sample.finished_at - sample.available_at for sample in samples]),
+            "handler_ms": percentiles([sample.finished_at - sample.started_at for sample in samples]),
+        }
+
+    return {
+        "rate": rate,
+        "offered_seconds": round(offered_for, 2),
+        "elapsed_seconds": round(elapsed, 2),
+        "update_queue_size": app.update_queue.qsize(),
+        "commands": results,
+        "event_loop_lag_ms": percentiles(recorder.lags),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    api = FakeBotAPI(latency=args.api_latency)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(api))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ["BOT_TOKEN"] = BOT_TOKEN
+    os.environ["BOT_API_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["BOT_WHITELIST"] = ",".join(str(FIRST_CHAT_ID + i) for i in range(args.users))
+    if args.quote_latency is not None:
+        use_fake_quotes(args.quote_latency)
+
+    app = create_app()
+    recorder = Recorder(api)
+    for handler in app.handlers[0]:
+        if isinstance(handler, CommandHandler):
+            command = next(iter(handler.commands))
+            handler.callback = recorder.wrap(command, handler.callback)
+
+    llm_stub = StubConfig(args.llm_latency, args.llm_tokens_per_second) if args.stub_llm else None
+    stages = []
+    rng = random.Random(args.seed)
+    try:
+        with serve_fixtures() as fixtures_url, ExitStack() as stack:
+            if llm_stub is not None:
+                use_stub(stack.enter_context(serve_stub(llm_stub)))
+            async with app:
+                if app.post_init:
+                    await app.post_init(app)
+                await app.updater.start_polling(poll_interval=0.0, timeout=10)  # type: ignore[union-attr]
+                await app.start()
+                watcher = asyncio.create_task(recorder.watch_event_loop())
+                try:
+                    for rate in args.rates:
+                        logger.warning("Offering {} updates per second for {}s", rate, args.duration)
+                        stage = await run_stage(
+                            app, api, recorder, args.mix, rate, args.duration, args.users, fixtures_url, rng
+                        )
+                        stages.append(stage)
+                finally:
+                    watcher.cancel()
+                    await app.updater.stop()  # type: ignore[union-attr]
+                    await app.stop()
+            if app.post_shutdown:
+                await app.post_shutdown(app)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    return {
+        "mix": args.mix,
+        "duration": args.duration,
+        "users": args.users,
+        "api_latency": args.api_latency,
+        "llm_stub": asdict(llm_stub) if llm_stub is not None else None,
+        "stages": stages,
+        "api_calls": dict(api.calls),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("s=1,t=2,gpt=1"), help="Weights of commands")
+    parser.add_argument(
+        "--rates",
+        type=lambda value: [float(rate) for rate in value.split(",")],
+        default=[5.0],
+        help="Updates per second, one stage per rate",
+    )
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to offer updates per stage")
+    parser.add_argument("--users", type=int, default=20, help="Chats the updates come from")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="Seconds the fake Bot API takes per call")
+    parser.add_argument("--quote-latency", type=float, help="Answer /t from fake sources taking this many seconds")
+    parser.add_argument("--stub-llm", action="store_true", help="Answer LLM calls from the local OpenAI stub")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds before the stub's first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=50.0, help="The stub's token rate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Write the results here instead of stdout")
+    parser.add_argument("--verbose", action="store_true", help="Keep the bot's own logs")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logger.remove()
+        logger.add(sys.stderr, level="WARNING")
+
+    output = json.dumps(asyncio.run(run(args)), indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""A local stand-in for the OpenAI chat completions API, for benchmarking the bot without the network.
+
+Answers structured-output requests with canned responses that are valid for the bot's response models,
+falling back to an instance generated from the JSON schema for any other model. Plain and streamed requests
+get a canned reply. Every response waits for a first-token latency, then produces tokens at a set rate.
+
+Point the bot at it with OPENAI_BASE_URL=http://127.0.0.1:PORT/v1 and any OPENAI_API_KEY.
+
+Usage: uv run python benchmarks/openai_stub.py [--port 8000] [--latency 0.5] [--tokens-per-second 50]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextlib import suppress
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Any
+
+from bot.llm import estimate_tokens
+
+# Chains calling the LLM through the bot's cache, which would otherwise answer repeated prompts
+CHAINS = (
+    "summarize",
+    "summarize_chunk",
+    "polish",
+    "extract_keywords",
+    "format",
+    "translate",
+    "translate_and_explain",
+)
+
+REPLY = "台北是台灣的首都，也是政治、經濟與文化的中心，擁有便利的捷運、豐富的夜市美食，以及台北 101 等知名地標。"
+
+# Keyed by the name of the response model, which the SDK sends as the name of the JSON schema
+RESPONSES: dict[str, dict[str, Any]] = {
+    "Summary": {
+        "chain_of_thought": {
+            "steps": [
+                {
+                    "context": "文章介紹新的載入流程",
+                    "reasoning": "作者比較了改版前後的延遲與成功率",
+                    "conclusion": "新的流程在多數網站上更快也更穩定",
+                },
+                {
+                    "context": "文章提到仍有限制",
+                    "reasoning": "部分網站需要瀏覽器才能取得內容",
+                    "conclusion": "這些網站仍依賴較慢的備援方式",
+                },
+            ],
+            "final_conclusion": "改版大幅縮短了常見網站的等待時間，少數網站仍需備援。",
+        },
+        "summary_text": "文章說明團隊如何改寫網頁載入流程，讓多個載入器同時競速，並以快取避免重複下載，縮短回應時間。",
+        "insights": [
+            "同時嘗試多個載入器能降低最慢情況的延遲",
+            "快取與合併重複請求能減少對外部網站的負擔",
+            "需要瀏覽器的網站仍是主要的延遲來源",
+        ],
+        "hashtags": ["#Performance", "#WebScraping", "#Engineering"],
+    },
+    "Products": {
+        "products": [
+            {
+                "name": "Ultralight Down Jacket",
+                "price": {"amount": 2990.0, "currency": "TWD"},
+                "color": "Navy",
+                "url": "https://shop.example.com/products/450310",
+                "product_number": "450310",
+                "features": ["Water-repellent finish", "Packs into its own pocket", "Machine washable"],
+            }
+        ]
+    },
+    "Recipe": {
+        "name": "番茄炒蛋",
+        "ingredients": [
+            {"name": "雞蛋", "quantity": 3.0, "unit": "顆"},
+            {"name": "牛番茄", "quantity": 2.0, "unit": "顆"},
+            {"name": "蔥", "quantity": 1.0, "unit": "根"},
+            {"name": "糖", "quantity": 1.0, "unit": "小匙"},
+        ],
+        "instructions": [
+            {"step_number": 1, "instruction": "番茄切塊，蔥切段，雞蛋打散備用。"},
+            {"step_number": 2, "instruction": "熱油將蛋液炒至半熟後盛起。"},
+            {"step_number": 3, "instruction": "炒軟番茄，加糖調味，再放回雞蛋與蔥段拌勻即可。"},
+        ],
+    },
+    "Keywords": {"keywords": ["台北", "捷運", "夜市", "台北 101"]},
+    "PolishedText": {
+        "polished_text": "This sentence has a few grammar mistakes that need fixing.",
+        "detected_language": "English",
+    },
+}
+
+
+SCALARS: dict[str | None, Any] = {"integer": 1, "number": 1.0, "boolean": True, "null": None}
+
+
+def resolve(schema: dict[str, Any], root: dict[str, Any]) -> dict[str, Any]:
+    while "$ref" in schema:
+        schema = root["$defs"][schema["$ref"].rsplit("/", 1)[-1]]
+    return schema
+
+
+def make_instance(schema: dict[str, Any], root: dict[str, Any]) -> Any:
+    """Return a value valid for the JSON schema, for response models without a canned response."""
+    schema = resolve(schema, root)
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "const" in schema:
+        return schema["const"]
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            options = [option for option in schema[key] if resolve(option, root).get("type") != "null"]
+            return make_instance((options or schema[key])[0], root)
+
+    match schema.get("type"):
+        case "object":
+            return {name: make_instance(value, root) for name, value in schema.get("properties", {}).items()}
+        case "array":
+            return [make_instance(schema.get("items", {}), root) for _ in range(max(schema.get("minItems", 0), 2))]
+        case _:
+            return SCALARS.get(schema.get("type"), "範例")
+
+
+@dataclass
+class StubConfig:
+    # Seconds before the first token, and tokens produced per second after it, 0 for no limit
+    latency: float = 0.0
+    tokens_per_second: float = 0.0
+
+
+class StubBackend:
+    def __init__(self, config: StubConfig) -> None:
+        self.config = config
+        self.requests = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def count(self) -> int:
+        with self._lock:
+            self.requests += 1
+        return next(self._ids)
+
+    def content(self, request: dict[str, Any]) -> str:
+        response_format = request.get("response_format") or {}
+        if response_format.get("type") != "json_schema":
+            return REPLY
+
+        json_schema = response_format["json_schema"]
+        schema = json_schema["schema"]
+        # Fields added to a model since its response was written are filled in from the schema
+        content = {**make_instance(schema, schema), **RESPONSES.get(json_schema.get("name", ""), {})}
+        return json.dumps(content, ensure_ascii=False)
+
+    def pieces(self, content: str) -> Iterator[str]:
+        """Split the content into the pieces streamed, waiting for the latency and token rate."""
+        time.sleep(self.config.latency)
+        for start in range(0, len(content), 4):
+            piece = content[start : start + 4]
+            if self.config.tokens_per_second:
+                time.sleep(max(estimate_tokens(piece), 1) / self.config.tokens_per_second)
+            yield piece
+
+    def usage(self, request: dict[str, Any], content: str) -> dict[str, int]:
+        prompt = "\n".join(str(message.get("content") or "") for message in request.get("messages", []))
+        prompt_tokens, completion_tokens = estimate_tokens(prompt), estimate_tokens(content)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def completion(self, request: dict[str, Any]) -> dict[str, Any]:
+        request_id = self.count()
+        content = self.content(request)
+        for _ in self.pieces(content):
+            pass
+        return {
+            "id": f"chatcmpl-stub-{request_id}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content, "refusal": None},
+                    "finish_reason": "stop",
+                    "logprobs": None,
+                }
+            ],
+            "usage": self.usage(request, content),
+        }
+
+    def chunks(self, request: dict[str, Any]) -> Iterator[dict[str, Any]]:
+        request_id = self.count()
+        content = self.content(request)
+        base = {
+            "id": f"chatcmpl-stub-{request_id}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+        }
+
+        yield {**base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}]}
+        for piece in self.pieces(content):
+            yield {**base, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+        yield {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+
+        if (request.get("stream_options") or {}).get("include_usage"):
+            yield {**base, "choices": [], "usage": self.usage(request, content)}
+
+
+def make_handler(backend: StubBackend) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately, which Nagle's algorithm would hold back for a delayed ACK
+        disable_nagle_algorithm = True
+
+        def send_json(self, status: HTTPStatus, payload: dict[str, Any]) -> None:
+            body = json.dumps(payload, ensure_ascii=False).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_chunk(self, data: bytes) -> None:
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def do_POST(self) -> None:  # noqa: N802
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_json(HTTPStatus.NOT_FOUND, {"error": {"message": f"Unknown path: {self.path}"}})
+                return
+
+            if not request.get("stream"):
+                self.send_json(HTTPStatus.OK, backend.completion(request))
+                return
+
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for chunk in backend.chunks(request):
+                self.send_chunk(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+            self.send_chunk(b"data: [DONE]\n\n")
+            self.send_chunk(b"")
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return Handler
+
+
+@contextmanager
+def serve_stub(config: StubConfig, host: str = "127.0.0.1", port: int = 0) -> Iterator[str]:
+    """Serve the stub on a thread, yielding the base URL to use as OPENAI_BASE_URL."""
+    server = ThreadingHTTPServer((host, port), make_handler(StubBackend(config)))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://{host}:{server.server_address[1]}/v1"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class LocalTelegraph:
+    """Creates no pages, for the summaries linking their reasoning on Telegraph, which has no local stand-in."""
+
+    def __init__(self) -> None:
+        self._ids = itertools.count(1)
+
+    def create_page(self, title: str, **kwargs: Any) -> dict[str, str]:
+        return {"url": f"https://telegra.ph/stub-{next(self._ids)}"}
+
+
+def use_stub(base_url: str) -> None:
+    """Send the bot's LLM calls to the stub, uncached, and its Telegraph pages nowhere."""
+    import bot.utils
+
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ["OPENAI_API_KEY"] = "stub"
+    os.environ.pop("AZURE_OPENAI_API_KEY", None)
+    os.environ["LLM_CACHE_BYPASS"] = ",".join(CHAINS)
+    telegraph = LocalTelegraph()
+    bot.utils.get_telegraph_client = lambda: telegraph  # type: ignore[assignment]
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Token rate, 0 for no limit")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    with serve_stub(StubConfig(args.latency, args.tokens_per_second), args.host, args.port) as base_url:
+        print(f"OPENAI_BASE_URL={base_url}", flush=True)
+        with suppress(KeyboardInterrupt):
+            threading.Event().wait()
+
+
+if __name__ == "__main__":
+    main()
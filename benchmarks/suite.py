@@ -0,0 +1,212 @@
+"""Measure the loaders and text processing offline, serving the fixture corpus from a local HTTP server.
+
+Writes the latency and throughput of every case as JSON, and with --compare reports the cases whose median
+latency regressed against the results of an earlier commit.
+
+Usage: uv run python benchmarks/suite.py [--repeat N] [--concurrency N] [--output FILE] [--compare FILE]
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Callable
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import UTC
+from datetime import datetime
+from functools import partial
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+
+from bot.loaders.httpx import HttpxLoader
+from bot.loaders.pdf import PDFLoader
+from bot.loaders.pdf import read_pdf_content
+from bot.loaders.pipeline import PipelineLoader
+from bot.loaders.utils import html_to_markdown
+from bot.loaders.utils import markdownify_html
+from bot.loaders.utils import normalize_whitespace
+from bot.utils import parse_url
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "loaders" / "fixtures"
+CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".pdf": "application/pdf",
+    ".json": "application/json",
+}
+
+MESSAGES = [
+    "https://example.com/articles/2024/10/faster-loaders?utm_source=telegram",
+    "看看這篇 https://news.example.com.tw/story/123456 寫得不錯",
+    "/s summarize this please https://x.com/example/status/1850000000000000000",
+    "no link in this message, just a long question about how the summary command works " * 4,
+]
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # noqa: N802
+        # The query is ignored, so requests can be made distinct without new fixtures
+        path = (FIXTURES / urlparse(self.path).path.lstrip("/")).resolve()
+        if not path.is_relative_to(FIXTURES.resolve()) or not path.is_file():
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        body = path.read_bytes()
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", CONTENT_TYPES.get(path.suffix, "application/octet-stream"))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@contextmanager
+def serve_fixtures() -> Iterator[str]:
+    """Serve the fixtures on a free local port, yielding the base URL."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def measure(func: Callable[[], Any], repeat: int, concurrency: int = 1) -> dict[str, Any]:
+    """Time `func` one call at a time for latency, then from `concurrency` threads for throughput."""
+    func()  # Warm up clients, pools and caches
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    result: dict[str, Any] = {
+        "repeat": repeat,
+        "mean_ms": round(statistics.fmean(timings) * 1000, 3),
+        "p50_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(statistics.quantiles(timings, n=20)[-1] * 1000, 3) if repeat > 1 else None,
+        "max_ms": round(max(timings) * 1000, 3),
+        "ops_per_second": round(repeat / sum(timings), 2),
+    }
+
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            start = time.perf_counter()
+            list(executor.map(lambda _: func(), range(repeat)))
+            result["concurrency"] = concurrency
+            result["concurrent_ops_per_second"] = round(repeat / (time.perf_counter() - start), 2)
+    return result
+
+
+def make_cases(base_url: str) -> list[tuple[str, Callable[[], Any], bool]]:
+    """Return the cases as (name, function, whether it does I/O and is also run concurrently)."""
+    cases: list[tuple[str, Callable[[], Any], bool]] = []
+
+    html_paths = sorted((FIXTURES / "html").glob("*.html"))
+    for path in html_paths:
+        content = path.read_bytes()
+        cases.append((f"html_to_markdown {path.name}", partial(html_to_markdown, content), False))
+
+    whole_pages = "\n".join(markdownify_html(path.read_text()) for path in html_paths) * 20
+    cases.append(("normalize_whitespace corpus x20", lambda: normalize_whitespace(whole_pages), False))
+    cases.append(("parse_url messages", lambda: [parse_url(message) for message in MESSAGES], False))
+
+    pdf = (FIXTURES / "pdf" / "report.pdf").read_bytes()
+    cases.append(("read_pdf_content report.pdf", lambda: read_pdf_content(pdf), False))
+
+    httpx_loader = HttpxLoader()
+    for path in html_paths:
+        url = f"{base_url}/html/{path.name}"
+        cases.append((f"HttpxLoader {path.name}", partial(httpx_loader.load, url), True))
+    json_url = f"{base_url}/json/fxtwitter_status.json"
+    cases.append(("HttpxLoader fxtwitter_status.json", lambda: httpx_loader.load(json_url), True))
+
+    pdf_url = f"{base_url}/pdf/report.pdf"
+    cases.append(("PDFLoader report.pdf", lambda: PDFLoader().load(pdf_url), True))
+
+    # The loaders that work offline, in pipeline order, so a page also pays for the PDF attempt failing
+    pipeline = PipelineLoader()
+    pipeline.loaders = [PDFLoader(), HttpxLoader()]
+    cases.append(("PipelineLoader report.pdf", lambda: pipeline.load(pdf_url), True))
+    news_url = f"{base_url}/html/news.html"
+    cases.append(("PipelineLoader news.html", lambda: pipeline.load(news_url), True))
+    return cases
+
+
+def get_commit() -> str | None:
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    """Print the change in median latency per case, returning the cases slower than the threshold allows."""
+    before = {case["name"]: case for case in baseline["cases"]}
+    regressions = []
+    print(f"{'case':<48} {'before':>10} {'after':>10} {'ratio':>7}", file=sys.stderr)
+    for case in results["cases"]:
+        old = before.get(case["name"])
+        if old is None or not old["p50_ms"]:
+            continue
+        ratio = case["p50_ms"] / old["p50_ms"]
+        flag = " !" if ratio > threshold else ""
+        print(f"{case['name']:<48} {old['p50_ms']:>10.3f} {case['p50_ms']:>10.3f} {ratio:>7.2f}{flag}", file=sys.stderr)
+        if ratio > threshold:
+            regressions.append(case["name"])
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this")
+    parser.add_argument("--output", type=Path, help="Write the results here instead of stdout")
+    parser.add_argument("--compare", type=Path, help="Results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Median latency ratio counted as a regression")
+    args = parser.parse_args()
+
+    with serve_fixtures() as base_url:
+        cases = []
+        for name, func, io_bound in make_cases(base_url):
+            if args.filter in name:
+                cases.append({"name": name, **measure(func, args.repeat, args.concurrency if io_bound else 1)})
+
+    results = {
+        "commit": get_commit(),
+        "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cases": cases,
+    }
+
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.threshold)
+        if regressions:
+            sys.exit(f"Regressed: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
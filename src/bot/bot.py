@@ -1,6 +1,10 @@
 from __future__ import annotations
 
 import os
+from collections.abc import Callable
+from collections.abc import Coroutine
+from typing import Any
+from typing import Final
 
 from loguru import logger
 from telegram import Update
@@ -10,6 +14,19 @@ from telegram.ext import MessageHandler
 from telegram.ext import filters
 
 from . import callbacks
+from .http import close_clients
+from .metrics import REGISTRY
+from .metrics import UPDATE_QUEUE_SIZE
+from .metrics import track_command
+from .tracing import TracedRequest
+from .tracing import trace_update
+from .webhook import get_webhook_config
+from .webhook import run_webhook
+from .webhook import start_health_server
+from .webhook import start_metrics_server
+from .workers import shutdown_workers
+
+DEFAULT_BOT_API_URL: Final[str] = "https://api.telegram.org"
 
 
 def get_chat_filter() -> filters.BaseFilter:
@@ -29,34 +46,94 @@ def get_bot_token() -> str:
     return token
 
 
-def run_bot() -> None:
+def get_bot_api_url() -> str:
+    """Return the Bot API server, BOT_API_URL if set, e.g. a self-hosted telegram-bot-api."""
+    return os.getenv("BOT_API_URL", DEFAULT_BOT_API_URL).rstrip("/")
+
+
+async def start_servers(app: Application) -> None:
+    webhook_config = app.bot_data.get("webhook_config")
+    if webhook_config is not None:
+        app.bot_data["health_server"] = start_health_server(
+            app, webhook_config.health_port, webhook_config.health_listen
+        )
+
+    port = os.getenv("BOT_METRICS_PORT")
+    if not port:
+        return
+
+    REGISTRY.add_collector(lambda: UPDATE_QUEUE_SIZE.set(app.update_queue.qsize()))
+    app.bot_data["metrics_server"] = start_metrics_server(int(port), os.getenv("BOT_METRICS_LISTEN", "127.0.0.1"))
+
+
+async def stop_workers(app: Application) -> None:
+    for name in ("health_server", "metrics_server"):
+        server = app.bot_data.pop(name, None)
+        if server is not None:
+            server.stop()
+    shutdown_workers()
+    await close_clients()
+
+
+def command(name: str, callback: Callable[..., Coroutine[Any, Any, Any]], **kwargs: Any) -> CommandHandler:
+    return CommandHandler(name, track_command(name, trace_update(name, callback)), **kwargs)
+
+
+def create_app() -> Application:
     chat_filter = get_chat_filter()
+    api_url = get_bot_api_url()
 
-    app = Application.builder().token(get_bot_token()).build()
+    # Handlers hand their blocking work to the worker pools, so updates can be processed concurrently
+    app = (
+        Application.builder()
+        .token(get_bot_token())
+        .base_url(f"{api_url}/bot")
+        .base_file_url(f"{api_url}/file/bot")
+        # The pool size the builder gives its own request object
+        .request(TracedRequest(connection_pool_size=256))
+        .concurrent_updates(True)
+        .post_init(start_servers)
+        .post_shutdown(stop_workers)
+        .build()
+    )
     app.add_handlers(
         [
-            CommandHandler("help", callbacks.handle_help, filters=chat_filter),
-            CommandHandler("s", callbacks.summarize, filters=chat_filter),
-            CommandHandler("jp", callbacks.create_translate_callback("日本語"), filters=chat_filter),
-            CommandHandler("tc", callbacks.create_translate_callback("台灣話"), filters=chat_filter),
-            CommandHandler("en", callbacks.create_translate_callback("English"), filters=chat_filter),
-            CommandHandler("polish", callbacks.handle_polish, filters=chat_filter),
-            CommandHandler("t", callbacks.query_ticker, filters=chat_filter),
-            CommandHandler("yt", callbacks.search_youtube, filters=chat_filter),
-            CommandHandler("g", callbacks.search_google, filters=chat_filter),
-            CommandHandler("recipe", callbacks.generate_recipe, filters=chat_filter),
-            CommandHandler("trip", callbacks.handle_trip, filters=chat_filter),
-            CommandHandler("ljp", callbacks.handle_learn_japanese, filters=chat_filter),
-            CommandHandler("fate", callbacks.handle_fate, filters=chat_filter),
-            CommandHandler("gpt", callbacks.handle_gpt, filters=chat_filter),
-            CommandHandler("f", callbacks.handle_format, filters=chat_filter),
-            CommandHandler("p", callbacks.extract_product, filters=chat_filter),
-            CommandHandler("echo", callbacks.handle_echo),
-            MessageHandler(filters=chat_filter & filters.REPLY, callback=callbacks.handle_user_reply),
-            MessageHandler(filters=chat_filter, callback=callbacks.summarize_document),
+            command("help", callbacks.handle_help, filters=chat_filter),
+            command("s", callbacks.summarize, filters=chat_filter),
+            command("jp", callbacks.create_translate_callback("日本語"), filters=chat_filter),
+            command("tc", callbacks.create_translate_callback("台灣話"), filters=chat_filter),
+            command("en", callbacks.create_translate_callback("English"), filters=chat_filter),
+            command("polish", callbacks.handle_polish, filters=chat_filter),
+            command("t", callbacks.query_ticker, filters=chat_filter),
+            command("yt", callbacks.search_youtube, filters=chat_filter),
+            command("g", callbacks.search_google, filters=chat_filter),
+            command("recipe", callbacks.generate_recipe, filters=chat_filter),
+            command("trip", callbacks.handle_trip, filters=chat_filter),
+            command("ljp", callbacks.handle_learn_japanese, filters=chat_filter),
+            command("fate", callbacks.handle_fate, filters=chat_filter),
+            command("gpt", callbacks.handle_gpt, filters=chat_filter),
+            command("f", callbacks.handle_format, filters=chat_filter),
+            command("p", callbacks.extract_product, filters=chat_filter),
+            command("echo", callbacks.handle_echo),
+            MessageHandler(
+                filters=chat_filter & filters.REPLY, callback=trace_update("reply", callbacks.handle_user_reply)
+            ),
+            MessageHandler(filters=chat_filter, callback=trace_update("document", callbacks.summarize_document)),
         ]
     )
     app.add_handler(MessageHandler(filters=chat_filter, callback=callbacks.log_message_update), group=1)
 
     callbacks.add_error_handler(app)
+    return app
+
+
+def run_bot() -> None:
+    app = create_app()
+
+    # Webhooks if a public URL is configured, e.g. to run several instances behind a load balancer
+    webhook_config = get_webhook_config()
+    if webhook_config is not None:
+        run_webhook(app, webhook_config)
+        return
+
     app.run_polling(allowed_updates=Update.ALL_TYPES)
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from typing import Final
+from typing import Generic
+from typing import TypeVar
+
+from loguru import logger
+
+DEFAULT_CACHE_DIR: Final[str] = "~/.cache/bot"
+
+T = TypeVar("T")
+
+
+def get_cache_dir() -> Path:
+    path = os.getenv("BOT_CACHE_DIR")
+    if not path:
+        path = DEFAULT_CACHE_DIR
+    cache_dir = Path(path).expanduser()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+@dataclass
+class CacheEntry:
+    value: str
+    expires_at: float
+    metadata: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def expired(self) -> bool:
+        return time.time() >= self.expires_at
+
+
+class TTLCache(Generic[T]):
+    """A thread-safe in-memory cache holding at most `maxsize` entries for `ttl` seconds each."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[str, tuple[float, T]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> T | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or time.monotonic() >= item[0]:
+                self._data.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: str, value: T) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache:
+    """A string cache on disk, evicting the least recently used entries above `max_size` bytes.
+
+    Expired entries are kept until they are evicted, so callers can revalidate them instead of
+    loading them again. The database may be shared by several threads and processes.
+    """
+
+    def __init__(self, path: str | Path, max_size: int) -> None:
+        self.path = Path(path)
+        self.max_size = max_size
+        self._local = threading.local()
+
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    metadata TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> CacheEntry | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, metadata, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+
+        value, metadata, expires_at = row
+        return CacheEntry(value=value, expires_at=expires_at, metadata=json.loads(metadata))
+
+    def set(self, key: str, value: str, ttl: float, metadata: dict[str, str] | None = None) -> None:
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (key, value, json.dumps(metadata or {}), size, now + ttl, now),
+            )
+        self.evict()
+
+    def touch(self, key: str, ttl: float) -> None:
+        """Mark an entry as fresh for another `ttl` seconds."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("UPDATE entries SET expires_at = ?, accessed_at = ? WHERE key = ?", (now + ttl, now, key))
+
+    def delete(self, key: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def evict(self) -> None:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                DELETE FROM entries WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC, key) AS total FROM entries
+                    ) WHERE total > ?
+                )
+                """,
+                (self.max_size,),
+            )
+        if cursor.rowcount > 0:
+            logger.info("Evicted {} entries from {}", cursor.rowcount, self.path)
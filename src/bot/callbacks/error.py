@@ -11,6 +11,7 @@ from telegram.ext import Application
 from telegram.ext import ContextTypes
 
 from ..utils import create_page
+from ..workers import run_blocking
 
 
 async def handle_error(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -30,7 +31,7 @@ async def handle_error(update: object, context: ContextTypes.DEFAULT_TYPE) -> No
         tb_string = "".join(tb_list)
         html_content += f"<pre>Traceback (most recent call last):\n{html.escape(tb_string)}</pre>"
 
-    page_url = create_page(title="Error", html_content=html_content)
+    page_url = await run_blocking("error", create_page, title="Error", html_content=html_content)
 
     chat_id = os.getenv("DEVELOPER_CHAT_ID")
     if chat_id:
@@ -7,15 +7,20 @@ from telegram import Update
 from telegram.ext import ContextTypes
 
 from .. import chains
-from ..loaders import PipelineLoader
+from ..deadline import Deadline
 from ..utils import create_page
 from ..utils import parse_url
+from ..workers import run_blocking
+from .utils import LOAD_TIMEOUT
 from .utils import get_message_text
+from .utils import load_url_once
 
 MAX_LENGTH: Final[int] = 1_000
 
 
 async def handle_format(update: Update, _: ContextTypes.DEFAULT_TYPE) -> None:
+    deadline = Deadline.after(LOAD_TIMEOUT)
+
     if not update.message:
         return
 
@@ -25,13 +30,13 @@ async def handle_format(update: Update, _: ContextTypes.DEFAULT_TYPE) -> None:
 
     url = parse_url(message_text)
     if url:
-        message_text = PipelineLoader().load(url)
+        message_text = await load_url_once(url, deadline)
 
-    resp = chains.format(message_text)
+    resp = await run_blocking("f", chains.format, message_text)
     logger.info("Formatted text: {}", resp)
 
     if len(resp.content) > MAX_LENGTH:
-        text = create_page(title=resp.title, html_content=resp.content.replace("\n", "<br>"))
+        text = await run_blocking("f", create_page, title=resp.title, html_content=resp.content.replace("\n", "<br>"))
     else:
         text = resp.content
     await update.message.reply_text(text)
@@ -5,6 +5,7 @@ from telegram import Update
 from telegram.ext import ContextTypes
 
 from .. import chains
+from ..workers import run_blocking
 from .utils import get_message_text
 
 
@@ -16,7 +17,7 @@ async def generate_prompt(update: Update, _: ContextTypes.DEFAULT_TYPE) -> None:
     if not message_text:
         return
 
-    text = chains.generate_prompt(message_text)
+    text = await run_blocking("gpt", chains.generate_prompt, message_text)
     logger.info("Prompt: {}", text)
 
     await update.message.reply_text(text)
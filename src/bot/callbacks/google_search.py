@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import httpx
 from markdownify import markdownify
 from telegram import Update
 from telegram.constants import ParseMode
@@ -8,6 +7,8 @@ from telegram.ext import ContextTypes
 
 from ..chains import extract_keywords
 from ..chains import summarize
+from ..http import get_async_client
+from ..workers import run_blocking
 from .utils import get_message_text
 
 
@@ -19,15 +20,16 @@ async def search_google(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     if not text:
         return
 
-    keywords = extract_keywords(text=text)
+    keywords = await run_blocking("g", extract_keywords, text=text)
     if not keywords:
         return
 
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url="https://www.google.com/search", params={"q": keywords})
-        resp.raise_for_status()
+    resp = await get_async_client().get(url="https://www.google.com/search", params={"q": keywords})
+    resp.raise_for_status()
 
-    summarized = summarize(text=text + "\n" + markdownify(resp.text, strip=["a", "img"]).strip())
+    summarized = await run_blocking(
+        "g", summarize, text=text + "\n" + markdownify(resp.text, strip=["a", "img"]).strip()
+    )
 
     res = [
         summarized,
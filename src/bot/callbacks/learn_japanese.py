@@ -4,12 +4,17 @@ from telegram import Update
 from telegram.ext import ContextTypes
 
 from .. import chains
-from ..loaders import PipelineLoader
+from ..deadline import Deadline
 from ..utils import parse_url
+from ..workers import run_blocking
+from .utils import LOAD_TIMEOUT
 from .utils import get_message_text
+from .utils import load_url_once
 
 
 async def handle_learn_japanese(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    deadline = Deadline.after(LOAD_TIMEOUT)
+
     if not update.message:
         return
 
@@ -19,7 +24,7 @@ async def handle_learn_japanese(update: Update, context: ContextTypes.DEFAULT_TY
 
     url = parse_url(text)
     if url:
-        text += "\n" + PipelineLoader().load(url)
+        text += "\n" + await load_url_once(url, deadline)
 
-    res = chains.learn_japanese(text)
+    res = await run_blocking("ljp", chains.learn_japanese, text)
     await update.message.reply_text(str(res))
@@ -5,6 +5,7 @@ from telegram import Update
 from telegram.ext import ContextTypes
 
 from .. import chains
+from ..workers import run_blocking
 from .utils import get_message_text
 
 
@@ -16,7 +17,7 @@ async def handle_polish(update: Update, _: ContextTypes.DEFAULT_TYPE) -> None:
     if not message_text:
         return
 
-    text = chains.polish(message_text)
+    text = await run_blocking("polish", chains.polish, message_text)
     logger.info("Polished text: {}", text)
 
     await update.message.reply_text(text)
@@ -4,6 +4,7 @@ from telegram import Update
 from telegram.ext import ContextTypes
 
 from .. import chains
+from ..workers import run_blocking
 from .utils import get_message_text
 
 
@@ -13,6 +14,6 @@ async def extract_product(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
     text = get_message_text(update)
 
-    products = chains.extract_product(text=text)
+    products = await run_blocking("p", chains.extract_product, text=text)
 
     await update.message.reply_text(str(products))
@@ -4,6 +4,7 @@ from telegram import Update
 from telegram.ext import ContextTypes
 
 from .. import chains
+from ..workers import run_blocking
 from .utils import get_message_text
 
 
@@ -16,6 +17,6 @@ async def generate_recipe(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
     text = get_message_text(update)
 
-    recipe = chains.generate_recipe(text=text)
+    recipe = await run_blocking("recipe", chains.generate_recipe, text=text)
 
     await update.message.reply_text(recipe)
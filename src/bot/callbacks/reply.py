@@ -1,30 +1,42 @@
 from __future__ import annotations
 
-from lazyopenai import create_chat
 from telegram import Update
 from telegram.ext import ContextTypes
 
+from ..conversations import get_conversation_store
+from ..llm import stream_chat
 from ..tools import GetCurrentTime
 from ..tools import GoogleSearch
 from ..tools import LoanTool
 from ..tools import TarotCard
+from .streaming import reply_streaming
 from .utils import get_message_key
 from .utils import get_message_text
 
 
-async def send_reply_to_user(update: Update, context: ContextTypes.DEFAULT_TYPE, messages) -> None:
+async def send_reply_to_user(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    messages,
+    parent_key: str | None = None,
+    history_length: int = 0,
+) -> None:
+    """Reply to the conversation and store it for follow-up replies.
+
+    Args:
+        messages: The conversation so far, ending with the user's message.
+        parent_key: Key of the bot message the user replied to, if any.
+        history_length: Number of leading messages already stored under `parent_key`.
+    """
     if not update.message:
         return
 
-    chat = create_chat(tools=[GoogleSearch, TarotCard, LoanTool, GetCurrentTime])
-
-    chat.load_messages(messages)
-    resp = chat.create()
-
-    reply_message = await update.message.reply_text(resp)
+    # The reply and any tool calls are appended to messages while streaming
+    chunks = stream_chat(messages, tools=[GoogleSearch, TarotCard, LoanTool, GetCurrentTime])
+    reply_message, _ = await reply_streaming(update.message, chunks)
     new_key = get_message_key(reply_message)
 
-    context.chat_data[new_key] = chat.dump_messages()  # type: ignore
+    get_conversation_store().save(new_key, messages[history_length:], parent=parent_key)
 
 
 async def handle_user_reply(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -47,12 +59,13 @@ async def handle_user_reply(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
     key = get_message_key(reply_to_message)
 
-    messages = context.chat_data.get(key, [])  # type: ignore
-    messages += [
+    history = get_conversation_store().load(key)
+    messages = [
+        *history,
         {
             "role": "user",
             "content": new_message,
-        }
+        },
     ]
 
-    await send_reply_to_user(update, context, messages)
+    await send_reply_to_user(update, context, messages, parent_key=key, history_length=len(history))
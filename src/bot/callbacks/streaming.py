@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from collections.abc import Callable
+from datetime import timedelta
+from typing import Final
+
+from loguru import logger
+from telegram import Message
+from telegram.constants import ChatType
+from telegram.constants import MessageLimit
+from telegram.error import BadRequest
+from telegram.error import RetryAfter
+
+PLACEHOLDER: Final[str] = "…"
+
+# Telegram allows about one edit per second in a private chat and 20 messages per minute in a group
+PRIVATE_EDIT_INTERVAL: Final[float] = 1.0
+GROUP_EDIT_INTERVAL: Final[float] = 3.0
+
+
+def get_edit_interval(message: Message) -> float:
+    return PRIVATE_EDIT_INTERVAL if message.chat.type == ChatType.PRIVATE else GROUP_EDIT_INTERVAL
+
+
+async def edit_text(message: Message, text: str) -> float:
+    """Edit the message, returning how many seconds to wait if Telegram asked us to slow down."""
+    try:
+        await message.edit_text(text[: MessageLimit.MAX_TEXT_LENGTH])
+    except RetryAfter as e:
+        logger.warning("Rate limited while editing message, retry after {}", e.retry_after)
+        if isinstance(e.retry_after, timedelta):
+            return e.retry_after.total_seconds()
+        return float(e.retry_after)
+    except BadRequest as e:
+        # Raised when the text did not change since the last edit
+        if "not modified" not in str(e).lower():
+            raise
+    return 0.0
+
+
+async def reply_streaming(
+    message: Message,
+    chunks: AsyncIterator[str],
+    transform: Callable[[str], str] | None = None,
+) -> tuple[Message, str]:
+    """Reply with a placeholder and edit it as chunks of the answer arrive.
+
+    Edits are throttled to Telegram's rate limits, and the last edit always shows the full answer.
+
+    Args:
+        message: The message to reply to.
+        chunks: The streamed answer.
+        transform: Applied to the text before it is shown, e.g. to strip quotation marks.
+
+    Returns:
+        The reply message and the full, transformed text.
+    """
+    reply = await message.reply_text(PLACEHOLDER)
+    interval = get_edit_interval(message)
+
+    text = ""
+    shown = PLACEHOLDER
+    next_edit = 0.0
+    async for chunk in chunks:
+        text += chunk
+
+        display = transform(text) if transform else text
+        if not display.strip() or display == shown or time.monotonic() < next_edit:
+            continue
+
+        retry_after = await edit_text(reply, display)
+        if not retry_after:
+            shown = display
+        next_edit = time.monotonic() + max(interval, retry_after)
+
+    text = transform(text) if transform else text
+    if text != shown:
+        await asyncio.sleep(max(next_edit - time.monotonic(), 0))
+        while retry_after := await edit_text(reply, text or PLACEHOLDER):
+            await asyncio.sleep(retry_after)
+
+    return reply, text
@@ -8,14 +8,21 @@ from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 
 from .. import chains
-from ..loaders import PipelineLoader
+from ..deadline import Deadline
 from ..loaders.pdf import read_pdf_content
 from ..loaders.utils import read_html_content
+from ..singleflight import get_single_flight
+from ..utils import normalize_url
 from ..utils import parse_url
+from ..workers import run_blocking
+from .utils import LOAD_TIMEOUT
 from .utils import get_message_text
+from .utils import load_url_once
 
 
 async def summarize(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    deadline = Deadline.after(LOAD_TIMEOUT)
+
     if not update.message:
         return
 
@@ -31,14 +38,15 @@ async def summarize(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     logger.info("Parsed URL: {}", url)
 
     try:
-        text = PipelineLoader().load(url)
+        text = await load_url_once(url, deadline)
     except Exception as e:
         logger.error("Failed to load URL: {}", e)
         await update.message.reply_text(f"Unable to load content from: {url}")
         return
     logger.info("Text length: {}", len(text))
 
-    result = chains.summarize(text)
+    # Everyone running /s on the link meanwhile gets the same summary
+    result = await get_single_flight().do("s", normalize_url(url), lambda: run_blocking("s", chains.summarize, text))
 
     logger.info("Summarized text: {}", result)
     await update.message.reply_text(result, parse_mode=ParseMode.HTML, disable_web_page_preview=True)
@@ -57,12 +65,12 @@ async def summarize_document(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
     text = None
     if file_path.suffix == ".pdf":
-        text = read_pdf_content(file_path)
+        text = await run_blocking("s", read_pdf_content, file_path)
     elif file_path.suffix == ".html":
-        text = read_html_content(file_path)
+        text = await run_blocking("s", read_html_content, file_path)
 
     if text:
-        summarized = chains.summarize(text)
+        summarized = await run_blocking("s", chains.summarize, text)
         await update.message.reply_text(summarized, parse_mode=ParseMode.HTML, disable_web_page_preview=True)
 
     os.remove(file_path)
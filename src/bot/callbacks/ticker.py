@@ -1,14 +1,11 @@
 from __future__ import annotations
 
-import json
-
-from loguru import logger
 from telegram import Update
 from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
-from twse.stock_info import query_stock_info
 
-from .. import tools
+from ..tools.quotes import get_quote_service
+from ..workers import run_blocking
 
 
 async def query_ticker(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -18,26 +15,8 @@ async def query_ticker(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     if not context.args:
         return
 
-    # Query Yahoo Finance
-    yf_result = tools.query_tickers(context.args)
-
-    # Query TWSE
-    twse_results = []
-    for symbol in context.args:
-        try:
-            twse_results += [query_stock_info(symbol.strip()).pretty_repr()]
-        except json.JSONDecodeError as e:
-            logger.error("Failed to get ticker for {}, got error: {}", symbol, e)
-            continue
-
-    # Combine results
-    results = []
-    if yf_result:
-        results += [yf_result]
-
-    for twse_result in twse_results:
-        if twse_result:
-            results += [twse_result]
+    # Yahoo Finance and TWSE are queried concurrently
+    results = await run_blocking("t", get_quote_service().query, context.args)
 
     result = "\n\n".join(results).strip()
 
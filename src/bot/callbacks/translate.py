@@ -8,16 +8,22 @@ from telegram import Update
 from telegram.ext import ContextTypes
 
 from .. import chains
-from ..loaders import PipelineLoader
+from ..deadline import Deadline
 from ..utils import create_page
 from ..utils import parse_url
+from ..workers import run_blocking
+from .streaming import reply_streaming
+from .utils import LOAD_TIMEOUT
 from .utils import get_message_text
+from .utils import load_url_once
 
 MAX_LENGTH: Final[int] = 1_000
 
 
 def create_translate_callback(lang: str) -> Callable:
     async def translate(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        deadline = Deadline.after(LOAD_TIMEOUT)
+
         if not update.message:
             return
 
@@ -27,17 +33,17 @@ def create_translate_callback(lang: str) -> Callable:
 
         url = parse_url(message_text)
         if url:
-            message_text = PipelineLoader().load(url)
+            message_text = await load_url_once(url, deadline)
 
-        if context.args and context.args[0] == "explain":
-            reply_text = chains.translate_and_explain(message_text, lang=lang)
-            logger.info("Translated and explained text to {}: {}", lang, reply_text)
-        else:
-            reply_text = chains.translate(message_text, lang=lang)
-            logger.info("Translated text to {}: {}", lang, reply_text)
+        explain = bool(context.args and context.args[0] == "explain")
+        chunks = chains.stream_translate(message_text, lang=lang, explain=explain)
+        reply, reply_text = await reply_streaming(update.message, chunks, transform=lambda text: text.strip('"'))
+        logger.info("Translated text to {} (explain={}): {}", lang, explain, reply_text)
 
         if len(reply_text) > MAX_LENGTH:
-            reply_text = create_page(title="Translation", html_content=reply_text.replace("\n", "<br>"))
-        await update.message.reply_text(reply_text)
+            page_url = await run_blocking(
+                "translate", create_page, title="Translation", html_content=reply_text.replace("\n", "<br>")
+            )
+            await reply.edit_text(page_url)
 
     return translate
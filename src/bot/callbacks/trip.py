@@ -10,6 +10,7 @@ from telegram import Update
 from telegram.ext import ContextTypes
 from tripplus import RedemptionRequest
 
+from ..workers import run_blocking
 from .utils import get_message_text
 
 SYSTEM_PROMPT = """
@@ -56,7 +57,9 @@ async def handle_trip(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
 
     message_text = get_message_text(update)
 
-    reply_text = generate(
+    reply_text = await run_blocking(
+        "trip",
+        generate,
         message_text,
         system=SYSTEM_PROMPT,
         tools=[AwardSearch],
@@ -1,6 +1,17 @@
+from typing import Final
+
 from telegram import Message
 from telegram import Update
 
+from ..deadline import Deadline
+from ..loaders import load_url
+from ..singleflight import get_single_flight
+from ..utils import normalize_url
+from ..workers import run_blocking
+
+# Seconds a command may spend waiting for a worker and loading a URL, counted from when the update arrives
+LOAD_TIMEOUT: Final[float] = 60.0
+
 
 def get_message_text(update: Update, include_reply_to_message: bool = True) -> str:
     message = update.message
@@ -34,3 +45,10 @@ def strip_command(text: str) -> str:
 
 def get_message_key(message: Message) -> str:
     return f"{message.message_id}:{message.chat.id}"
+
+
+async def load_url_once(url: str, deadline: Deadline) -> str:
+    """Load the URL on the load lane, sharing one load with the commands loading the same URL meanwhile."""
+    return await get_single_flight().do(
+        "load", normalize_url(url), lambda: run_blocking("load", load_url, url, deadline)
+    )
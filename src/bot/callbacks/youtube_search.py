@@ -8,9 +8,15 @@ from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 from youtube_search import YoutubeSearch
 
+from ..workers import run_blocking
+
 MAX_RESULTS: Final[int] = 10
 
 
+def search_youtube_videos(search_terms: str) -> list[dict] | str:
+    return YoutubeSearch(search_terms=search_terms, max_results=MAX_RESULTS).to_dict()
+
+
 async def search_youtube(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not update.message:
         return
@@ -18,7 +24,7 @@ async def search_youtube(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     if not context.args:
         return
 
-    result = YoutubeSearch(search_terms="_".join(context.args), max_results=MAX_RESULTS).to_dict()
+    result = await run_blocking("yt", search_youtube_videos, "_".join(context.args))
     if not result:
         return
 
@@ -7,5 +7,6 @@ from .product import extract_product
 from .qa import answer_question
 from .recipe import generate_recipe
 from .summary import summarize
+from .translation import stream_translate
 from .translation import translate
 from .translation import translate_and_explain
@@ -1,9 +1,8 @@
-from typing import cast
-
-from lazyopenai import generate
 from pydantic import BaseModel
 from pydantic import Field
 
+from ..llm import generate
+
 
 class FormatResponse(BaseModel):
     title: str = Field(..., description="The main title for the document.")
@@ -15,5 +14,6 @@ def format(text: str, lang: str = "台灣話") -> FormatResponse:
         f'"""{text}"""',
         system=f"Provide a well-structured and properly normalized version of the text in Markdown format with {lang}.",  # noqa: E501
         response_format=FormatResponse,
+        chain="format",
     )
-    return cast(FormatResponse, response)
+    return response
@@ -1,6 +1,7 @@
-from lazyopenai import generate
 from pydantic import BaseModel
 
+from ..llm import generate
+
 SYSTEM_PROMPT = """
 Extract the most relevant keywords from the provided text to use them for Google search.
 
@@ -26,5 +27,6 @@ def extract_keywords(text: str) -> str:
         f"Extract keywords from the following text:\n{text}",
         system=SYSTEM_PROMPT,
         response_format=Keywords,
+        chain="extract_keywords",
     )
     return str(keywords)
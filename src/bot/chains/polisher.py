@@ -1,7 +1,8 @@
-from lazyopenai import generate
 from pydantic import BaseModel
 from pydantic import Field
 
+from ..llm import generate
+
 
 class PolishedText(BaseModel):
     polished_text: str = Field(..., description="The polished text.")
@@ -32,4 +33,11 @@ SYSTEM_PROMPT = """Your task is to **polish** the input text in any language to
 
 
 def polish(text: str) -> str:
-    return str(generate(f"Polish the following text:\n{text}", system=SYSTEM_PROMPT, response_format=PolishedText))
+    return str(
+        generate(
+            f"Polish the following text:\n{text}",
+            system=SYSTEM_PROMPT,
+            response_format=PolishedText,
+            chain="polish",
+        )
+    )
@@ -1,10 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Final
+
 import markdown2
-from lazyopenai import generate
 from pydantic import BaseModel
 from pydantic import Field
 
+from ..llm import estimate_tokens
+from ..llm import generate
 from ..utils import create_page
 
+# Longer inputs are summarized chunk by chunk before the final summary
+MAX_SINGLE_CALL_TOKENS: Final[int] = 12_000
+CHUNK_TOKENS: Final[int] = 6_000
+MAX_CONCURRENCY: Final[int] = 4
+
 SUMMARY_PROMPT = """
 請以台灣繁體中文為以下內容生成：
 
@@ -23,6 +32,16 @@ SUMMARY_PROMPT = """
 {text}
 """.strip()  # noqa
 
+CHUNK_SUMMARY_PROMPT = """
+以下是一份長篇內容的第 {index}/{total} 部分。請以台灣繁體中文整理這部分的重點：
+
+- 保留重要的論點、數據、人物與結論，避免加入任何虛構或未經證實的資訊。
+- 使用條列式，不需要開場白或結語。
+
+輸入：
+{text}
+""".strip()  # noqa
+
 
 class ThoughtStep(BaseModel):
     context: str = Field(..., description="此步驟考慮的具體情境或條件")
@@ -89,13 +108,59 @@ class Summary(BaseModel):
         )
 
 
+def split_text(text: str, max_tokens: int) -> list[str]:
+    """Split the text on line boundaries into chunks of at most `max_tokens` estimated tokens.
+
+    Lines longer than the budget are split on their own.
+    """
+    chunks: list[str] = []
+    lines: list[str] = []
+    tokens = 0
+
+    for line in text.splitlines():
+        line_tokens = estimate_tokens(line)
+        if lines and tokens + line_tokens > max_tokens:
+            chunks.append("\n".join(lines))
+            lines, tokens = [], 0
+
+        if line_tokens > max_tokens:
+            step = max(len(line) * max_tokens // line_tokens, 1)
+            chunks += [line[i : i + step] for i in range(0, len(line), step)]
+            continue
+
+        lines.append(line)
+        tokens += line_tokens
+
+    if lines:
+        chunks.append("\n".join(lines))
+    return chunks
+
+
+def summarize_chunks(chunks: list[str]) -> list[str]:
+    def summarize_chunk(index: int, chunk: str) -> str:
+        prompt = CHUNK_SUMMARY_PROMPT.format(index=index + 1, total=len(chunks), text=chunk)
+        return generate(prompt, chain="summarize_chunk")
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENCY) as executor:
+        return list(executor.map(summarize_chunk, range(len(chunks)), chunks))
+
+
 def summarize(text: str) -> str:
     """Generate a summary of the given text.
 
+    Text over `MAX_SINGLE_CALL_TOKENS` is split into chunks that are summarized in parallel, and the
+    chunk summaries are then summarized as a whole.
+
     Args:
         text (str): The text to summarize.
 
     Returns:
         str: A formatted string containing the summary, key points, takeaways, and hashtags.
     """
-    return str(generate(SUMMARY_PROMPT.format(text=text), response_format=Summary))
+    while estimate_tokens(text) > MAX_SINGLE_CALL_TOKENS:
+        reduced = "\n\n".join(summarize_chunks(split_text(text, CHUNK_TOKENS)))
+        if estimate_tokens(reduced) >= estimate_tokens(text):
+            break
+        text = reduced
+
+    return str(generate(SUMMARY_PROMPT.format(text=text), response_format=Summary, chain="summarize"))
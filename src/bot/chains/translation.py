@@ -1,19 +1,38 @@
-from lazyopenai import generate
+from collections.abc import AsyncIterator
 
+from ..llm import generate
+from ..llm import stream_generate
 
-def translate(text: str, lang: str) -> str:
-    user_prompt = f'"""{text}"""'
 
-    system_prompt = f"""
+def get_translate_prompt(lang: str) -> str:
+    return f"""
     Translate the text delimited by triple quotation marks into {lang}.
     """.strip()
-    return generate(user_prompt, system=system_prompt).strip('"')
+
+
+def get_translate_and_explain_prompt(lang: str) -> str:
+    return f"""
+    Translate the text delimited by triple quotation marks into {lang}, and provide a concise explanation of grammar and usage in {lang}, along with example sentences to enhance understanding."
+    """.strip()  # noqa
+
+
+def translate(text: str, lang: str) -> str:
+    user_prompt = f'"""{text}"""'
+    system_prompt = get_translate_prompt(lang)
+    return generate(user_prompt, system=system_prompt, chain="translate").strip('"')
 
 
 def translate_and_explain(text: str, lang: str) -> str:
     user_prompt = f'"""{text}"""'
+    system_prompt = get_translate_and_explain_prompt(lang)
+    return generate(user_prompt, system=system_prompt, chain="translate_and_explain").strip('"')
 
-    system_prompt = f"""
-    Translate the text delimited by triple quotation marks into {lang}, and provide a concise explanation of grammar and usage in {lang}, along with example sentences to enhance understanding."
-    """.strip()  # noqa
-    return generate(user_prompt, system=system_prompt).strip('"')
+
+def stream_translate(text: str, lang: str, explain: bool = False) -> AsyncIterator[str]:
+    """Stream the translation as it is generated. The result may still be wrapped in quotation marks."""
+    user_prompt = f'"""{text}"""'
+    if explain:
+        return stream_generate(
+            user_prompt, system=get_translate_and_explain_prompt(lang), chain="translate_and_explain"
+        )
+    return stream_generate(user_prompt, system=get_translate_prompt(lang), chain="translate")
@@ -1,9 +1,10 @@
 from dotenv import find_dotenv
 from dotenv import load_dotenv
 
-from .bot import run_bot
-
 
 def main():
+    # Imported here, as spawned worker processes import the script calling main, but need none of the bot
+    from .bot import run_bot
+
     load_dotenv(find_dotenv(raise_error_if_not_found=True, usecwd=True))
     run_bot()
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC
+from abc import abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+from typing import Any
+from typing import Final
+
+from .cache import get_cache_dir
+
+DEFAULT_TTL: Final[float] = 7 * 24 * 60 * 60
+DEFAULT_MAXSIZE: Final[int] = 1024
+
+
+@dataclass
+class Node:
+    """The messages one bot reply added to a conversation thread."""
+
+    thread: str
+    parent: str | None
+    messages: list[dict[str, Any]]
+
+
+class ConversationStore(ABC):
+    """Conversations stored as a tree of nodes, one per bot reply.
+
+    Each node only holds the messages added since its parent, so continuing a conversation appends
+    one delta instead of copying the whole history. A thread and all of its nodes expire `ttl`
+    seconds after it was last used.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL) -> None:
+        self.ttl = ttl
+
+    @abstractmethod
+    def get_node(self, key: str) -> Node | None: ...
+
+    @abstractmethod
+    def put_node(self, key: str, node: Node) -> None: ...
+
+    @abstractmethod
+    def touch(self, thread: str) -> None: ...
+
+    def load(self, key: str) -> list[dict[str, Any]]:
+        """Return the full history up to and including the node stored under `key`."""
+        deltas = []
+        thread = None
+
+        node = self.get_node(key)
+        while node is not None:
+            deltas.append(node.messages)
+            thread = node.thread
+            node = self.get_node(node.parent) if node.parent else None
+
+        if thread is not None:
+            self.touch(thread)
+        return [message for delta in reversed(deltas) for message in delta]
+
+    def save(self, key: str, messages: list[dict[str, Any]], parent: str | None = None) -> None:
+        """Store the messages added after the node `parent` under `key`."""
+        parent_node = self.get_node(parent) if parent else None
+        if parent_node is None:
+            node = Node(thread=key, parent=None, messages=messages)
+        else:
+            node = Node(thread=parent_node.thread, parent=parent, messages=messages)
+
+        self.put_node(key, node)
+        self.touch(node.thread)
+
+
+class MemoryConversationStore(ConversationStore):
+    """Keeps at most `maxsize` nodes in memory, evicting the least recently used."""
+
+    def __init__(self, ttl: float = DEFAULT_TTL, maxsize: int = DEFAULT_MAXSIZE) -> None:
+        super().__init__(ttl)
+        self.maxsize = maxsize
+        self._nodes: OrderedDict[str, Node] = OrderedDict()
+        self._expires_at: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get_node(self, key: str) -> Node | None:
+        with self._lock:
+            node = self._nodes.get(key)
+            if node is None:
+                return None
+
+            if self._expires_at.get(node.thread, 0) <= time.time():
+                del self._nodes[key]
+                return None
+
+            self._nodes.move_to_end(key)
+            return node
+
+    def put_node(self, key: str, node: Node) -> None:
+        with self._lock:
+            self._nodes[key] = node
+            self._nodes.move_to_end(key)
+            while len(self._nodes) > self.maxsize:
+                self._nodes.popitem(last=False)
+
+            if len(self._expires_at) > self.maxsize:
+                now = time.time()
+                self._expires_at = {thread: t for thread, t in self._expires_at.items() if t > now}
+
+    def touch(self, thread: str) -> None:
+        with self._lock:
+            self._expires_at[thread] = time.time() + self.ttl
+
+
+class SQLiteConversationStore(ConversationStore):
+    def __init__(self, path: str | Path, ttl: float = DEFAULT_TTL) -> None:
+        super().__init__(ttl)
+        self.path = Path(path)
+        self._local = threading.local()
+
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS nodes (
+                    key TEXT PRIMARY KEY,
+                    thread TEXT NOT NULL,
+                    parent TEXT,
+                    messages TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS nodes_thread ON nodes (thread)")
+            conn.execute("CREATE TABLE IF NOT EXISTS threads (thread TEXT PRIMARY KEY, expires_at REAL NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get_node(self, key: str) -> Node | None:
+        row = (
+            self._connect()
+            .execute(
+                """
+                SELECT nodes.thread, nodes.parent, nodes.messages FROM nodes
+                JOIN threads ON nodes.thread = threads.thread
+                WHERE nodes.key = ? AND threads.expires_at > ?
+                """,
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+
+        thread, parent, messages = row
+        return Node(thread=thread, parent=parent, messages=json.loads(messages))
+
+    def put_node(self, key: str, node: Node) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO nodes VALUES (?, ?, ?, ?)",
+                (key, node.thread, node.parent, json.dumps(node.messages, ensure_ascii=False)),
+            )
+
+    def touch(self, thread: str) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO threads VALUES (?, ?)", (thread, now + self.ttl))
+            conn.execute("DELETE FROM nodes WHERE thread IN (SELECT thread FROM threads WHERE expires_at <= ?)", (now,))
+            conn.execute("DELETE FROM threads WHERE expires_at <= ?", (now,))
+
+
+class TieredConversationStore(ConversationStore):
+    """Serves recently used nodes from memory and keeps every node in a persistent store."""
+
+    def __init__(self, front: MemoryConversationStore, back: ConversationStore) -> None:
+        super().__init__(back.ttl)
+        self.front = front
+        self.back = back
+
+    def get_node(self, key: str) -> Node | None:
+        node = self.front.get_node(key)
+        if node is not None:
+            return node
+
+        node = self.back.get_node(key)
+        if node is not None:
+            self.front.put_node(key, node)
+            self.front.touch(node.thread)
+        return node
+
+    def put_node(self, key: str, node: Node) -> None:
+        self.front.put_node(key, node)
+        self.back.put_node(key, node)
+
+    def touch(self, thread: str) -> None:
+        self.front.touch(thread)
+        self.back.touch(thread)
+
+
+@cache
+def get_conversation_store() -> ConversationStore:
+    return TieredConversationStore(
+        front=MemoryConversationStore(),
+        back=SQLiteConversationStore(get_cache_dir() / "conversations.sqlite3"),
+    )
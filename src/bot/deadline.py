@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+
+
+class DeadlineExceededError(TimeoutError):
+    pass
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """A point in time by which work has to be done, passed down to everything doing the work.
+
+    Unlike SIGALRM based timeouts, deadlines work in any thread and compose: a step given its own
+    budget with `child` still finishes no later than its caller. `expires_at` is on the monotonic
+    clock, which is shared by all processes on the machine, so deadlines can be sent to workers.
+    """
+
+    expires_at: float
+
+    @classmethod
+    def after(cls, seconds: float) -> Deadline:
+        return cls(time.monotonic() + seconds)
+
+    def child(self, seconds: float) -> Deadline:
+        """Return a deadline `seconds` from now, or this one if it is sooner."""
+        return Deadline(min(self.expires_at, time.monotonic() + seconds))
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self) -> None:
+        if self.expired:
+            raise DeadlineExceededError("deadline exceeded")
+
+    def timeout(self, cap: float | None = None) -> float | None:
+        """The remaining seconds, at most `cap`, as a timeout for httpx, subprocess and the like.
+
+        Returns None if neither bounds it. Raises DeadlineExceededError if no time is left, as a zero
+        timeout often means "no timeout".
+        """
+        self.check()
+        remaining = self.remaining()
+        if cap is not None:
+            return min(remaining, cap)
+        return None if math.isinf(remaining) else remaining
+
+
+NEVER = Deadline(math.inf)
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from collections import Counter
+from collections.abc import AsyncIterator
+from collections.abc import Callable
+from collections.abc import Iterator
+from dataclasses import dataclass
+from functools import cache
+from typing import Any
+from typing import Final
+
+import httpx
+
+from .metrics import HTTP_CONNECTIONS
+from .metrics import REGISTRY
+
+MAX_CONNECTIONS: Final[int] = 100
+MAX_KEEPALIVE_CONNECTIONS: Final[int] = 20
+MAX_CONNECTIONS_PER_HOST: Final[int] = 6
+KEEPALIVE_EXPIRY: Final[float] = 30.0
+DEFAULT_TIMEOUT: Final[float] = 5.0
+
+LIMITS: Final[httpx.Limits] = httpx.Limits(
+    max_connections=MAX_CONNECTIONS,
+    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=KEEPALIVE_EXPIRY,
+)
+
+
+@dataclass
+class PoolStats:
+    requests: int
+    in_flight: int
+    # Connections kept by the pool, and how many of them wait idle for reuse
+    connections: int
+    idle_connections: int
+    in_flight_by_host: dict[str, int]
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    def __init__(self, stream: httpx.SyncByteStream, release: Callable[[], None]) -> None:
+        self._stream = stream
+        self._release: Callable[[], None] | None = release
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]) -> None:
+        self._stream = stream
+        self._release: Callable[[], None] | None = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+class _HostLimiter:
+    """Counts requests and bounds how many run against one host at a time."""
+
+    def __init__(self, max_per_host: int) -> None:
+        self.max_per_host = max_per_host
+        self.requests = 0
+        self.in_flight: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def started(self, host: str) -> None:
+        with self._lock:
+            self.requests += 1
+            self.in_flight[host] += 1
+
+    def finished(self, host: str) -> None:
+        with self._lock:
+            self.in_flight[host] -= 1
+            if self.in_flight[host] <= 0:
+                del self.in_flight[host]
+
+
+def _pool_timeout(request: httpx.Request) -> float | None:
+    return request.extensions.get("timeout", {}).get("pool")
+
+
+class LimitedTransport(httpx.HTTPTransport):
+    """An HTTP transport allowing at most `max_per_host` requests in flight per host.
+
+    A request holds its slot until its response is closed, which httpx does once the body is read. Waiting
+    for a slot counts against the request's pool timeout, like waiting for a connection.
+    """
+
+    def __init__(self, max_per_host: int = MAX_CONNECTIONS_PER_HOST, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.limiter = _HostLimiter(max_per_host)
+        self._semaphores: dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.limiter.max_per_host)
+            return self._semaphores[host]
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        semaphore = self._semaphore(host)
+        if not semaphore.acquire(timeout=_pool_timeout(request)):
+            raise httpx.PoolTimeout(f"Timed out waiting for a request slot for {host}", request=request)
+        self.limiter.started(host)
+
+        def release() -> None:
+            self.limiter.finished(host)
+            semaphore.release()
+
+        try:
+            response = super().handle_request(request)
+        except BaseException:
+            release()
+            raise
+
+        assert isinstance(response.stream, httpx.SyncByteStream)
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+
+class AsyncLimitedTransport(httpx.AsyncHTTPTransport):
+    """The asyncio counterpart of LimitedTransport."""
+
+    def __init__(self, max_per_host: int = MAX_CONNECTIONS_PER_HOST, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.limiter = _HostLimiter(max_per_host)
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.limiter.max_per_host)
+        semaphore = self._semaphores[host]
+        try:
+            async with asyncio.timeout(_pool_timeout(request)):
+                await semaphore.acquire()
+        except TimeoutError:
+            raise httpx.PoolTimeout(f"Timed out waiting for a request slot for {host}", request=request) from None
+        self.limiter.started(host)
+
+        def release() -> None:
+            self.limiter.finished(host)
+            semaphore.release()
+
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+
+        assert isinstance(response.stream, httpx.AsyncByteStream)
+        response.stream = _AsyncReleasingStream(response.stream, release)
+        return response
+
+
+def _pool_stats(transport: LimitedTransport | AsyncLimitedTransport) -> PoolStats:
+    # httpcore does not expose its pool publicly, so connections are only counted while it has the attribute
+    pool = getattr(transport, "_pool", None)
+    connections: list[Any] = list(getattr(pool, "connections", []))
+    limiter = transport.limiter
+    return PoolStats(
+        requests=limiter.requests,
+        in_flight=sum(limiter.in_flight.values()),
+        connections=len(connections),
+        idle_connections=sum(connection.is_idle() for connection in connections),
+        in_flight_by_host=dict(limiter.in_flight),
+    )
+
+
+# Clients are created per process, as connections must not be shared with forked workers
+@cache
+def _get_transport(pid: int) -> LimitedTransport:
+    return LimitedTransport(http2=True, limits=LIMITS)
+
+
+@cache
+def _get_async_transport(pid: int) -> AsyncLimitedTransport:
+    return AsyncLimitedTransport(http2=True, limits=LIMITS)
+
+
+@cache
+def _get_client(pid: int) -> httpx.Client:
+    return httpx.Client(transport=_get_transport(pid), timeout=DEFAULT_TIMEOUT)
+
+
+@cache
+def _get_async_client(pid: int) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=_get_async_transport(pid), timeout=DEFAULT_TIMEOUT)
+
+
+def get_client() -> httpx.Client:
+    """Return the process-wide client, reusing keep-alive connections across threads.
+
+    HTTP/2 is used where the server supports it. httpx asks for gzip and deflate, and for brotli and zstd if their
+    packages are installed.
+    """
+    return _get_client(os.getpid())
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the process-wide client for the event loop."""
+    return _get_async_client(os.getpid())
+
+
+def get_pool_stats() -> dict[str, PoolStats]:
+    """Return the statistics of the clients this process has created, keyed by "sync" and "async"."""
+    stats = {}
+    if _get_client.cache_info().currsize:
+        stats["sync"] = _pool_stats(_get_transport(os.getpid()))
+    if _get_async_client.cache_info().currsize:
+        stats["async"] = _pool_stats(_get_async_transport(os.getpid()))
+    return stats
+
+
+def _collect_pool_stats() -> None:
+    for client, stats in get_pool_stats().items():
+        HTTP_CONNECTIONS.set(stats.connections - stats.idle_connections, client=client, state="active")
+        HTTP_CONNECTIONS.set(stats.idle_connections, client=client, state="idle")
+
+
+REGISTRY.add_collector(_collect_pool_stats)
+
+
+async def close_clients() -> None:
+    if _get_client.cache_info().currsize:
+        get_client().close()
+    if _get_async_client.cache_info().currsize:
+        await get_async_client().aclose()
+
+    for func in (_get_client, _get_async_client, _get_transport, _get_async_transport):
+        func.cache_clear()
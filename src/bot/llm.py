@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from collections.abc import AsyncIterator
+from functools import cache
+from typing import Any
+from typing import Final
+from typing import TypeVar
+from typing import overload
+
+import lazyopenai
+import openai
+from lazyopenai.settings import get_settings
+from lazyopenai.types import BaseTool
+from loguru import logger
+from pydantic import BaseModel
+
+try:
+    from langfuse.openai import AsyncAzureOpenAI  # type: ignore
+    from langfuse.openai import AsyncOpenAI  # type: ignore
+except ImportError:
+    from openai import AsyncAzureOpenAI
+    from openai import AsyncOpenAI
+
+from .cache import SQLiteCache
+from .cache import TTLCache
+from .cache import get_cache_dir
+from .metrics import CACHE_REQUESTS
+from .metrics import LLM_DURATION
+from .metrics import LLM_TOKENS
+from .tracing import span
+from .tracing import start_span
+
+T = TypeVar("T", bound=BaseModel)
+
+CACHE_TTL: Final[float] = 24 * 60 * 60
+CACHE_MAXSIZE: Final[int] = 1024
+CACHE_MAX_SIZE_ON_DISK: Final[int] = 64 * 1024 * 1024
+
+# Han characters, kana and hangul take about one token each
+CJK_PATTERN: Final[re.Pattern[str]] = re.compile(r"[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+
+_memory_cache: TTLCache[str] = TTLCache(maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL)
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of tokens in the text without a tokenizer."""
+    cjk = len(CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk) // 4
+
+
+@cache
+def get_bypassed_chains() -> set[str]:
+    """Chains listed in LLM_CACHE_BYPASS, e.g. "summarize,polish", always call the model."""
+    chains = os.getenv("LLM_CACHE_BYPASS", "")
+    return {chain for chain in chains.replace(" ", "").split(",") if chain}
+
+
+@cache
+def get_disk_cache() -> SQLiteCache | None:
+    """Return the persistent cache if LLM_CACHE_PERSIST is set, otherwise responses only live in memory."""
+    if os.getenv("LLM_CACHE_PERSIST", "").lower() not in ("1", "true", "yes"):
+        return None
+    return SQLiteCache(get_cache_dir() / "llm.sqlite3", max_size=CACHE_MAX_SIZE_ON_DISK)
+
+
+def make_cache_key(prompt: str, system: str | None, response_format: type[BaseModel] | None) -> str:
+    """Hash the prompts and schema with the model and temperature lazyopenai calls with."""
+    settings = get_settings()
+    schema = response_format.model_json_schema() if response_format else None
+    payload = json.dumps(
+        [settings.openai_model, settings.openai_temperature, system, prompt, schema], ensure_ascii=False, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _get_cached(key: str) -> str | None:
+    value = _memory_cache.get(key)
+    if value is not None:
+        return value
+
+    disk_cache = get_disk_cache()
+    if disk_cache is None:
+        return None
+
+    entry = disk_cache.get(key)
+    if entry is None or entry.expired:
+        return None
+
+    _memory_cache.set(key, entry.value)
+    return entry.value
+
+
+def _set_cached(key: str, value: str) -> None:
+    _memory_cache.set(key, value)
+
+    disk_cache = get_disk_cache()
+    if disk_cache is not None:
+        disk_cache.set(key, value, ttl=CACHE_TTL)
+
+
+def _call_model(prompt: str, system: str | None, response_format: type[T] | None, chain: str) -> str | T:
+    with span("llm generate", chain=chain), LLM_DURATION.time(chain=chain):
+        response = lazyopenai.generate(prompt, system=system, response_format=response_format)
+
+    # lazyopenai does not return the usage, so the tokens are estimated
+    output = response.model_dump_json() if isinstance(response, BaseModel) else str(response)
+    LLM_TOKENS.inc(estimate_tokens(prompt) + estimate_tokens(system or ""), chain=chain, type="prompt")
+    LLM_TOKENS.inc(estimate_tokens(output), chain=chain, type="completion")
+    return response
+
+
+@overload
+def generate(prompt: str, system: str | None = None, response_format: None = None, *, chain: str) -> str: ...
+
+
+@overload
+def generate(prompt: str, system: str | None = None, response_format: type[T] = ..., *, chain: str) -> T: ...
+
+
+def generate(
+    prompt: str,
+    system: str | None = None,
+    response_format: type[T] | None = None,
+    *,
+    chain: str,
+) -> str | T:
+    """Call `lazyopenai.generate`, reusing earlier responses to the same model, prompts and schema.
+
+    Args:
+        prompt: The user prompt.
+        system: The system prompt.
+        response_format: The pydantic model to parse the response into.
+        chain: Name of the calling chain, used to bypass the cache with LLM_CACHE_BYPASS.
+    """
+    if chain in get_bypassed_chains():
+        return _call_model(prompt, system, response_format, chain)
+
+    key = make_cache_key(prompt, system, response_format)
+
+    cached = _get_cached(key)
+    if cached is not None:
+        logger.info("[{}] LLM cache hit: {}", chain, key)
+        CACHE_REQUESTS.inc(cache="llm", result="hit")
+        return response_format.model_validate_json(cached) if response_format else cached
+
+    CACHE_REQUESTS.inc(cache="llm", result="miss")
+    response = _call_model(prompt, system, response_format, chain)
+    if isinstance(response, BaseModel):
+        _set_cached(key, response.model_dump_json())
+    else:
+        _set_cached(key, str(response))
+    return response
+
+
+@cache
+def get_async_openai_client() -> AsyncOpenAI | AsyncAzureOpenAI:
+    """Return an async client configured like lazyopenai's, for streaming."""
+    settings = get_settings()
+
+    if settings.openai_api_key and settings.azure_openai_api_key:
+        raise ValueError("Both OpenAI and Azure OpenAI API keys are set. Please set only one.")
+
+    if settings.azure_openai_endpoint and settings.azure_openai_api_key:
+        return AsyncAzureOpenAI(
+            azure_endpoint=settings.azure_openai_endpoint,
+            api_version=settings.openai_api_version,
+            api_key=settings.azure_openai_api_key,
+        )
+    elif settings.openai_api_key:
+        return AsyncOpenAI(api_key=settings.openai_api_key)
+    else:
+        raise ValueError("No OpenAI API key set.")
+
+
+def _merge_tool_call(tool_calls: dict[int, dict[str, Any]], call: Any) -> None:
+    """Accumulate a streamed tool call delta into a complete tool call message."""
+    tool_call = tool_calls.setdefault(
+        call.index, {"id": "", "type": "function", "function": {"name": "", "arguments": ""}}
+    )
+    if call.id:
+        tool_call["id"] = call.id
+    if call.function and call.function.name:
+        tool_call["function"]["name"] += call.function.name
+    if call.function and call.function.arguments:
+        tool_call["function"]["arguments"] += call.function.arguments
+
+
+async def stream_chat(
+    messages: list[dict[str, Any]],
+    tools: list[type[BaseTool]] | None = None,
+    chain: str = "chat",
+) -> AsyncIterator[str]:
+    """Stream the assistant's reply to the conversation, running any tool calls in between.
+
+    The tool calls, their results and the final reply are appended to `messages`, so the list can be
+    stored and continued later.
+    """
+    client = get_async_openai_client()
+    settings = get_settings()
+    tools_by_name = {tool.__name__: tool for tool in tools or []}
+    tool_params = [openai.pydantic_function_tool(tool) for tool in tools or []]
+
+    while True:
+        start = time.perf_counter()
+        # Not a context manager, as the span would be left open across the yields to the caller
+        round_span = start_span("llm stream", chain=chain)
+        try:
+            stream = await client.chat.completions.create(
+                model=settings.openai_model,
+                messages=messages,  # type: ignore
+                temperature=settings.openai_temperature,
+                max_tokens=settings.openai_max_tokens or openai.NOT_GIVEN,
+                tools=tool_params or openai.NOT_GIVEN,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+
+            content = ""
+            tool_calls: dict[int, dict[str, Any]] = {}
+            async for chunk in stream:
+                # The usage comes in a last chunk without choices
+                if chunk.usage:
+                    LLM_TOKENS.inc(chunk.usage.prompt_tokens, chain=chain, type="prompt")
+                    LLM_TOKENS.inc(chunk.usage.completion_tokens, chain=chain, type="completion")
+                if not chunk.choices:
+                    continue
+
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    content += delta.content
+                    yield delta.content
+
+                for call in delta.tool_calls or []:
+                    _merge_tool_call(tool_calls, call)
+        except BaseException as e:
+            round_span.finish("error" if isinstance(e, Exception) else "cancelled", error=repr(e))
+            raise
+        LLM_DURATION.observe(time.perf_counter() - start, chain=chain)
+        round_span.finish(tool_calls=len(tool_calls))
+
+        if not tool_calls:
+            messages.append({"role": "assistant", "content": content})
+            return
+
+        messages.append({"role": "assistant", "content": content or None, "tool_calls": list(tool_calls.values())})
+        for tool_call in tool_calls.values():
+            tool = tools_by_name[tool_call["function"]["name"]].model_validate_json(tool_call["function"]["arguments"])
+            logger.info("Calling tool: {}", tool)
+            result = await asyncio.to_thread(tool)
+            messages.append({"role": "tool", "tool_call_id": tool_call["id"], "content": str(result)})
+
+
+async def stream_generate(prompt: str, system: str | None = None, *, chain: str) -> AsyncIterator[str]:
+    """Stream a plain text response, sharing the response cache with `generate`."""
+    use_cache = chain not in get_bypassed_chains()
+    key = make_cache_key(prompt, system, None)
+
+    cached = _get_cached(key) if use_cache else None
+    if cached is not None:
+        logger.info("[{}] LLM cache hit: {}", chain, key)
+        CACHE_REQUESTS.inc(cache="llm", result="hit")
+        yield cached
+        return
+    if use_cache:
+        CACHE_REQUESTS.inc(cache="llm", result="miss")
+
+    messages = [{"role": "user", "content": prompt}]
+    if system:
+        messages.insert(0, {"role": "system", "content": system})
+
+    async for chunk in stream_chat(messages, chain=chain):
+        yield chunk
+
+    if use_cache:
+        _set_cached(key, messages[-1]["content"])
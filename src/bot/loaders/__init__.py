@@ -1 +1,3 @@
+from .cache import CachedLoader
+from .cache import load_url
 from .pipeline import PipelineLoader
@@ -0,0 +1,132 @@
+from dataclasses import dataclass
+from functools import cache
+from typing import Final
+
+import httpx
+from loguru import logger
+
+from ..cache import SQLiteCache
+from ..cache import get_cache_dir
+from ..deadline import NEVER
+from ..deadline import Deadline
+from ..deadline import DeadlineExceededError
+from ..http import get_client
+from ..metrics import CACHE_REQUESTS
+from ..utils import normalize_url
+from .httpx import DEFAULT_HEADERS
+from .loader import Loader
+from .pipeline import DEFAULT_HEDGE_DELAY
+from .pipeline import PipelineLoader
+
+HOUR: Final[int] = 60 * 60
+DAY: Final[int] = 24 * HOUR
+
+DEFAULT_MAX_SIZE: Final[int] = 256 * 1024 * 1024
+VALIDATOR_TIMEOUT: Final[float] = 2.0
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    ttl: float
+    # Whether to ask the server if the page changed instead of loading it again once expired
+    revalidate: bool = False
+
+
+# Transcripts of a video do not change, web pages do
+CACHE_POLICIES: Final[dict[str, CachePolicy]] = {
+    "YoutubeLoader": CachePolicy(ttl=7 * DAY),
+    "ReelLoader": CachePolicy(ttl=7 * DAY),
+    "YtdlpLoader": CachePolicy(ttl=7 * DAY),
+    "PDFLoader": CachePolicy(ttl=DAY, revalidate=True),
+    "CloudscraperLoader": CachePolicy(ttl=HOUR, revalidate=True),
+    "HttpxLoader": CachePolicy(ttl=HOUR, revalidate=True),
+    "SinglefileLoader": CachePolicy(ttl=HOUR, revalidate=True),
+}
+DEFAULT_CACHE_POLICY: Final[CachePolicy] = CachePolicy(ttl=HOUR)
+
+
+@cache
+def get_content_cache() -> SQLiteCache:
+    return SQLiteCache(get_cache_dir() / "content.sqlite3", max_size=DEFAULT_MAX_SIZE)
+
+
+def fetch_validators(
+    url: str,
+    validators: dict[str, str] | None = None,
+    deadline: Deadline = NEVER,
+) -> tuple[int, dict[str, str]]:
+    """Send a HEAD request and return its status code with the ETag and Last-Modified headers.
+
+    If `validators` are given, the request is conditional and a 304 means the page did not change.
+    """
+    headers = dict(DEFAULT_HEADERS)
+    if validators:
+        if "etag" in validators:
+            headers["If-None-Match"] = validators["etag"]
+        if "last-modified" in validators:
+            headers["If-Modified-Since"] = validators["last-modified"]
+
+    response = get_client().head(
+        url, headers=headers, follow_redirects=True, timeout=deadline.timeout(VALIDATOR_TIMEOUT)
+    )
+    return response.status_code, {
+        name: response.headers[name] for name in ("etag", "last-modified") if name in response.headers
+    }
+
+
+def is_unchanged(url: str, validators: dict[str, str], deadline: Deadline = NEVER) -> bool:
+    try:
+        status_code, new_validators = fetch_validators(url, validators, deadline)
+    except (httpx.HTTPError, DeadlineExceededError) as e:
+        logger.info("Failed to revalidate URL: {}, got error: {}", url, e)
+        return False
+
+    if status_code == 304:
+        return True
+    return status_code == 200 and bool(new_validators) and new_validators == validators
+
+
+class CachedLoader(Loader):
+    """Cache the markdown loaded by a PipelineLoader, keyed by the normalized URL."""
+
+    def __init__(self, loader: PipelineLoader, cache: SQLiteCache | None = None) -> None:
+        self.loader = loader
+        self.cache = cache or get_content_cache()
+
+    def load(self, url: str, deadline: Deadline = NEVER) -> str:
+        key = normalize_url(url)
+
+        entry = self.cache.get(key)
+        if entry is not None:
+            policy = CACHE_POLICIES.get(entry.metadata.get("loader", ""), DEFAULT_CACHE_POLICY)
+            if not entry.expired:
+                logger.info("Cache hit for URL: {}", key)
+                CACHE_REQUESTS.inc(cache="content", result="hit")
+                return entry.value
+
+            validators = {k: v for k, v in entry.metadata.items() if k != "loader"}
+            if policy.revalidate and validators and is_unchanged(url, validators, deadline):
+                logger.info("Revalidated cached URL: {}", key)
+                self.cache.touch(key, policy.ttl)
+                CACHE_REQUESTS.inc(cache="content", result="revalidated")
+                return entry.value
+
+        CACHE_REQUESTS.inc(cache="content", result="miss")
+        result = self.loader.load_result(url, deadline)
+        policy = CACHE_POLICIES.get(result.loader, DEFAULT_CACHE_POLICY)
+
+        metadata = {"loader": result.loader}
+        if policy.revalidate:
+            try:
+                _, validators = fetch_validators(url, deadline=deadline)
+                metadata.update(validators)
+            except (httpx.HTTPError, DeadlineExceededError) as e:
+                logger.info("Failed to get validators for URL: {}, got error: {}", url, e)
+
+        self.cache.set(key, result.content, ttl=policy.ttl, metadata=metadata)
+        return result.content
+
+
+def load_url(url: str, deadline: Deadline = NEVER) -> str:
+    """Load a URL through the content cache, suitable for running in a worker process."""
+    return CachedLoader(PipelineLoader(hedge_delay=DEFAULT_HEDGE_DELAY)).load(url, deadline)
@@ -0,0 +1,87 @@
+import codecs
+import re
+from typing import Final
+
+import charset_normalizer
+
+# Bytes searched for <meta charset>, which HTML requires within the first 1024
+META_SCAN_SIZE: Final[int] = 4096
+# Bytes handed to charset_normalizer when nothing declares the charset
+DETECTION_SAMPLE_SIZE: Final[int] = 64 * 1024
+
+BOMS: Final[list[tuple[bytes, str]]] = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+CONTENT_TYPE_CHARSET_PATTERN: Final[re.Pattern[str]] = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+META_CHARSET_PATTERN: Final[re.Pattern[bytes]] = re.compile(
+    rb"<meta[^>]+charset\s*=\s*[\"']?\s*([\w.:-]+)", re.IGNORECASE
+)
+
+# Browsers decode these labels as windows-1252, and so do pages that declare them
+WINDOWS_1252_ALIASES: Final[frozenset[str]] = frozenset({"ascii", "latin-1", "iso8859-1", "iso-8859-1"})
+
+
+def normalize_charset(name: str) -> str | None:
+    """Return the Python codec name for the charset, None if Python does not know it."""
+    name = name.strip().lower()
+    if name in WINDOWS_1252_ALIASES:
+        return "cp1252"
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def sniff_charset(content: bytes, content_type: str | None = None) -> str | None:
+    """Return the charset the document declares with a BOM, the Content-Type header or <meta charset>."""
+    for bom, encoding in BOMS:
+        if content.startswith(bom):
+            return encoding
+
+    if content_type:
+        header = CONTENT_TYPE_CHARSET_PATTERN.search(content_type)
+        if header and (charset := normalize_charset(header.group(1))):
+            return charset
+
+    meta = META_CHARSET_PATTERN.search(content[:META_SCAN_SIZE])
+    if meta:
+        return normalize_charset(meta.group(1).decode("ascii", errors="ignore"))
+    return None
+
+
+def _detection_sample(content: bytes) -> bytes:
+    if len(content) <= DETECTION_SAMPLE_SIZE:
+        return content
+    # Cut at a line break, as a multibyte character cut in half fails detection
+    sample = content[:DETECTION_SAMPLE_SIZE]
+    end = sample.rfind(b"\n")
+    return sample[: end + 1] if end > 0 else sample
+
+
+def decode_html(content: bytes, content_type: str | None = None) -> str:
+    """Decode an HTML document, only running charset detection if nothing declares the charset.
+
+    Detection looks at a bounded sample from the start of the document, as its cost grows with the
+    size of its input.
+    """
+    encoding = sniff_charset(content, content_type)
+    if encoding:
+        try:
+            return content.decode(encoding)
+        except UnicodeDecodeError:
+            pass
+
+    # Undeclared pages are most often UTF-8, which is quick to validate
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        pass
+
+    best = charset_normalizer.from_bytes(_detection_sample(content)).best()
+    encoding = best.encoding if best else "utf-8"
+    return content.decode(encoding, errors="replace")
@@ -1,14 +1,16 @@
 import cloudscraper
-import timeout_decorator
 
+from ..deadline import NEVER
+from ..deadline import Deadline
 from .loader import Loader
 from .utils import html_to_markdown
 
 
 class CloudscraperLoader(Loader):
-    @timeout_decorator.timeout(5)
-    def load(self, url: str) -> str:
+    timeout = 5
+
+    def load(self, url: str, deadline: Deadline = NEVER) -> str:
         client = cloudscraper.create_scraper()
-        response = client.get(url, allow_redirects=True)
+        response = client.get(url, allow_redirects=True, timeout=deadline.timeout(self.timeout))
         response.raise_for_status()
-        return html_to_markdown(response.text)
+        return html_to_markdown(response.content, response.headers.get("content-type"))
@@ -0,0 +1,185 @@
+import html
+import re
+from typing import Final
+
+import lxml.html
+from lxml import etree
+
+# Never content, removed before scoring
+JUNK_TAGS: Final[tuple[str, ...]] = (
+    "aside",
+    "button",
+    "embed",
+    "footer",
+    "form",
+    "iframe",
+    "input",
+    "link",
+    "meta",
+    "nav",
+    "noscript",
+    "object",
+    "script",
+    "select",
+    "style",
+    "svg",
+    "template",
+    "textarea",
+)
+
+NEGATIVE_PATTERN: Final[re.Pattern[str]] = re.compile(
+    r"advert|banner|breadcrumb|combx|comment|cookie|disqus|footer|menu|modal|nav|popup|promo|related"
+    r"|share|sidebar|social|sponsor|subscribe|widget",
+    re.IGNORECASE,
+)
+POSITIVE_PATTERN: Final[re.Pattern[str]] = re.compile(
+    r"article|blog|body|content|entry|main|page|post|story|text", re.IGNORECASE
+)
+
+PARAGRAPH_TAGS: Final[tuple[str, ...]] = ("p", "pre", "td", "blockquote", "li", "div", "section", "span")
+TAG_WEIGHTS: Final[dict[str, int]] = {
+    "article": 10,
+    "main": 10,
+    "div": 5,
+    "section": 5,
+    "pre": 3,
+    "td": 3,
+    "blockquote": 3,
+    "ol": -3,
+    "ul": -3,
+    "dl": -3,
+    "th": -5,
+    "h1": -5,
+    "h2": -5,
+    "h3": -5,
+}
+CLASS_WEIGHT: Final[int] = 25
+
+MIN_PARAGRAPH_LENGTH: Final[int] = 25
+# Extracted text shorter than this is not trusted, and the whole page is converted instead
+MIN_CONTENT_LENGTH: Final[int] = 200
+
+
+def _class_weight(element: etree._Element) -> int:
+    weight = 0
+    for name in (element.get("class"), element.get("id")):
+        if not name:
+            continue
+        if NEGATIVE_PATTERN.search(name):
+            weight -= CLASS_WEIGHT
+        if POSITIVE_PATTERN.search(name):
+            weight += CLASS_WEIGHT
+    return weight
+
+
+def _text_length(element: etree._Element) -> int:
+    return len(" ".join(element.itertext()).strip())
+
+
+def _link_density(element: etree._Element) -> float:
+    length = _text_length(element)
+    if not length:
+        return 0.0
+    link_length = sum(_text_length(link) for link in element.iter("a"))
+    return link_length / length
+
+
+def remove_junk(root: etree._Element) -> None:
+    """Drop scripts, navigation, forms, comments and elements whose class or id mark them as boilerplate."""
+    etree.strip_elements(root, *JUNK_TAGS, etree.Comment, etree.ProcessingInstruction, with_tail=False)
+
+    for element in list(root.iter()):
+        if not isinstance(element.tag, str) or element.tag in ("html", "body"):
+            continue
+        if element.getparent() is None:
+            continue
+        if _class_weight(element) < 0 and _text_length(element) < 1000 * (1 + _link_density(element)):
+            element.drop_tree()
+
+
+def _is_paragraph(element: etree._Element) -> bool:
+    if element.tag not in PARAGRAPH_TAGS:
+        return False
+    # A div or span only counts if it holds text of its own rather than other blocks
+    if element.tag in ("div", "section", "span"):
+        return bool((element.text or "").strip()) and not any(
+            child.tag in ("p", "div", "section", "table", "ul", "ol", "pre") for child in element
+        )
+    return True
+
+
+def score_candidates(root: etree._Element) -> dict[etree._Element, float]:
+    scores: dict[etree._Element, float] = {}
+
+    def initialize(element: etree._Element) -> None:
+        if element not in scores:
+            scores[element] = TAG_WEIGHTS.get(element.tag, 0) + _class_weight(element)
+
+    for element in root.iter(*PARAGRAPH_TAGS):
+        if not _is_paragraph(element):
+            continue
+
+        text = " ".join(element.itertext()).strip()
+        if len(text) < MIN_PARAGRAPH_LENGTH:
+            continue
+
+        # CJK text uses full-width commas
+        score = 1 + text.count(",") + text.count("，") + text.count("、") + min(len(text) / 100, 3)
+
+        parent = element.getparent()
+        if parent is None:
+            continue
+        initialize(parent)
+        scores[parent] += score
+
+        grandparent = parent.getparent()
+        if grandparent is not None:
+            initialize(grandparent)
+            scores[grandparent] += score / 2
+
+    return {element: score * (1 - _link_density(element)) for element, score in scores.items()}
+
+
+def select_content(root: etree._Element) -> etree._Element | None:
+    scores = score_candidates(root)
+    if not scores:
+        return None
+
+    top = max(scores, key=lambda element: scores[element])
+    parent = top.getparent()
+    if parent is None:
+        return top
+
+    # Siblings scoring close to the top candidate, e.g. a second column of the same article, belong to it
+    threshold = max(10.0, scores[top] * 0.2)
+    content = lxml.html.Element("div")
+    for sibling in list(parent):
+        is_paragraph = sibling.tag == "p" and _text_length(sibling) > 80 and _link_density(sibling) < 0.25
+        if sibling is top or scores.get(sibling, 0) >= threshold or is_paragraph:
+            content.append(sibling)
+    return content
+
+
+def extract_main_content(content: str) -> str | None:
+    """Return the HTML of the main content of the page, or None if none stands out.
+
+    Works like Readability: after boilerplate is removed, paragraphs score their parent and grandparent
+    by their length and number of commas. The best container, discounted by its share of link text, is
+    the content, along with siblings that score close to it.
+    """
+    try:
+        root = lxml.html.document_fromstring(content)
+    except (etree.ParserError, ValueError):
+        return None
+
+    remove_junk(root)
+    main = select_content(root)
+    if main is None or _text_length(main) < MIN_CONTENT_LENGTH:
+        return None
+
+    # Keep the page title unless the content already starts with it
+    title = (root.findtext(".//title") or "").strip()
+    body = lxml.html.tostring(main, encoding="unicode")
+    if not title or title in " ".join(main.itertext())[: len(title) * 2]:
+        return body
+    return f"<h1>{html.escape(title)}</h1>{body}"
@@ -1,6 +1,6 @@
-import httpx
-import timeout_decorator
-
+from ..deadline import NEVER
+from ..deadline import Deadline
+from ..http import get_client
 from .loader import Loader
 from .utils import html_to_markdown
 
@@ -12,8 +12,11 @@ DEFAULT_HEADERS = {
 
 
 class HttpxLoader(Loader):
-    @timeout_decorator.timeout(5)
-    def load(self, url: str) -> str:
-        response = httpx.get(url, headers=DEFAULT_HEADERS, follow_redirects=True)
+    timeout = 5
+
+    def load(self, url: str, deadline: Deadline = NEVER) -> str:
+        response = get_client().get(
+            url, headers=DEFAULT_HEADERS, follow_redirects=True, timeout=deadline.timeout(self.timeout)
+        )
         response.raise_for_status()
-        return html_to_markdown(response.content)
+        return html_to_markdown(response.content, response.headers.get("content-type"))
@@ -1,5 +1,12 @@
+from ..deadline import NEVER
+from ..deadline import Deadline
+
+
 class Loader:
-    def load(self, url: str) -> str:
+    # Seconds a single load may take before PipelineLoader gives up on it
+    timeout: float = 10
+
+    def load(self, url: str, deadline: Deadline = NEVER) -> str:
         raise NotImplementedError
 
 
@@ -1,10 +1,29 @@
-import tempfile
-from pathlib import Path
+import math
+import multiprocessing
+import os
+from collections.abc import Iterator
+from concurrent.futures import Executor
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass
+from functools import cache
+from typing import Any
+from typing import Final
 
-import httpx
-import timeout_decorator
+from loguru import logger
 from pypdf import PdfReader
 
+from ..deadline import NEVER
+from ..deadline import Deadline
+from ..http import DEFAULT_TIMEOUT
+from ..http import get_client
+from ..pdfpages import PDFSource
+from ..pdfpages import extract_pages as _extract_pages
+from ..pdfpages import open_pdf
+from ..pdfpages import read_page
+from ..processes import get_supervisor
+from ..workers import POOLS
 from .loader import Loader
 from .loader import LoaderError
 
@@ -13,40 +32,167 @@ DEFAULT_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36",  # noqa
 }
 
+DEFAULT_MAX_PAGES: Final[int] = 50
+# Fewest pages worth sending to a worker process
+MIN_PAGES_PER_TASK: Final[int] = 4
+# Seconds before the deadline to stop extracting, to return the pages done in time
+RETURN_MARGIN: Final[float] = 0.5
+
 
 class NotPDFError(LoaderError):
     pass
 
 
+@dataclass(frozen=True)
+class PagePolicy:
+    """Which pages of a PDF to extract.
+
+    Attributes:
+        start: Index of the first page.
+        max_pages: Most pages to extract, None for all of them.
+        include_outline: Whether to put the outline, which covers the whole document, before the pages.
+    """
+
+    start: int = 0
+    max_pages: int | None = DEFAULT_MAX_PAGES
+    include_outline: bool = True
+
+    def select(self, num_pages: int) -> range:
+        stop = num_pages if self.max_pages is None else min(num_pages, self.start + self.max_pages)
+        return range(min(self.start, num_pages), stop)
+
+
+DEFAULT_PAGE_POLICY: Final[PagePolicy] = PagePolicy()
+
+
 class PDFLoader(Loader):
-    @timeout_decorator.timeout(5)
-    def load(self, url_or_file: str) -> str:
+    timeout = 5
+
+    def __init__(self, policy: PagePolicy = DEFAULT_PAGE_POLICY) -> None:
+        self.policy = policy
+
+    def load(self, url_or_file: str, deadline: Deadline = NEVER) -> str:
+        source: PDFSource = url_or_file
         if url_or_file.startswith("http"):
-            url_or_file = download_pdf_from_url(url_or_file)
-        return read_pdf_content(url_or_file)
+            source = download_pdf_from_url(url_or_file, deadline)
+        return read_pdf_content(source, self.policy, Deadline(deadline.expires_at - RETURN_MARGIN))
 
 
-def download_pdf_from_url(url: str) -> str:
-    response = httpx.get(url=url, headers=DEFAULT_HEADERS, follow_redirects=True)
+def download_pdf_from_url(url: str, deadline: Deadline = NEVER) -> bytes:
+    response = get_client().get(
+        url=url, headers=DEFAULT_HEADERS, follow_redirects=True, timeout=deadline.timeout(DEFAULT_TIMEOUT)
+    )
     response.raise_for_status()
 
     is_pdf = response.headers.get("content-type") == "application/pdf"
     if not is_pdf:
         raise NotPDFError(f"URL is not a PDF: {url}")
 
-    suffix = ".pdf" if is_pdf else None
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as fp:
-        fp.write(response.content)
-        return fp.name
+    return response.content
 
 
-def read_pdf_content(f: str | Path) -> str:
+def read_outline(reader: PdfReader) -> list[str]:
     lines = []
-    with PdfReader(f) as reader:
-        for page in reader.pages:
-            text = page.extract_text(extraction_mode="plain")
-            for line in text.splitlines():
-                if not line.strip():
-                    continue
-                lines.append(line.strip())
-    return "\n".join(lines)
+
+    def walk(items: list[Any], depth: int) -> None:
+        for item in items:
+            if isinstance(item, list):
+                walk(item, depth + 1)
+            else:
+                lines.append("  " * depth + "- " + str(item.title).strip())
+
+    walk(reader.outline, 0)
+    return lines
+
+
+def get_max_workers() -> int:
+    workers = os.getenv("PDF_WORKERS")
+    if workers:
+        return int(workers)
+    # Every media worker process has a pool of its own, next to its whisper workers, so together they take a
+    # quarter of the CPU cores
+    return max((os.cpu_count() or 1) // (4 * POOLS["media"].max_workers), 1)
+
+
+@cache
+def get_pdf_executor() -> ProcessPoolExecutor:
+    # Spawned rather than forked, as loaders run on threads. The workers only import bot.pdfpages, not the
+    # loaders package, which would pull in whisper
+    return ProcessPoolExecutor(max_workers=get_max_workers(), mp_context=multiprocessing.get_context("spawn"))
+
+
+def split_pages(pages: range, parts: int) -> list[range]:
+    """Split the pages into at most `parts` ranges of at least MIN_PAGES_PER_TASK pages each."""
+    size = max(math.ceil(len(pages) / max(parts, 1)), MIN_PAGES_PER_TASK)
+    return [range(start, min(start + size, pages.stop)) for start in range(pages.start, pages.stop, size)]
+
+
+def iter_pages(
+    source: PDFSource,
+    pages: range,
+    deadline: Deadline = NEVER,
+    executor: Executor | None = None,
+) -> Iterator[str]:
+    """Extract the pages in parallel, yielding their text in page order until the deadline passes.
+
+    This process extracts the first range of pages itself while the workers, which may still be starting,
+    take one larger range each, so every worker parses the document once.
+    """
+    first, *rest = split_pages(pages, get_max_workers() + 1) or [pages]
+
+    with ExitStack() as stack:
+        futures: list[Future[list[str]]] = []
+        if rest:
+            path = source
+            if isinstance(source, bytes):
+                # The workers memory-map one copy of the document instead of each being sent the bytes
+                path = stack.enter_context(get_supervisor().workspace()) / "document.pdf"
+                path.write_bytes(source)
+
+            executor = executor or get_pdf_executor()
+            futures = [executor.submit(_extract_pages, path, r.start, r.stop) for r in rest]
+            for future in futures:
+                stack.callback(future.cancel)
+
+        done = 0
+        with open_pdf(source) as reader:
+            for i in first:
+                if deadline.expired:
+                    break
+                yield read_page(reader, i)
+                done += 1
+
+        for future in futures:
+            try:
+                texts = future.result(timeout=deadline.timeout())
+            except TimeoutError:  # Also raised by the deadline once no time is left
+                break
+            yield from texts
+            done += len(texts)
+
+        if done < len(pages):
+            logger.warning("Stopped extracting PDF after {}/{} pages", done, len(pages))
+
+
+def read_pdf_content(
+    source: PDFSource,
+    policy: PagePolicy = DEFAULT_PAGE_POLICY,
+    deadline: Deadline = NEVER,
+) -> str:
+    """Extract the text of the pages selected by the policy, stopping early at the deadline."""
+    with open_pdf(source) as reader:
+        num_pages = len(reader.pages)
+        outline = read_outline(reader) if policy.include_outline else []
+
+    pages = policy.select(num_pages)
+
+    parts = []
+    if outline:
+        parts.append("Outline:\n" + "\n".join(outline))
+
+    texts = list(iter_pages(source, pages, deadline))
+    parts.extend(text for text in texts if text)
+
+    if texts and len(texts) < num_pages:
+        parts.append(f"(Pages {pages.start + 1}-{pages.start + len(texts)} of {num_pages})")
+    return "\n".join(parts)
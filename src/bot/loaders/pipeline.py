@@ -1,9 +1,25 @@
+import functools
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Final
 from urllib.parse import urlparse
 from urllib.parse import urlunparse
 
-import timeout_decorator
 from loguru import logger
 
+from ..deadline import NEVER
+from ..deadline import Deadline
+from ..deadline import DeadlineExceededError
+from ..metrics import LOADER_ATTEMPTS
+from ..metrics import LOADER_DURATION
+from ..tracing import Span
+from ..tracing import run_in_context
+from ..tracing import start_span
 from .cloudscraper import CloudscraperLoader
 from .httpx import HttpxLoader
 from .loader import Loader
@@ -14,6 +30,9 @@ from .singlefile import SinglefileLoader
 from .youtube import YoutubeLoader
 from .ytdlp import YtdlpLoader
 
+# Seconds to give a loader before racing the next one against it
+DEFAULT_HEDGE_DELAY: Final[float] = 1.0
+
 REPLACEMENTS = {
     "api.fxtwitter.com": [
         "twitter.com",
@@ -36,8 +55,35 @@ def replace_domain(url: str) -> str:
     return url
 
 
+@dataclass
+class Attempt:
+    loader: str
+    elapsed: float
+    # One of "ok", "empty", "error", "timeout" or "cancelled"
+    status: str
+    error: str | None = None
+
+    def __str__(self) -> str:
+        return f"{self.loader}={self.status} ({self.elapsed:.2f}s)"
+
+
+@dataclass
+class LoadResult:
+    url: str
+    content: str
+    loader: str
+    attempts: list[Attempt] = field(default_factory=list)
+
+
 class PipelineLoader(Loader):
-    def __init__(self) -> None:
+    timeout = 30
+
+    def __init__(self, hedge_delay: float | None = None) -> None:
+        """
+        Args:
+            hedge_delay: Seconds to let a loader run before also starting the next one. None tries the
+                loaders one after another, 0 starts all of them at once.
+        """
         self.loaders: list[Loader] = [
             YoutubeLoader(),
             ReelLoader(),
@@ -47,23 +93,125 @@ class PipelineLoader(Loader):
             HttpxLoader(),
             SinglefileLoader(),
         ]
+        self.hedge_delay = hedge_delay
+
+    def load(self, url: str, deadline: Deadline = NEVER) -> str:
+        return self.load_result(url, deadline).content
+
+    def load_result(self, url: str, deadline: Deadline = NEVER) -> LoadResult:
+        """Load the URL with the first loader, in pipeline order, that returns content.
 
-    @timeout_decorator.timeout(30)
-    def load(self, url: str) -> str:
+        Every loader runs on its own thread and is given up on after its `timeout`, or when the deadline
+        passes. A result is accepted as soon as all loaders before it have failed, so overlapping attempts
+        never change which loader wins, only how long it takes. The attempts still running are then
+        abandoned.
+        """
         url = replace_domain(url)
 
-        for loader in self.loaders:
-            try:
-                loaded_content = loader.load(url)
+        race = _Race(self.loaders, url, deadline.child(self.timeout))
+        try:
+            winner = race.run(self.hedge_delay)
+        finally:
+            race.cancel()
+
+        result = LoadResult(
+            url=url,
+            content=race.futures[winner].result(),
+            loader=race.attempts[winner].loader,
+            attempts=[race.attempts[i] for i in sorted(race.attempts)],
+        )
+        logger.info("Loaded URL: {} with {}, attempts: {}", url, result.loader, ", ".join(map(str, result.attempts)))
+        return result
+
+
+class _Race:
+    def __init__(self, loaders: list[Loader], url: str, deadline: Deadline) -> None:
+        self.loaders = loaders
+        self.url = url
+        self.deadline = deadline
+        self.executor = ThreadPoolExecutor(max_workers=len(loaders), thread_name_prefix="loader")
+        self.futures: dict[int, Future[str]] = {}
+        self.started_at: dict[int, float] = {}
+        self.deadlines: dict[int, Deadline] = {}
+        self.attempts: dict[int, Attempt] = {}
+        self.spans: dict[int, Span] = {}
+
+    def run(self, hedge_delay: float | None) -> int:
+        """Return the index of the winning loader."""
+        while True:
+            self.settle()
+
+            # The highest-priority loader that has not failed yet
+            head = next((i for i in range(len(self.loaders)) if self.status(i) in (None, "ok")), None)
+            if head is None:
+                raise LoaderError(f"Failed to load URL: {self.url}")
+
+            if head in self.attempts:
+                return head
+
+            if self.deadline.expired:
+                raise DeadlineExceededError(f"Failed to load URL in time: {self.url}")
+
+            if head not in self.futures:
+                self.start(head)
+                continue
+
+            timeout = min(self.deadlines[i].remaining() for i in self.running())
+            pending = [i for i in range(head + 1, len(self.loaders)) if i not in self.futures]
+            if pending and hedge_delay is not None:
+                hedge_in = max(self.started_at.values()) + hedge_delay - time.monotonic()
+                if hedge_in <= 0:
+                    self.start(pending[0])
+                    continue
+                timeout = min(timeout, hedge_in)
+
+            wait([self.futures[i] for i in self.running()], timeout=timeout, return_when=FIRST_COMPLETED)
+
+    def start(self, i: int) -> None:
+        self.started_at[i] = time.monotonic()
+        self.deadlines[i] = self.deadline.child(self.loaders[i].timeout)
+        # The attempt's span is finished when the race settles it, which may be before its thread returns
+        self.spans[i] = start_span(f"loader {self.loaders[i].__class__.__name__}", url=self.url)
+        load = functools.partial(self.loaders[i].load, self.url, self.deadlines[i])
+        self.futures[i] = self.executor.submit(run_in_context, self.spans[i].context, load)
+
+    def running(self) -> list[int]:
+        return [i for i in self.futures if i not in self.attempts]
+
+    def status(self, i: int) -> str | None:
+        attempt = self.attempts.get(i)
+        return attempt.status if attempt else None
 
-                if not loaded_content:
-                    logger.info("[{}] Failed to load URL: {}, got empty result", loader.__class__.__name__, url)
+    def settle(self) -> None:
+        for i in self.running():
+            future = self.futures[i]
+            if future.done():
+                try:
+                    content = future.result()
+                except Exception as e:
+                    self.finish(i, "error", str(e))
                     continue
+                self.finish(i, "ok" if content else "empty")
+            elif self.deadlines[i].expired:
+                self.finish(i, "timeout", "deadline exceeded")
 
-                logger.info("[{}] Successfully loaded URL: {}", loader.__class__.__name__, url)
-                return loaded_content
+    def finish(self, i: int, status: str, error: str | None = None) -> None:
+        name = self.loaders[i].__class__.__name__
+        elapsed = time.monotonic() - self.started_at[i]
+        self.attempts[i] = Attempt(loader=name, elapsed=elapsed, status=status, error=error)
+        LOADER_ATTEMPTS.inc(loader=name, status=status)
+        LOADER_DURATION.observe(elapsed, loader=name, status=status)
+        self.spans[i].finish(status, **({"error": error} if error else {}))
 
-            except Exception as e:
-                logger.info("[{}] Failed to load URL: {}, got error: {}", loader.__class__.__name__, url, e)
+        if status == "ok":
+            logger.info("[{}] Successfully loaded URL: {}", name, self.url)
+        elif status == "empty":
+            logger.info("[{}] Failed to load URL: {}, got empty result", name, self.url)
+        elif status in ("error", "timeout"):
+            logger.info("[{}] Failed to load URL: {}, got error: {}", name, self.url, error)
 
-        raise LoaderError(f"Failed to load URL: {url}")
+    def cancel(self) -> None:
+        for i in self.running():
+            self.futures[i].cancel()
+            self.finish(i, "cancelled")
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,38 +1,245 @@
+from __future__ import annotations
+
+import os
+import queue
+import subprocess
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass
+from functools import cache
+from typing import Final
 from typing import Literal
+from typing import Protocol
 
-import timeout_decorator
 from loguru import logger
+from playwright.sync_api import Playwright
+from playwright.sync_api import Route
 from playwright.sync_api import TimeoutError
 from playwright.sync_api import sync_playwright
 
+from ..deadline import NEVER
+from ..deadline import Deadline
+from ..processes import process_tree_rss
 from .loader import Loader
 from .utils import html_to_markdown
 
+WaitUntil = Literal["commit", "domcontentloaded", "load", "networkidle"]
+
+BROWSER_POOL_SIZE: Final[int] = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+# A browser is relaunched after this many pages, or once it uses more memory than this
+BROWSER_MAX_PAGES: Final[int] = int(os.getenv("BROWSER_MAX_PAGES", "100"))
+BROWSER_MAX_MEMORY_MB: Final[int] = int(os.getenv("BROWSER_MAX_MEMORY_MB", "1024"))
+
+# Not needed to read a page, and most of its bytes
+BLOCKED_RESOURCE_TYPES: Final[frozenset[str]] = frozenset({"image", "font", "media"})
+
+# Finding the driver's pid by comparing child processes needs one launch at a time
+_launch_lock = threading.Lock()
+
+
+def _child_pids(pid: int) -> set[int]:
+    output = subprocess.run(["ps", "-A", "-o", "pid=,ppid="], capture_output=True, text=True, check=True).stdout
+    return {int(child) for child, parent in (line.split() for line in output.splitlines()) if int(parent) == pid}
+
+
+def _block_resources(route: Route) -> None:
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        route.abort()
+    else:
+        route.continue_()
+
+
+class BrowserSession(Protocol):
+    """What the pool needs of a browser, so tests can launch fake ones."""
+
+    def fetch(self, url: str, wait_until: WaitUntil, timeout: float | None = None) -> str: ...
+
+    @property
+    def connected(self) -> bool: ...
+
+    def memory(self) -> int | None: ...
+
+    def close(self) -> None: ...
+
+
+class ChromiumSession:
+    """A Playwright driver and the Chromium it launched, used only from the thread that created it."""
+
+    def __init__(self, headless: bool = True) -> None:
+        with _launch_lock:
+            existing = _child_pids(os.getpid())
+            self._playwright: Playwright = sync_playwright().start()
+            started = _child_pids(os.getpid()) - existing
+        self._driver_pid = started.pop() if len(started) == 1 else None
+        self._browser = self._playwright.chromium.launch(headless=headless)
+
+    def fetch(self, url: str, wait_until: WaitUntil, timeout: float | None = None) -> str:
+        # Contexts share nothing, so every page starts without cookies or storage from earlier ones
+        context = self._browser.new_context()
+        try:
+            context.route("**/*", _block_resources)
+            page = context.new_page()
+            try:
+                # Playwright takes milliseconds, where 0 means no timeout
+                page.goto(url, timeout=0 if timeout is None else max(timeout * 1000, 1), wait_until=wait_until)
+            except TimeoutError as e:
+                # Pages polling the network never go idle, but are usually rendered by then
+                logger.warning("Timed out waiting for {} to load: {}", url, e)
+            return page.content()
+        finally:
+            context.close()
+
+    @property
+    def connected(self) -> bool:
+        return self._browser.is_connected()
+
+    def memory(self) -> int | None:
+        if self._driver_pid is None:
+            return None
+        try:
+            return process_tree_rss(self._driver_pid)
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.warning("Failed to measure browser memory: {}", e)
+            return None
+
+    def close(self) -> None:
+        try:
+            self._browser.close()
+        finally:
+            self._playwright.stop()
+
+
+@dataclass
+class _Job:
+    url: str
+    wait_until: WaitUntil
+    deadline: Deadline
+    future: Future[str]
+
+
+class _BrowserWorker(threading.Thread):
+    def __init__(self, pool: BrowserPool, index: int) -> None:
+        super().__init__(name=f"bot-browser-{index}", daemon=True)
+        self.pool = pool
+        self.session: BrowserSession | None = None
+        self.pages = 0
+
+    def _launch(self) -> BrowserSession:
+        logger.info("Launching browser on {}", self.name)
+        self.pages = 0
+        return self.pool.launch(self.pool.headless)
+
+    def _recycle(self, reason: str) -> None:
+        logger.info("Recycling browser on {} after {} pages: {}", self.name, self.pages, reason)
+        self._close()
+        self.pool.recycled += 1
+
+    def _close(self) -> None:
+        if self.session is None:
+            return
+        try:
+            self.session.close()
+        except Exception as e:
+            logger.warning("Failed to close browser on {}: {}", self.name, e)
+        self.session = None
+
+    def _run_job(self, job: _Job) -> None:
+        if not job.future.set_running_or_notify_cancel():
+            return
+        try:
+            job.deadline.check()
+            if self.session is None:
+                self.session = self._launch()
+            job.future.set_result(self.session.fetch(job.url, job.wait_until, job.deadline.timeout()))
+        except Exception as e:
+            job.future.set_exception(e)
+            # The next job gets a new browser if this one crashed
+            if self.session is not None and not self.session.connected:
+                self._close()
+            return
+
+        self.pages += 1
+        if self.pages >= self.pool.max_pages:
+            self._recycle("page limit")
+        elif (memory := self.session.memory()) is not None and memory > self.pool.max_memory:
+            self._recycle(f"{memory >> 20} MB in use")
+
+    def run(self) -> None:
+        # Warm up, so the first page does not wait for the browser to start
+        try:
+            self.session = self._launch()
+        except Exception as e:
+            logger.error("Failed to launch browser on {}: {}", self.name, e)
+
+        while (job := self.pool.jobs.get()) is not None:
+            self._run_job(job)
+        self._close()
+
+
+class BrowserPool:
+    """Warm browsers on their own threads, each loading one page at a time in a fresh context.
+
+    Playwright's sync API only works on the thread that started it, so loaders hand their pages to the
+    browser threads through a queue.
+    """
+
+    def __init__(
+        self,
+        size: int = BROWSER_POOL_SIZE,
+        max_pages: int = BROWSER_MAX_PAGES,
+        max_memory_mb: int = BROWSER_MAX_MEMORY_MB,
+        headless: bool = True,
+        launch: Callable[[bool], BrowserSession] = ChromiumSession,
+    ) -> None:
+        self.max_pages = max_pages
+        self.max_memory = max_memory_mb << 20
+        self.headless = headless
+        self.launch = launch
+        self.recycled = 0
+        self.jobs: queue.SimpleQueue[_Job | None] = queue.SimpleQueue()
+        self.workers = [_BrowserWorker(self, i) for i in range(size)]
+        for worker in self.workers:
+            worker.start()
+
+    def fetch(self, url: str, wait_until: WaitUntil = "networkidle", deadline: Deadline = NEVER) -> str:
+        """Return the HTML of the page once rendered, waiting at most until the deadline."""
+        future: Future[str] = Future()
+        self.jobs.put(_Job(url=url, wait_until=wait_until, deadline=deadline, future=future))
+        try:
+            return future.result(timeout=deadline.timeout())
+        finally:
+            future.cancel()
+
+    def close(self) -> None:
+        for _ in self.workers:
+            self.jobs.put(None)
+        for worker in self.workers:
+            worker.join()
+
+
+@cache
+def get_browser_pool(headless: bool = True) -> BrowserPool:
+    return BrowserPool(headless=headless)
+
 
 class PlaywrightLoader(Loader):
     def __init__(
         self,
         timeout: int = 10_000,
-        wait_until: Literal["commit", "domcontentloaded", "load", "networkidle"] = "networkidle",
+        wait_until: WaitUntil = "networkidle",
         browser_headless: bool = False,
     ) -> None:
-        self.timeout = timeout
+        """
+        Args:
+            timeout: Milliseconds to wait for the page, including waiting for a free browser.
+        """
+        # In seconds, like the timeout of every other loader
+        self.timeout = timeout / 1000
         self.wait_until = wait_until
         self.browser_headless = browser_headless
 
-    @timeout_decorator.timeout(5)
-    def load(self, url: str) -> str:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=self.browser_headless)
-            page = browser.new_page()
-
-            try:
-                page.goto(url, timeout=self.timeout, wait_until=self.wait_until)
-            except TimeoutError as e:
-                logger.error("TimeoutError: {}", e)
-                page.goto(url)
-
-            content = page.content()
-            browser.close()
-
-            return html_to_markdown(content)
+    def load(self, url: str, deadline: Deadline = NEVER) -> str:
+        pool = get_browser_pool(self.browser_headless)
+        content = pool.fetch(url, self.wait_until, deadline.child(self.timeout))
+        return html_to_markdown(content)
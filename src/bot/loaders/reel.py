@@ -1,5 +1,5 @@
-import timeout_decorator
-
+from ..deadline import NEVER
+from ..deadline import Deadline
 from .httpx import HttpxLoader
 from .loader import Loader
 from .loader import LoaderError
@@ -16,16 +16,17 @@ class NotReelURLError(LoaderError):
 
 
 class ReelLoader(Loader):
+    timeout = 5
+
     def __init__(self) -> None:
         self.httpx_loader = HttpxLoader()
         self.ytdlp_loader = YtdlpLoader()
 
-    @timeout_decorator.timeout(5)
-    def load(self, url: str) -> str:
+    def load(self, url: str, deadline: Deadline = NEVER) -> str:
         if not is_reel_url(url):
             raise NotReelURLError(url)
 
-        audio_content = self.ytdlp_loader.load(url)
-        html_content = self.httpx_loader.load(url)
+        audio_content = self.ytdlp_loader.load(url, deadline)
+        html_content = self.httpx_loader.load(url, deadline)
 
         return f"{audio_content}\n\n{html_content}"
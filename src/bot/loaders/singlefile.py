@@ -1,14 +1,14 @@
 import os
 import subprocess
-import tempfile
 from functools import cache
 from pathlib import Path
 from typing import Final
 
-import charset_normalizer
-import timeout_decorator
 from loguru import logger
 
+from ..deadline import NEVER
+from ..deadline import Deadline
+from ..processes import get_supervisor
 from .loader import Loader
 from .utils import html_to_markdown
 
@@ -25,20 +25,21 @@ def get_singlefile_path() -> str:
 
 
 class SinglefileLoader(Loader):
+    timeout = 20
+
     def __init__(self, cookies_file: str | None = None, browser_headless: bool = False) -> None:
         self.cookies_file = cookies_file
         self.browser_headless = browser_headless
 
-    @timeout_decorator.timeout(20)
-    def load(self, url: str) -> str:
-        filename = self.download(url)
-        content = str(charset_normalizer.from_path(filename).best())
-        return html_to_markdown(content)
+    def load(self, url: str, deadline: Deadline = NEVER) -> str:
+        with get_supervisor().workspace() as directory:
+            path = self.download(url, directory, deadline)
+            return html_to_markdown(path.read_bytes())
 
-    def download(self, url: str) -> str:
+    def download(self, url: str, directory: Path, deadline: Deadline = NEVER) -> Path:
         logger.info("Downloading HTML using SingleFile: {}", url)
 
-        filename = tempfile.mktemp(suffix=".html")
+        path = directory / "page.html"
         singlefile_path = get_singlefile_path()
 
         cmds = [singlefile_path]
@@ -59,9 +60,9 @@ class SinglefileLoader(Loader):
             "--browser-headless",
             str(self.browser_headless).lower(),
             url,
-            filename,
+            str(path),
         ]
 
-        subprocess.run(cmds)
+        get_supervisor().run("single-file", cmds, deadline.child(self.timeout), stdout=subprocess.DEVNULL)
 
-        return filename
+        return path
@@ -0,0 +1,171 @@
+import functools
+import multiprocessing
+import os
+import time
+from collections.abc import Sequence
+from concurrent.futures import FIRST_EXCEPTION
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+from dataclasses import dataclass
+from typing import Final
+
+import numpy as np
+import whisper
+from loguru import logger
+
+from ..workers import POOLS
+from .transcripts import Segment
+
+try:
+    import mlx_whisper  # noqa: F401
+
+    _mlx_whisper_installed = True
+except ImportError:
+    _mlx_whisper_installed = False
+
+SAMPLE_RATE: Final[int] = 16000
+# Whisper works on 30 second windows
+SEGMENT_SECONDS: Final[float] = 30.0
+OVERLAP_SECONDS: Final[float] = 2.0
+GAP_MARKER: Final[str] = "…"
+
+
+@dataclass
+class Transcript:
+    segments: list[Segment]
+    language: str
+    # False if the budget ran out before every segment was transcribed
+    complete: bool
+    segments_done: int
+    segments_total: int
+
+
+def split_audio(
+    audio: np.ndarray,
+    sr: int = SAMPLE_RATE,
+    segment_seconds: float = SEGMENT_SECONDS,
+    overlap_seconds: float = OVERLAP_SECONDS,
+) -> list[np.ndarray]:
+    """Split a waveform into segments that overlap by `overlap_seconds`."""
+    size = int(segment_seconds * sr)
+    step = size - int(overlap_seconds * sr)
+
+    segments = [audio[start : start + size] for start in range(0, max(len(audio) - size, 0) + step, step)]
+    return [segment for segment in segments if len(segment) > 0]
+
+
+def stitch(
+    chunks: Sequence[Sequence[Segment] | None],
+    segment_seconds: float = SEGMENT_SECONDS,
+    overlap_seconds: float = OVERLAP_SECONDS,
+) -> list[Segment]:
+    """Stitch the transcripts of overlapping audio segments into one timeline.
+
+    Timestamps are shifted by the offset of their audio segment. Two neighbouring segments hand over
+    in the middle of their overlap, so speech in the overlap is kept exactly once. Missing segments
+    are marked with GAP_MARKER.
+    """
+    step = segment_seconds - overlap_seconds
+    result: list[Segment] = []
+    for i, chunk in enumerate(chunks):
+        offset = i * step
+        lo = offset + overlap_seconds / 2 if i > 0 else 0.0
+        hi = offset + step + overlap_seconds / 2 if i < len(chunks) - 1 else float("inf")
+
+        if chunk is None:
+            if not result or result[-1].text != GAP_MARKER:
+                result.append(Segment(start=lo, end=min(hi, offset + segment_seconds), text=GAP_MARKER))
+            continue
+
+        for segment in chunk:
+            start = offset + segment.start
+            if lo <= start < hi:
+                result.append(Segment(start=start, end=offset + segment.end, text=segment.text))
+    return result
+
+
+@functools.cache
+def _load_whisper_model() -> whisper.Whisper:
+    return whisper.load_model("tiny")
+
+
+def _init_worker() -> None:
+    if not _mlx_whisper_installed:
+        _load_whisper_model()
+
+
+def _transcribe_segment(audio: np.ndarray) -> tuple[str, list[Segment]]:
+    if _mlx_whisper_installed:
+        result = mlx_whisper.transcribe(audio, path_or_hf_repo="mlx-community/whisper-tiny")
+    else:
+        result = _load_whisper_model().transcribe(audio)
+
+    segments = [
+        Segment(start=float(segment["start"]), end=float(segment["end"]), text=str(segment["text"]))
+        for segment in result.get("segments", [])
+    ]
+    return str(result.get("language", "")), segments
+
+
+def get_max_workers() -> int:
+    workers = os.getenv("WHISPER_WORKERS")
+    if workers:
+        return int(workers)
+    # Every media worker process has a pool of its own, so together they take half of the CPU cores
+    return max((os.cpu_count() or 1) // (2 * POOLS["media"].max_workers), 1)
+
+
+class Transcriber:
+    """A long-lived pool of processes with the whisper model loaded, transcribing segments in parallel."""
+
+    def __init__(self, max_workers: int | None = None) -> None:
+        self.max_workers = max_workers or get_max_workers()
+        # Loaders call this from threads, which fork does not play well with
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    def warm_up(self, timeout: float | None = None) -> bool:
+        """Start every worker process now, so the model is loaded before the first segment arrives.
+
+        Waits at most `timeout` seconds, 0 to load the models in the background, and returns whether
+        every worker is ready.
+        """
+        _, not_done = wait([self.executor.submit(time.sleep, 0) for _ in range(self.max_workers)], timeout=timeout)
+        return not not_done
+
+    def transcribe(self, audio: np.ndarray, budget: float | None = None) -> Transcript:
+        """Transcribe the waveform, returning what is done after `budget` seconds."""
+        segments = split_audio(audio)
+        futures: list[Future[tuple[str, list[Segment]]]] = [
+            self.executor.submit(_transcribe_segment, segment) for segment in segments
+        ]
+
+        _, not_done = wait(futures, timeout=budget, return_when=FIRST_EXCEPTION)
+        for future in not_done:
+            future.cancel()
+
+        results = [future.result() if future.done() and not future.cancelled() else None for future in futures]
+        done = [result for result in results if result is not None]
+        if len(done) < len(results):
+            logger.warning("Transcription budget ran out after {}/{} segments", len(done), len(results))
+
+        return Transcript(
+            segments=stitch([result[1] if result else None for result in results]) if done else [],
+            # Whisper detects the language of each segment, the first one decides
+            language=done[0][0] if done else "",
+            complete=len(done) == len(results),
+            segments_done=len(done),
+            segments_total=len(results),
+        )
+
+
+@functools.cache
+def get_transcriber() -> Transcriber:
+    # Not waiting for the models, which would spend a request's budget on loading them
+    transcriber = Transcriber()
+    transcriber.warm_up(timeout=0)
+    return transcriber
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import asdict
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+from typing import Final
+
+from loguru import logger
+
+from ..cache import get_cache_dir
+
+DEFAULT_MAX_SIZE: Final[int] = 64 * 1024 * 1024
+
+
+@dataclass
+class Segment:
+    start: float
+    end: float
+    text: str
+
+
+@dataclass
+class StoredTranscript:
+    media_id: str
+    language: str
+    # Where the transcript came from, e.g. "youtube" captions or "whisper"
+    source: str
+    segments: list[Segment]
+
+    @property
+    def text(self) -> str:
+        return "\n".join(segment.text.strip() for segment in self.segments if segment.text.strip())
+
+
+def make_media_id(extractor: str, video_id: str) -> str:
+    """Identify media the way yt-dlp does, e.g. "youtube:Rz1Kujq73kM", so every loader shares transcripts."""
+    return f"{extractor.lower()}:{video_id}"
+
+
+class TranscriptStore:
+    """Timestamped transcripts on disk, keyed by media ID and language.
+
+    Transcripts of the same media do not change, so entries never expire. The least recently used
+    ones are evicted above `max_size` bytes.
+    """
+
+    def __init__(self, path: str | Path, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        self.path = Path(path)
+        self.max_size = max_size
+        self._local = threading.local()
+
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS transcripts (
+                    media_id TEXT NOT NULL,
+                    language TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    segments TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (media_id, language)
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, media_id: str, languages: list[str] | None = None) -> StoredTranscript | None:
+        """Return the transcript in the first of `languages` that is stored, or in any language if not given."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT language, source, segments FROM transcripts WHERE media_id = ? ORDER BY accessed_at DESC",
+                (media_id,),
+            ).fetchall()
+            by_language = {language: (source, segments) for language, source, segments in rows}
+
+            candidates = languages if languages is not None else list(by_language)
+            language = next((lang for lang in candidates if lang in by_language), None)
+            if language is None:
+                return None
+
+            conn.execute(
+                "UPDATE transcripts SET accessed_at = ? WHERE media_id = ? AND language = ?",
+                (time.time(), media_id, language),
+            )
+
+        source, segments = by_language[language]
+        return StoredTranscript(
+            media_id=media_id,
+            language=language,
+            source=source,
+            segments=[Segment(**segment) for segment in json.loads(segments)],
+        )
+
+    def set(self, transcript: StoredTranscript) -> None:
+        segments = json.dumps([asdict(segment) for segment in transcript.segments], ensure_ascii=False)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    transcript.media_id,
+                    transcript.language,
+                    transcript.source,
+                    segments,
+                    len(segments.encode("utf-8")),
+                    time.time(),
+                ),
+            )
+        self.evict()
+
+    def evict(self) -> None:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                DELETE FROM transcripts WHERE rowid IN (
+                    SELECT rowid FROM (
+                        SELECT rowid, SUM(size) OVER (ORDER BY accessed_at DESC, rowid) AS total FROM transcripts
+                    ) WHERE total > ?
+                )
+                """,
+                (self.max_size,),
+            )
+        if cursor.rowcount > 0:
+            logger.info("Evicted {} transcripts from {}", cursor.rowcount, self.path)
+
+
+@cache
+def get_transcript_store() -> TranscriptStore:
+    return TranscriptStore(get_cache_dir() / "transcripts.sqlite3")
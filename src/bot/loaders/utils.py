@@ -1,8 +1,11 @@
 from pathlib import Path
 
-import charset_normalizer
+from loguru import logger
 from markdownify import markdownify
 
+from .charset import decode_html
+from .extract import extract_main_content
+
 
 def normalize_whitespace(text: str) -> str:
     lines = []
@@ -13,24 +16,34 @@ def normalize_whitespace(text: str) -> str:
     return "\n".join(lines)
 
 
-def html_to_markdown(content: str | bytes) -> str:
+def markdownify_html(content: str) -> str:
+    """Convert the whole page to markdown, boilerplate included."""
+    md = markdownify(content, strip=["a", "img"])
+    return normalize_whitespace(md)
+
+
+def html_to_markdown(content: str | bytes, content_type: str | None = None, extract: bool = True) -> str:
     """Convert HTML content to markdown format.
 
     Args:
         content: HTML content as string or bytes
+        content_type: The Content-Type header the content was served with, used to decode bytes
+        extract: Convert only the main content of the page, falling back to the whole page if none is found
 
     Returns:
         Converted markdown text with normalized whitespace
     """
     if isinstance(content, bytes):
-        content = str(charset_normalizer.from_bytes(content).best())
+        content = decode_html(content, content_type)
 
-    md = markdownify(content, strip=["a", "img"])
-    return normalize_whitespace(md)
+    if extract:
+        main_content = extract_main_content(content)
+        if main_content is not None:
+            return markdownify_html(main_content)
+        logger.info("No main content found, converting the whole page")
 
+    return markdownify_html(content)
 
-def read_html_content(f: str | Path) -> str:
-    content = str(charset_normalizer.from_path(f).best())
 
-    md = markdownify(content, strip=["a", "img"])
-    return normalize_whitespace(md)
+def read_html_content(f: str | Path) -> str:
+    return html_to_markdown(Path(f).read_bytes())
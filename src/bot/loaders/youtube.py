@@ -1,11 +1,16 @@
 from urllib.parse import parse_qs
 from urllib.parse import urlparse
 
-import timeout_decorator
 from youtube_transcript_api import YouTubeTranscriptApi
 
+from ..deadline import NEVER
+from ..deadline import Deadline
 from .loader import Loader
 from .loader import LoaderError
+from .transcripts import Segment
+from .transcripts import StoredTranscript
+from .transcripts import get_transcript_store
+from .transcripts import make_media_id
 
 DEFAULT_LANGUAGES = ["zh-TW", "zh-Hant", "zh", "zh-Hans", "ja", "en", "ko"]
 ALLOWED_SCHEMES = {
@@ -73,20 +78,38 @@ def parse_video_id(url: str) -> str:
 
 
 class YoutubeLoader(Loader):
+    timeout = 20
+
     def __init__(self, languages: list[str] | None = None) -> None:
         self.languages = languages or DEFAULT_LANGUAGES
 
-    @timeout_decorator.timeout(20)
-    def load(self, url: str) -> str:
+    def load(self, url: str, deadline: Deadline = NEVER) -> str:
         video_id = parse_video_id(url)
-
-        transcript_pieces: list[dict[str, str | float]] = YouTubeTranscriptApi().get_transcript(
-            video_id, self.languages
+        media_id = make_media_id("youtube", video_id)
+
+        store = get_transcript_store()
+        stored = store.get(media_id, self.languages)
+        if stored is not None:
+            return stored.text
+
+        # youtube_transcript_api takes no timeout, so check the deadline between its requests
+        transcript = YouTubeTranscriptApi.list_transcripts(video_id).find_transcript(self.languages)
+        deadline.check()
+        transcript_pieces: list[dict[str, str | float]] = transcript.fetch()
+        deadline.check()
+
+        stored = StoredTranscript(
+            media_id=media_id,
+            language=transcript.language_code,
+            source="youtube",
+            segments=[
+                Segment(
+                    start=float(piece["start"]),
+                    end=float(piece["start"]) + float(piece["duration"]),
+                    text=str(piece.get("text", "")),
+                )
+                for piece in transcript_pieces
+            ],
         )
-
-        lines = []
-        for transcript_piece in transcript_pieces:
-            text = str(transcript_piece.get("text", "")).strip()
-            if text:
-                lines.append(text)
-        return "\n".join(lines)
+        store.set(stored)
+        return stored.text
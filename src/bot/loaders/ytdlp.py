@@ -1,25 +1,40 @@
-import functools
+import io
 import os
 import subprocess
-import tempfile
+from typing import Any
 from typing import Final
 
 import numpy as np
-import timeout_decorator
-import whisper
 import yt_dlp
 from loguru import logger
 
+from ..deadline import NEVER
+from ..deadline import Deadline
+from ..deadline import DeadlineExceededError
+from ..processes import get_supervisor
 from .loader import Loader
+from .loader import LoaderError
+from .transcriber import SAMPLE_RATE
+from .transcriber import get_transcriber
+from .transcripts import StoredTranscript
+from .transcripts import get_transcript_store
+from .transcripts import make_media_id
 
-try:
-    import mlx_whisper  # noqa: F401
+DEFAULT_FFMPEG_PATH: Final[str] = "ffmpeg"
 
-    _mlx_whisper_installed = True
-except ImportError:
-    _mlx_whisper_installed = False
+# Protocols ffmpeg can read directly from the media URL
+STREAMABLE_PROTOCOLS: Final[frozenset[str]] = frozenset({"http", "https", "m3u8", "m3u8_native"})
 
-DEFAULT_FFMPEG_PATH: Final[str] = "ffmpeg"
+# Bytes of PCM read from ffmpeg at a time when the duration is unknown
+READ_CHUNK_SIZE: Final[int] = 1 << 20
+
+# Seconds before the deadline to stop transcribing, to return the partial transcript in time
+RETURN_MARGIN: Final[float] = 1.0
+
+
+class LiveStreamError(LoaderError):
+    def __init__(self, url: str):
+        super().__init__(f"URL is a live stream: {url}")
 
 
 def get_ffmpeg_path() -> str:
@@ -31,43 +46,107 @@ def get_ffmpeg_path() -> str:
     return path
 
 
-def download_audio(url: str) -> str:
-    ffmpeg_path = get_ffmpeg_path()
+def extract_audio_info(url: str, deadline: Deadline = NEVER) -> dict[str, Any]:
+    """Resolve the best audio format of the media without downloading it."""
+    ydl_opts = {
+        "format": "bestaudio/best",
+        "quiet": True,
+        "noplaylist": True,
+        "socket_timeout": deadline.timeout(),
+    }
+
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.sanitize_info(ydl.extract_info(url, download=False))
+
+    if info.get("entries"):
+        info = info["entries"][0]
+    if info.get("is_live"):
+        raise LiveStreamError(url)
+    return info
 
-    filename = tempfile.mktemp()
 
+def download_audio(url: str, directory: str, deadline: Deadline = NEVER) -> str:
+    """Download the best audio format as is, for protocols ffmpeg can not stream."""
     ydl_opts = {
         "format": "bestaudio/best",
-        "postprocessors": [
-            {
-                "key": "FFmpegExtractAudio",
-                "preferredcodec": "mp3",
-                "preferredquality": "192",
-            }
-        ],
-        "outtmpl": filename,
-        "ffmpeg_location": ffmpeg_path,
+        "quiet": True,
+        "noplaylist": True,
+        "socket_timeout": deadline.timeout(),
+        "outtmpl": os.path.join(directory, "%(id)s.%(ext)s"),
+        "ffmpeg_location": get_ffmpeg_path(),
         "match_filter": yt_dlp.match_filter_func(["!is_live"]),
     }
 
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        ydl.download([url])
+    # yt-dlp runs in this process, so it only takes a slot and is bounded by its socket timeout
+    with get_supervisor().slot("yt-dlp", deadline), yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=True)
+        return ydl.prepare_filename(info)
 
-    return filename + ".mp3"
 
+def read_pcm(cmd: list[str], expected_bytes: int = 0, deadline: Deadline = NEVER) -> np.ndarray:
+    """Run a command writing s16le PCM to stdout and read it into a buffer sized up front.
 
-def load_audio(file: str, sr: int = 16000):
+    The buffer doubles if the output turns out to be longer than `expected_bytes`. The command runs
+    as ffmpeg under the supervisor, which kills it when the deadline passes.
     """
-    Open an audio file and read as mono waveform, resampling as necessary
+    buffer = np.empty(max(expected_bytes, READ_CHUNK_SIZE), dtype=np.uint8)
+    size = 0
+
+    supervisor = get_supervisor()
+    with supervisor.popen(
+        "ffmpeg", cmd, deadline, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0
+    ) as process:
+        # Unbuffered, so reads go straight into the buffer
+        assert isinstance(process.stdout, io.FileIO)
+        assert process.stderr is not None
+
+        while True:
+            if size == len(buffer):
+                buffer = np.concatenate([buffer, np.empty_like(buffer)])
+
+            n = process.stdout.readinto(buffer.data[size:])
+            if not n:
+                break
+            size += n
+
+        stderr = process.stderr.read()
+        process.wait()
+
+    if process.returncode != 0 and deadline.expired:
+        raise DeadlineExceededError(f"Timed out loading audio after reading {size} bytes")
+    if process.returncode != 0:
+        raise RuntimeError(f"Failed to load audio: {stderr.decode()}")
+
+    return buffer[: size - size % 2].view(np.int16).astype(np.float32) / 32768.0
+
+
+def load_audio(
+    file: str,
+    sr: int = SAMPLE_RATE,
+    headers: dict[str, str] | None = None,
+    duration: float | None = None,
+    deadline: Deadline = NEVER,
+) -> np.ndarray:
+    """
+    Open an audio file or URL and read as mono waveform, resampling as necessary
 
     Parameters
     ----------
     file: str
-        The audio file to open
+        The audio file or URL to open
 
     sr: int
         The sample rate to resample the audio if necessary
 
+    headers: dict[str, str] | None
+        HTTP headers to send when `file` is a URL
+
+    duration: float | None
+        The expected duration in seconds, used to size the buffer
+
+    deadline: Deadline
+        When to give up decoding
+
     Returns
     -------
     A NumPy array containing the audio waveform, in float32 dtype.
@@ -76,11 +155,11 @@ def load_audio(file: str, sr: int = 16000):
 
     # This launches a subprocess to decode audio while down-mixing
     # and resampling as necessary.  Requires the ffmpeg CLI in PATH.
+    cmd = [ffmpeg_path, "-nostdin", "-loglevel", "error", "-threads", "0"]
+    if headers:
+        cmd += ["-headers", "".join(f"{key}: {value}\r\n" for key, value in headers.items())]
     # fmt: off
-    cmd = [
-        ffmpeg_path,
-        "-nostdin",
-        "-threads", "0",
+    cmd += [
         "-i", file,
         "-f", "s16le",
         "-ac", "1",
@@ -89,35 +168,61 @@ def load_audio(file: str, sr: int = 16000):
         "-"
     ]
     # fmt: on
-    try:
-        out = subprocess.run(cmd, capture_output=True, check=True).stdout
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"Failed to load audio: {e.stderr.decode()}") from e
-
-    return np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0
 
+    # Two bytes per sample, plus a second of slack
+    expected_bytes = int((duration + 1) * sr * 2) if duration else 0
+    return read_pcm(cmd, expected_bytes=expected_bytes, deadline=deadline)
 
-@functools.cache
-def _load_whisper_model() -> whisper.Whisper:
-    return whisper.load_model("tiny")
 
+def stream_audio(url: str, info: dict[str, Any] | None = None, deadline: Deadline = NEVER) -> np.ndarray:
+    """Decode the media's audio with a single ffmpeg pass, without writing it to disk if possible."""
+    if info is None:
+        info = extract_audio_info(url, deadline)
 
-def _transcribe(audio: np.ndarray) -> dict:
-    if _mlx_whisper_installed:
-        return mlx_whisper.transcribe(audio, path_or_hf_repo="mlx-community/whisper-tiny")
+    if info.get("protocol") in STREAMABLE_PROTOCOLS and info.get("url"):
+        return load_audio(
+            info["url"], headers=info.get("http_headers"), duration=info.get("duration"), deadline=deadline
+        )
 
-    model = _load_whisper_model()
-    return model.transcribe(audio)
+    logger.info("Downloading audio of {} over {}", url, info.get("protocol"))
+    with get_supervisor().workspace() as directory:
+        path = download_audio(url, str(directory), deadline)
+        return load_audio(path, duration=info.get("duration"), deadline=deadline)
 
 
 class YtdlpLoader(Loader):
-    @timeout_decorator.timeout(20)
-    def load(self, url: str) -> str:
-        audio_file = download_audio(url)
-        audio = load_audio(audio_file)
-
-        # Clean up the audio file
-        os.remove(audio_file)
-
-        result = _transcribe(audio)
-        return result.get("text", "")
+    timeout = 20
+
+    def load(self, url: str, deadline: Deadline = NEVER) -> str:
+        deadline = deadline.child(self.timeout)
+
+        info = extract_audio_info(url, deadline)
+        media_id = make_media_id(info["extractor_key"], info["id"])
+
+        store = get_transcript_store()
+        stored = store.get(media_id)
+        if stored is not None:
+            logger.info("Transcript cache hit: {} ({}, {})", media_id, stored.language, stored.source)
+            return stored.text
+
+        # The whisper models load in the background while the audio is decoded
+        transcriber = get_transcriber()
+        audio = stream_audio(url, info, deadline)
+
+        # Spend what is left of the budget on transcription and keep whatever is done by then
+        budget = Deadline(deadline.expires_at - RETURN_MARGIN).remaining()
+        transcript = transcriber.transcribe(audio, budget=budget)
+
+        stored = StoredTranscript(
+            media_id=media_id,
+            language=transcript.language,
+            source="whisper",
+            segments=transcript.segments,
+        )
+        if transcript.complete:
+            store.set(stored)
+        else:
+            logger.info(
+                "Partial transcript of {}: {}/{} segments", url, transcript.segments_done, transcript.segments_total
+            )
+        return stored.text
@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import functools
+import math
+import threading
+import time
+from collections.abc import Callable
+from collections.abc import Coroutine
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+from typing import Final
+from typing import TypeVar
+
+T = TypeVar("T")
+M = TypeVar("M", bound="Metric")
+
+LabelValues = tuple[str, ...]
+# Counter and histogram values recorded since the last drain, by metric name and label values
+Samples = dict[str, dict[LabelValues, list[float]]]
+
+DEFAULT_BUCKETS: Final[tuple[float, ...]] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+BYTES_BUCKETS: Final[tuple[float, ...]] = tuple(float(1 << shift) for shift in range(20, 33, 2))
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    type: str = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[LabelValues, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _initial(self) -> list[float]:
+        return [0.0]
+
+    def _lines(self, key: LabelValues, value: list[float]) -> Iterator[str]:
+        yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value[0])}"
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type}"
+        with self._lock:
+            values = {key: list(value) for key, value in self._values.items()}
+        for key in sorted(values):
+            yield from self._lines(key, values[key])
+
+    def drain(self) -> dict[LabelValues, list[float]]:
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+    def merge(self, values: dict[LabelValues, list[float]]) -> None:
+        with self._lock:
+            for key, delta in values.items():
+                current = self._values.setdefault(key, self._initial())
+                for i, value in enumerate(delta):
+                    current[i] += value
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), self._initial())[0]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values.setdefault(key, [0.0])[0] += amount
+
+    def set_total(self, value: float, **labels: str) -> None:
+        """Set the count kept elsewhere, e.g. by a cache counting its own hits."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = [float(value)]
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = [float(value)]
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values.setdefault(key, [0.0])[0] += amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def drain(self) -> dict[LabelValues, list[float]]:
+        # A gauge is a current value, which means nothing added to another process's
+        return {}
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = (*sorted(buckets), math.inf)
+
+    def _initial(self) -> list[float]:
+        # Count per bucket, then the sum and count of all observations
+        return [0.0] * (len(self.buckets) + 2)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.setdefault(key, self._initial())
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def value(self, **labels: str) -> float:
+        """Return the number of observations."""
+        with self._lock:
+            return self._values.get(self._key(labels), self._initial())[-1]
+
+    def _lines(self, key: LabelValues, value: list[float]) -> Iterator[str]:
+        cumulative = 0.0
+        for bound, count in zip(self.buckets, value, strict=False):
+            cumulative += count
+            le = 'le="' + _format_value(bound) + '"'
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}"
+        yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(value[-2])}"
+        yield f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(value[-1])}"
+
+
+class Registry:
+    """Metrics of this process, rendered in the Prometheus text format.
+
+    Worker processes drain their counters and histograms after every job, and the bot merges them into
+    its own registry, so /metrics covers the work done in every process.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+        self._collectors: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: M) -> M:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Run `collector` before rendering, to update metrics from state kept elsewhere."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def get(self, name: str) -> Metric:
+        return self._metrics[name]
+
+    def render(self) -> str:
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = list(self._metrics.values())
+
+        for collector in collectors:
+            collector()
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+    def drain(self) -> Samples:
+        samples = {}
+        for name, metric in list(self._metrics.items()):
+            values = metric.drain()
+            if values:
+                samples[name] = values
+        return samples
+
+    def merge(self, samples: Samples) -> None:
+        for name, values in samples.items():
+            metric = self._metrics.get(name)
+            if metric is not None:
+                metric.merge(values)
+
+
+REGISTRY: Final[Registry] = Registry()
+
+COMMAND_DURATION = REGISTRY.register(
+    Histogram("bot_command_duration_seconds", "Time to handle a command.", ("command", "status"))
+)
+LANE_WAITING = REGISTRY.register(Gauge("bot_lane_waiting", "Jobs waiting for a free slot in a lane.", ("lane",)))
+LANE_RUNNING = REGISTRY.register(Gauge("bot_lane_running", "Jobs running in a lane.", ("lane",)))
+UPDATE_QUEUE_SIZE = REGISTRY.register(Gauge("bot_update_queue_size", "Updates waiting to be processed."))
+
+LOADER_ATTEMPTS = REGISTRY.register(
+    Counter("bot_loader_attempts_total", "Loader attempts made by PipelineLoader.", ("loader", "status"))
+)
+LOADER_DURATION = REGISTRY.register(
+    Histogram("bot_loader_duration_seconds", "Time a loader attempt took.", ("loader", "status"))
+)
+
+LLM_DURATION = REGISTRY.register(Histogram("bot_llm_duration_seconds", "Time an LLM call took.", ("chain",)))
+LLM_TOKENS = REGISTRY.register(
+    Counter(
+        "bot_llm_tokens_total",
+        "Tokens sent to and generated by the LLM, estimated where the API does not report them.",
+        ("chain", "type"),
+    )
+)
+
+CACHE_REQUESTS = REGISTRY.register(
+    Counter("bot_cache_requests_total", "Cache lookups by cache and result.", ("cache", "result"))
+)
+
+SINGLE_FLIGHT_CALLS = REGISTRY.register(
+    Counter(
+        "bot_single_flight_calls_total",
+        "Calls that did the work, joined one in flight, or failed.",
+        ("command", "role"),
+    )
+)
+
+HTTP_CONNECTIONS = REGISTRY.register(
+    Gauge("bot_http_connections", "Connections kept by the shared HTTP clients.", ("client", "state"))
+)
+
+TOOL_RUNS = REGISTRY.register(Counter("bot_tool_runs_total", "Runs of external tools.", ("tool", "status")))
+TOOL_DURATION = REGISTRY.register(Histogram("bot_tool_duration_seconds", "Time an external tool ran.", ("tool",)))
+TOOL_PEAK_MEMORY = REGISTRY.register(
+    Histogram(
+        "bot_tool_peak_memory_bytes",
+        "Peak resident memory of an external tool and its children.",
+        ("tool",),
+        buckets=BYTES_BUCKETS,
+    )
+)
+
+
+def call_and_drain(func: Callable[[], T]) -> tuple[T | None, Samples, BaseException | None]:
+    """Run a job in a worker process, returning what it recorded along with its result or error."""
+    try:
+        result = func()
+    except Exception as e:
+        return None, REGISTRY.drain(), e
+    return result, REGISTRY.drain(), None
+
+
+def track_command(
+    command: str, callback: Callable[..., Coroutine[Any, Any, T]]
+) -> Callable[..., Coroutine[Any, Any, T]]:
+    """Wrap a handler to record how long the command takes, and whether it raised."""
+
+    @functools.wraps(callback)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        start = time.perf_counter()
+        status = "error"
+        try:
+            result = await callback(*args, **kwargs)
+            status = "ok"
+            return result
+        finally:
+            COMMAND_DURATION.observe(time.perf_counter() - start, command=command, status=status)
+
+    return wrapper
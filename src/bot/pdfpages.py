@@ -0,0 +1,40 @@
+import io
+import mmap
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from pypdf import PdfReader
+
+# A PDF as downloaded bytes, or a path to memory-map
+PDFSource = bytes | str | Path
+
+
+@contextmanager
+def open_pdf(source: PDFSource) -> Iterator[PdfReader]:
+    """Open the PDF from memory, memory-mapping it first if it is a file."""
+    if isinstance(source, bytes):
+        with PdfReader(io.BytesIO(source)) as reader:
+            yield reader
+        return
+
+    with (
+        open(source, "rb") as fp,
+        mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+        PdfReader(mm) as reader,  # type: ignore[arg-type]
+    ):
+        yield reader
+
+
+def clean_text(text: str) -> str:
+    return "\n".join(line.strip() for line in text.splitlines() if line.strip())
+
+
+def read_page(reader: PdfReader, index: int) -> str:
+    return clean_text(reader.pages[index].extract_text(extraction_mode="plain"))
+
+
+def extract_pages(source: PDFSource, start: int, stop: int) -> list[str]:
+    """Extract the text of a range of pages, run by the PDF worker processes."""
+    with open_pdf(source) as reader:
+        return [read_page(reader, i) for i in range(start, stop)]
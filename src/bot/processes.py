@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextlib import suppress
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+from typing import Any
+from typing import Final
+
+from loguru import logger
+
+from .deadline import NEVER
+from .deadline import Deadline
+from .deadline import DeadlineExceededError
+from .metrics import TOOL_DURATION
+from .metrics import TOOL_PEAK_MEMORY
+from .metrics import TOOL_RUNS
+
+# Most processes of each tool running at once in one process of the bot
+TOOL_LIMITS: Final[dict[str, int]] = {
+    "single-file": 2,
+    "ffmpeg": 4,
+    "yt-dlp": 2,
+}
+DEFAULT_TOOL_LIMIT: Final[int] = 2
+
+# Seconds between memory samples of a running tool
+SAMPLE_INTERVAL: Final[float] = 1.0
+
+DEFAULT_SCRATCH_DIRS: Final[tuple[str, ...]] = ("/dev/shm",)
+WORKSPACE_PREFIX: Final[str] = "bot-"
+
+
+@dataclass
+class ToolStats:
+    runs: int = 0
+    running: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    # Largest resident memory of a run, including the processes it started
+    max_rss: int = 0
+
+
+@dataclass
+class ToolRun:
+    # One of "ok", "error" or "timeout"
+    status: str = "ok"
+    peak_rss: int = 0
+
+
+def process_tree_rss(pid: int) -> int:
+    """Return the resident memory in bytes of the process and all its descendants."""
+    output = subprocess.run(["ps", "-A", "-o", "pid=,ppid=,rss="], capture_output=True, text=True, check=True).stdout
+    children: defaultdict[int, list[int]] = defaultdict(list)
+    rss: dict[int, int] = {}
+    for line in output.splitlines():
+        child, parent, kilobytes = map(int, line.split())
+        children[parent].append(child)
+        rss[child] = kilobytes * 1024
+
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        total += rss.get(current, 0)
+        stack.extend(children[current])
+    return total
+
+
+def _kill_group(process: subprocess.Popen) -> None:
+    # The tool leads its own session, so this also kills the browsers and decoders it started
+    with suppress(ProcessLookupError):
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def get_scratch_root() -> Path:
+    """Return the directory for scratch files, memory-backed if the host has a tmpfs."""
+    path = os.getenv("BOT_SCRATCH_DIR")
+    if path:
+        root = Path(path).expanduser()
+        root.mkdir(parents=True, exist_ok=True)
+        return root
+
+    for candidate in DEFAULT_SCRATCH_DIRS:
+        if os.path.isdir(candidate) and os.access(candidate, os.W_OK):
+            return Path(candidate)
+    return Path(tempfile.gettempdir())
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def clean_stale_workspaces(root: Path) -> None:
+    """Remove workspaces left behind by processes of the bot that were killed."""
+    for path in root.glob(f"{WORKSPACE_PREFIX}*"):
+        pid = path.name.removeprefix(WORKSPACE_PREFIX).split("-", 1)[0]
+        if pid.isdigit() and not _pid_alive(int(pid)):
+            logger.info("Removing stale workspace: {}", path)
+            shutil.rmtree(path, ignore_errors=True)
+
+
+class Supervisor:
+    """Runs external tools with a limit on how many of each run at once.
+
+    Every tool starts its own process group, which is killed as a whole at the deadline, and its scratch
+    files go to a workspace that is removed afterwards.
+    """
+
+    def __init__(self, limits: dict[str, int] = TOOL_LIMITS, scratch_root: Path | None = None) -> None:
+        self.limits = limits
+        self.scratch_root = scratch_root or get_scratch_root()
+        self.stats: defaultdict[str, ToolStats] = defaultdict(ToolStats)
+        self._semaphores: dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        clean_stale_workspaces(self.scratch_root)
+
+    def _semaphore(self, tool: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if tool not in self._semaphores:
+                self._semaphores[tool] = threading.BoundedSemaphore(self.limits.get(tool, DEFAULT_TOOL_LIMIT))
+            return self._semaphores[tool]
+
+    @contextmanager
+    def slot(self, tool: str, deadline: Deadline = NEVER) -> Iterator[ToolRun]:
+        """Wait for the tool to be below its limit, then count the time spent in the block as one run."""
+        semaphore = self._semaphore(tool)
+        if not semaphore.acquire(timeout=deadline.timeout()):
+            raise DeadlineExceededError(f"Timed out waiting to run {tool}")
+
+        stats = self.stats[tool]
+        with self._lock:
+            stats.running += 1
+        run = ToolRun()
+        start = time.monotonic()
+        try:
+            yield run
+        except DeadlineExceededError:
+            run.status = "timeout"
+            raise
+        except Exception:
+            run.status = "error"
+            raise
+        finally:
+            elapsed = time.monotonic() - start
+            with self._lock:
+                stats.running -= 1
+                stats.runs += 1
+                stats.failures += run.status == "error"
+                stats.timeouts += run.status == "timeout"
+                stats.total_seconds += elapsed
+                stats.max_seconds = max(stats.max_seconds, elapsed)
+                stats.max_rss = max(stats.max_rss, run.peak_rss)
+            semaphore.release()
+
+            TOOL_RUNS.inc(tool=tool, status=run.status)
+            TOOL_DURATION.observe(elapsed, tool=tool)
+            if run.peak_rss:
+                TOOL_PEAK_MEMORY.observe(run.peak_rss, tool=tool)
+
+    def _watch(self, process: subprocess.Popen, run: ToolRun, deadline: Deadline, done: threading.Event) -> None:
+        while True:
+            with suppress(OSError, subprocess.CalledProcessError):
+                run.peak_rss = max(run.peak_rss, process_tree_rss(process.pid))
+
+            if done.wait(min(SAMPLE_INTERVAL, deadline.remaining())):
+                return
+            if deadline.expired:
+                logger.warning("Killing {} at the deadline", process.args)
+                _kill_group(process)
+                return
+
+    @contextmanager
+    def popen(self, tool: str, cmd: list[str], deadline: Deadline = NEVER, **kwargs: Any) -> Iterator[subprocess.Popen]:
+        """Start the tool once a slot is free, killing its process group at the deadline or on leaving.
+
+        Callers check the deadline after the block, as a killed tool just exits with an error.
+        """
+        with self.slot(tool, deadline) as run:
+            with subprocess.Popen(cmd, start_new_session=True, **kwargs) as process:
+                done = threading.Event()
+                watcher = threading.Thread(target=self._watch, args=(process, run, deadline, done), daemon=True)
+                watcher.start()
+                try:
+                    yield process
+                finally:
+                    done.set()
+                    # Whatever the tool left running, e.g. a browser that outlived it, goes too
+                    _kill_group(process)
+                    watcher.join()
+
+            if process.returncode:
+                run.status = "timeout" if deadline.expired else "error"
+
+    def run(self, tool: str, cmd: list[str], deadline: Deadline = NEVER, **kwargs: Any) -> subprocess.CompletedProcess:
+        """Run the tool to completion, raising DeadlineExceededError if it was killed at the deadline."""
+        with self.popen(tool, cmd, deadline, **kwargs) as process:
+            stdout, stderr = process.communicate()
+
+        if process.returncode != 0 and deadline.expired:
+            raise DeadlineExceededError(f"{tool} timed out")
+        return subprocess.CompletedProcess(process.args, process.returncode, stdout, stderr)
+
+    @contextmanager
+    def workspace(self) -> Iterator[Path]:
+        """Return a fresh scratch directory, removed with everything in it when the block exits."""
+        # The pid in the name lets a later run clean up after a process that was killed
+        prefix = f"{WORKSPACE_PREFIX}{os.getpid()}-"
+        with tempfile.TemporaryDirectory(prefix=prefix, dir=self.scratch_root, ignore_cleanup_errors=True) as path:
+            yield Path(path)
+
+
+@cache
+def get_supervisor() -> Supervisor:
+    return Supervisor()
+
+
+def get_tool_stats() -> dict[str, ToolStats]:
+    """Return the statistics of the tools this process has run, keyed by tool."""
+    if not get_supervisor.cache_info().currsize:
+        return {}
+    return dict(get_supervisor().stats)
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+from collections.abc import Awaitable
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import cache
+from typing import Any
+from typing import TypeVar
+
+from loguru import logger
+
+from .metrics import REGISTRY
+from .metrics import SINGLE_FLIGHT_CALLS
+
+T = TypeVar("T")
+
+
+@dataclass
+class FlightStats:
+    # Calls that did the work, and calls that waited for the result of one already running
+    leaders: int = 0
+    coalesced: int = 0
+    failures: int = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same command and input into one.
+
+    The first call runs the work in its own task, and calls with the same key made before it finishes
+    await that task instead of starting their own. Nothing is kept once it finishes, failed or not, so
+    it does not replace a cache.
+    """
+
+    def __init__(self) -> None:
+        self.stats: defaultdict[str, FlightStats] = defaultdict(FlightStats)
+        self._tasks: dict[tuple[str, str], asyncio.Task[Any]] = {}
+
+    def _finished(self, key: tuple[str, str], task: asyncio.Task[Any]) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.stats[key[0]].failures += 1
+
+    async def do(self, command: str, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        flight = (command, key)
+        task = self._tasks.get(flight)
+        if task is not None:
+            logger.info("Joining in-flight {}: {}", command, key)
+            self.stats[command].coalesced += 1
+        else:
+            self.stats[command].leaders += 1
+            task = asyncio.ensure_future(func())
+            task.add_done_callback(lambda done: self._finished(flight, done))
+            self._tasks[flight] = task
+
+        # Shielded, so a caller that is cancelled does not cancel the work for the others
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+
+@cache
+def get_single_flight() -> SingleFlight:
+    return SingleFlight()
+
+
+def _collect_stats() -> None:
+    for command, stats in get_single_flight().stats.items():
+        SINGLE_FLIGHT_CALLS.set_total(stats.leaders, command=command, role="leader")
+        SINGLE_FLIGHT_CALLS.set_total(stats.coalesced, command=command, role="coalesced")
+        SINGLE_FLIGHT_CALLS.set_total(stats.failures, command=command, role="failed")
+
+
+REGISTRY.add_collector(_collect_stats)
@@ -1,6 +1,7 @@
 from .datetime import GetCurrentTime
 from .google import GoogleSearch
 from .mortgage import LoanTool
+from .quotes import get_quote_service
 from .tarot import TarotCard
 from .weblio import Weblio
 from .yahoo_finance import query_tickers
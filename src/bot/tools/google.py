@@ -1,8 +1,9 @@
-import httpx
 from lazyopenai.types import BaseTool
 from markdownify import markdownify as md
 from pydantic import Field
 
+from ..http import get_client
+
 
 class GoogleSearch(BaseTool):
     """A tool to perform Google searches and return the results as markdown.
@@ -15,6 +16,6 @@ class GoogleSearch(BaseTool):
 
     def __call__(self) -> str:
         """Executes the search and returns the results in markdown format."""
-        resp = httpx.get(url="https://www.google.com/search", params={"q": " ".join(self.keywords)})
+        resp = get_client().get(url="https://www.google.com/search", params={"q": " ".join(self.keywords)})
         resp.raise_for_status()
         return md(resp.text, strip=["a", "img"]).strip()
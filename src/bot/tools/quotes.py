@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections.abc import Callable
+from collections.abc import Iterable
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from dataclasses import dataclass
+from functools import cache
+from typing import Final
+
+from loguru import logger
+
+from ..cache import TTLCache
+from ..metrics import CACHE_REQUESTS
+from ..metrics import REGISTRY
+from .twse import query_twse_quotes
+from .yahoo_finance import get_profile_cache
+from .yahoo_finance import query_yahoo_quotes
+
+QUOTE_CACHE_TTL: Final[float] = float(os.getenv("QUOTE_CACHE_TTL", "5"))
+QUOTE_CACHE_MAXSIZE: Final[int] = 1024
+QUOTE_TIMEOUT: Final[float] = 15.0
+MAX_QUOTE_WORKERS: Final[int] = 8
+
+
+@dataclass(frozen=True)
+class QuoteSource:
+    """An upstream quote API.
+
+    Attributes:
+        name: Prefix of the source's cache keys.
+        fetch: Returns the quotes of the symbols it found, keyed by symbol.
+        batch_size: Most symbols to send in one call, None to send them all at once.
+    """
+
+    name: str
+    fetch: Callable[[list[str]], dict[str, str]]
+    batch_size: int | None = None
+
+
+SOURCES: Final[tuple[QuoteSource, ...]] = (
+    QuoteSource(name="yahoo", fetch=query_yahoo_quotes),
+    QuoteSource(name="twse", fetch=query_twse_quotes),
+)
+
+
+def normalize_symbols(symbols: Iterable[str]) -> list[str]:
+    """Uppercase the symbols, dropping blanks and duplicates."""
+    return list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+
+
+def _batches(symbols: list[str], size: int | None) -> list[list[str]]:
+    if size is None:
+        return [symbols]
+    return [symbols[i : i + size] for i in range(0, len(symbols), size)]
+
+
+class QuoteService:
+    """Fetches quotes from every source concurrently, caching each symbol for `ttl` seconds.
+
+    A symbol requested again while its quote is being fetched waits for that fetch, so a burst of the
+    same tickers costs one upstream call. Symbols a source does not know are cached as empty quotes.
+    """
+
+    def __init__(
+        self,
+        sources: Iterable[QuoteSource] = SOURCES,
+        ttl: float = QUOTE_CACHE_TTL,
+        max_workers: int = MAX_QUOTE_WORKERS,
+    ) -> None:
+        self.sources = tuple(sources)
+        self.cache: TTLCache[str] = TTLCache(maxsize=QUOTE_CACHE_MAXSIZE, ttl=ttl)
+        self._in_flight: dict[str, Future[str]] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bot-quotes")
+
+    def _fetch_batch(self, source: QuoteSource, symbols: list[str], futures: list[Future[str]]) -> None:
+        try:
+            quotes = source.fetch(symbols)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+        else:
+            for symbol, future in zip(symbols, futures, strict=True):
+                self.cache.set(f"{source.name}:{symbol}", quotes.get(symbol, ""))
+                future.set_result(quotes.get(symbol, ""))
+        finally:
+            with self._lock:
+                for symbol in symbols:
+                    self._in_flight.pop(f"{source.name}:{symbol}", None)
+
+    def _submit(self, source: QuoteSource, symbols: list[str]) -> list[Future[str]]:
+        futures: dict[str, Future[str]] = {}
+        missing: list[str] = []
+        with self._lock:
+            for symbol in symbols:
+                key = f"{source.name}:{symbol}"
+                quote = self.cache.get(key)
+                if quote is not None:
+                    futures[symbol] = Future()
+                    futures[symbol].set_result(quote)
+                elif key in self._in_flight:
+                    futures[symbol] = self._in_flight[key]
+                else:
+                    futures[symbol] = self._in_flight[key] = Future()
+                    missing.append(symbol)
+
+        for batch in _batches(missing, source.batch_size):
+            if batch:
+                self._executor.submit(self._fetch_batch, source, batch, [futures[symbol] for symbol in batch])
+        return [futures[symbol] for symbol in symbols]
+
+    def query(self, symbols: Iterable[str], timeout: float = QUOTE_TIMEOUT) -> list[str]:
+        """Return the quotes found for the symbols, those of each source in the order of the symbols.
+
+        Quotes that fail or are not ready within `timeout` seconds are left out.
+        """
+        symbols = normalize_symbols(symbols)
+        requests = [(source, self._submit(source, symbols)) for source in self.sources]
+        wait([future for _, futures in requests for future in futures], timeout=timeout)
+
+        results = []
+        for source, futures in requests:
+            for symbol, future in zip(symbols, futures, strict=True):
+                if not future.done():
+                    logger.warning("Timed out getting {} quote for {}", source.name, symbol)
+                elif future.exception() is not None:
+                    logger.error("Failed to get {} quote for {}: {}", source.name, symbol, future.exception())
+                elif quote := future.result():
+                    results.append(quote)
+        return results
+
+
+@cache
+def get_quote_service() -> QuoteService:
+    return QuoteService()
+
+
+def _collect_cache_stats() -> None:
+    if get_quote_service.cache_info().currsize:
+        cache = get_quote_service().cache
+        CACHE_REQUESTS.set_total(cache.hits, cache="quotes", result="hit")
+        CACHE_REQUESTS.set_total(cache.misses, cache="quotes", result="miss")
+    if get_profile_cache.cache_info().currsize:
+        profiles = get_profile_cache()
+        CACHE_REQUESTS.set_total(profiles.hits, cache="ticker_profiles", result="hit")
+        CACHE_REQUESTS.set_total(profiles.misses, cache="ticker_profiles", result="miss")
+
+
+REGISTRY.add_collector(_collect_cache_stats)
@@ -0,0 +1,52 @@
+import time
+
+import httpx
+from loguru import logger
+from twse.stock_info import StockInfoResponse
+from twse.stock_info import build_ex_ch
+
+from ..http import DEFAULT_TIMEOUT
+from ..http import get_client
+
+TWSE_URL = "https://mis.twse.com.tw/stock/api/getStockInfo.jsp"
+
+
+def fetch_twse_quotes(symbols: list[str]) -> dict[str, str]:
+    # The timestamp keeps TWSE from answering with a stale cached quote
+    params: dict[str, str | int] = {"ex_ch": build_ex_ch(symbols), "json": 1, "delay": 0, "_": int(time.time() * 1000)}
+    response = get_client().get(TWSE_URL, params=params, timeout=DEFAULT_TIMEOUT)
+    response.raise_for_status()
+    stock_info = StockInfoResponse.model_validate(response.json())
+
+    quotes = {}
+    for stock in stock_info.msg_array:
+        if stock.symbol and (text := stock.pretty_repr()):
+            quotes[stock.symbol.upper()] = text
+    return quotes
+
+
+def query_twse_quotes(symbols: list[str]) -> dict[str, str]:
+    """Query the quotes of all the symbols with one request, returning them by symbol.
+
+    Only numeric codes are sent, as TWSE lists no others. If the batch fails, each symbol is queried on
+    its own, so one bad symbol does not lose the others. Symbols TWSE does not list are missing from the
+    result.
+    """
+    codes = [symbol for symbol in symbols if symbol.isdigit()]
+    if not codes:
+        return {}
+
+    try:
+        return fetch_twse_quotes(codes)
+    except (httpx.HTTPError, ValueError) as e:
+        if len(codes) == 1:
+            raise
+        logger.warning("Failed to query TWSE quotes of {}, querying them one by one: {}", codes, e)
+
+    quotes = {}
+    for code in codes:
+        try:
+            quotes.update(fetch_twse_quotes([code]))
+        except (httpx.HTTPError, ValueError) as e:
+            logger.info("Failed to query TWSE quote of {}: {}", code, e)
+    return quotes
@@ -1,9 +1,10 @@
-import httpx
 from bs4 import BeautifulSoup
 from lazyopenai.types import BaseTool
 from loguru import logger
 from pydantic import Field
 
+from ..http import get_client
+
 
 class Weblio(BaseTool):
     """A tool to fetch detailed explanations, usage, and related information of a Japanese word from Weblio."""
@@ -20,7 +21,7 @@ class Weblio(BaseTool):
         logger.info(f"Querying Weblio for {self.query}")
 
         url = f"https://www.weblio.jp/content/{self.query}"
-        response = httpx.get(url)
+        response = get_client().get(url)
         response.raise_for_status()
 
         soup = BeautifulSoup(response.text, "html.parser")
@@ -1,13 +1,38 @@
 import re
+from dataclasses import dataclass
+from functools import cache
+from typing import Final
 
 from loguru import logger
 
+from ..cache import TTLCache
+
 try:
+    import pandas as pd
     import yfinance as yf  # type: ignore
 except ImportError as e:
     logger.error("{}. Please install yfinance by running 'pip install yfinance'", e)
 
 
+# Enough daily bars to find the previous close over a weekend or holiday
+HISTORY_PERIOD: Final[str] = "5d"
+# Names and 52 week ranges barely change, so they are looked up once a day per symbol
+PROFILE_CACHE_TTL: Final[float] = 24 * 60 * 60
+PROFILE_CACHE_MAXSIZE: Final[int] = 1024
+
+
+@dataclass(frozen=True)
+class TickerProfile:
+    short_name: str | None = None
+    fifty_two_week_low: float | None = None
+    fifty_two_week_high: float | None = None
+
+
+@cache
+def get_profile_cache() -> TTLCache[TickerProfile]:
+    return TTLCache(maxsize=PROFILE_CACHE_MAXSIZE, ttl=PROFILE_CACHE_TTL)
+
+
 class TickerError(Exception):
     def __init__(self, symbol: str) -> None:
         super().__init__(f"Failed to get ticker for {symbol}")
@@ -34,51 +59,100 @@ def query_tickers(symbols: str | list[str]) -> str:
         symbols = [symbols]
     symbols = [s.upper().strip() for s in symbols]
 
-    results = []
+    quotes = query_yahoo_quotes(symbols)
+    return "\n".join(quotes[symbol] for symbol in symbols if symbol in quotes).strip()
+
+
+def fetch_profile(symbol: str) -> TickerProfile | None:
+    try:
+        info = yf.Ticker(symbol).info
+    except Exception as e:
+        logger.info("Failed to get the profile of {}, got error: {}", symbol, e)
+        return None
+    return TickerProfile(
+        short_name=info.get("shortName"),
+        fifty_two_week_low=info.get("fiftyTwoWeekLow"),
+        fifty_two_week_high=info.get("fiftyTwoWeekHigh"),
+    )
+
+
+def get_profiles(symbols: list[str]) -> dict[str, TickerProfile]:
+    """Return the profiles of the symbols, only looking up those not in the profile cache."""
+    cache = get_profile_cache()
+    profiles = {}
+    for symbol in symbols:
+        profile = cache.get(symbol)
+        if profile is None and (profile := fetch_profile(symbol)) is not None:
+            cache.set(symbol, profile)
+        if profile is not None:
+            profiles[symbol] = profile
+    return profiles
+
+
+def query_yahoo_quotes(symbols: list[str]) -> dict[str, str]:
+    """Query the quotes of all the symbols with one download of their last daily prices.
+
+    Names and 52 week ranges come from the profile cache. Symbols Yahoo Finance has no prices for are
+    missing from the result.
+    """
+    data = yf.download(symbols, period=HISTORY_PERIOD, group_by="ticker", auto_adjust=False, progress=False)
+    if data is None:
+        return {}
+
+    # yfinance keeps a column of missing prices for the symbols it could not download
+    tickers = set(data.columns.get_level_values(0))
+    found = [symbol for symbol in symbols if symbol in tickers and data[symbol]["Close"].notna().any()]
+    profiles = get_profiles(found)
+
+    quotes = {}
     for symbol in symbols:
         try:
-            results += [ticker_repr(yf.Ticker(symbol))]
+            if symbol not in found:
+                raise TickerError(symbol)
+            quotes[symbol] = history_repr(symbol, data[symbol], profiles.get(symbol))
         except TickerError as e:
             logger.info("Failed to get ticker for {}, got error: {}", symbol, e)
-            continue
-
-    return "\n".join(results).strip()
-
-
-def ticker_repr(t: yf.Ticker) -> str:
-    symbol = t.info.get("symbol")
-    short_name = t.info.get("shortName")
-    open_price = t.info.get("open")
-    high_price = t.info.get("dayHigh")
-    low_price = t.info.get("dayLow")
-    last_price = t.info.get("currentPrice")
-    previous_close = t.info.get("previousClose")
-    fifty_two_week_low = t.info.get("fiftyTwoWeekLow")
-    fifty_two_week_high = t.info.get("fiftyTwoWeekHigh")
-    ask_price = t.info.get("ask")
-    bid_price = t.info.get("bid")
-    volume = t.info.get("volume")
-
-    if open_price is None and high_price is None and low_price is None:
-        raise TickerError(symbol)
+    return quotes
 
-    mid_price = (ask_price + bid_price) / 2 if ask_price and bid_price else None
 
-    effective_last_price = last_price if last_price is not None else mid_price
+def format_price(value: float | None) -> str:
+    return "N/A" if value is None else f"{value:.2f}"
 
-    net_change = (
-        ((effective_last_price / previous_close - 1.0) * 100) if effective_last_price and previous_close else 0.0
-    )
+
+def history_repr(symbol: str, history: pd.DataFrame, profile: TickerProfile | None = None) -> str:
+    history = history.dropna(subset=["Close"])
+    if history.empty:
+        raise TickerError(symbol)
+    if profile is None:
+        profile = TickerProfile()
+
+    today = history.iloc[-1]
+    open_price = today["Open"]
+    high_price = today["High"]
+    low_price = today["Low"]
+    last_price = today["Close"]
+    previous_close = history["Close"].iloc[-2] if len(history) > 1 else None
+    volume = int(today["Volume"])
+    # The profile's range is up to a day old, so today's prices may extend it
+    fifty_two_week_low = min(profile.fifty_two_week_low, low_price) if profile.fifty_two_week_low else None
+    fifty_two_week_high = max(profile.fifty_two_week_high, high_price) if profile.fifty_two_week_high else None
+
+    net_change = ((last_price / previous_close - 1.0) * 100) if previous_close else 0.0
     net_change_symbol = "🔺" if net_change > 0 else "🔻" if net_change < 0 else "⏸️"
 
+    title = (
+        f"{escape_markdown(profile.short_name)} \\({escape_markdown(symbol)}\\)"
+        if profile.short_name
+        else escape_markdown(symbol)
+    )
     return (
-        f"📊 *{escape_markdown(short_name)} \\({escape_markdown(symbol)}\\)*\n"
-        f"Open: `{escape_markdown(f'{open_price}')}`\n"
-        f"High: `{escape_markdown(f'{high_price}')}`\n"
-        f"Low: `{escape_markdown(f'{low_price}')}`\n"
-        f"Last: `{escape_markdown(f'{effective_last_price}')}`\n"
+        f"📊 *{title}*\n"
+        f"Open: `{escape_markdown(format_price(open_price))}`\n"
+        f"High: `{escape_markdown(format_price(high_price))}`\n"
+        f"Low: `{escape_markdown(format_price(low_price))}`\n"
+        f"Last: `{escape_markdown(format_price(last_price))}`\n"
         f"Change: {net_change_symbol} `{escape_markdown(f'{net_change:.2f}%')}`\n"
         f"Volume: `{escape_markdown(f'{volume}')}`\n"
-        f"52 Week Low: `{escape_markdown(f'{fifty_two_week_low}')}`\n"
-        f"52 Week High: `{escape_markdown(f'{fifty_two_week_high}')}`\n"
+        f"52 Week Low: `{escape_markdown(format_price(fifty_two_week_low))}`\n"
+        f"52 Week High: `{escape_markdown(format_price(fifty_two_week_high))}`\n"
     ).strip()
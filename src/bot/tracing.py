@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import functools
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from collections.abc import Coroutine
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from typing import Any
+from typing import TypeVar
+
+from telegram import Update
+from telegram.request import HTTPXRequest
+
+from .deadline import DeadlineExceededError
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    """Identifies a span, small and picklable so it can be sent to worker processes."""
+
+    trace_id: str
+    span_id: str
+
+
+_current: ContextVar[SpanContext | None] = ContextVar("bot_span", default=None)
+_write_lock = threading.Lock()
+
+
+def get_trace_file() -> Path | None:
+    path = os.getenv("BOT_TRACE_FILE")
+    return Path(path).expanduser() if path else None
+
+
+def _new_id() -> str:
+    return secrets.token_hex(8)
+
+
+@dataclass
+class Span:
+    name: str
+    context: SpanContext
+    parent_id: str | None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    # One of "ok", "error", "timeout" or "cancelled"
+    status: str = "ok"
+    start: float = field(default_factory=time.time)
+    _started: float = field(default_factory=time.perf_counter)
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def finish(self, status: str | None = None, **attributes: Any) -> None:
+        if status is not None:
+            self.status = status
+        self.attributes.update(attributes)
+        export(self, time.perf_counter() - self._started)
+
+
+def export(span: Span, duration: float) -> None:
+    """Append the finished span to BOT_TRACE_FILE, doing nothing if it is not set."""
+    path = get_trace_file()
+    if path is None:
+        return
+
+    record = {
+        "trace_id": span.context.trace_id,
+        "span_id": span.context.span_id,
+        "parent_id": span.parent_id,
+        "name": span.name,
+        "start": span.start,
+        "duration": duration,
+        "status": span.status,
+        "pid": os.getpid(),
+        "attributes": span.attributes,
+    }
+    line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+    # Opened for every span, so worker processes append to the same file safely
+    with _write_lock, path.open("a", encoding="utf-8") as fp:
+        fp.write(line)
+
+
+def current_context() -> SpanContext | None:
+    return _current.get()
+
+
+def start_span(name: str, *, new_trace: bool = False, **attributes: Any) -> Span:
+    """Start a span under the current one, without making it current. Call `finish` when done."""
+    parent = None if new_trace else _current.get()
+    trace_id = parent.trace_id if parent else _new_id()
+    return Span(
+        name=name,
+        context=SpanContext(trace_id=trace_id, span_id=_new_id()),
+        parent_id=parent.span_id if parent else None,
+        attributes=attributes,
+    )
+
+
+@contextmanager
+def use_context(context: SpanContext | None) -> Iterator[None]:
+    token = _current.set(context)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str, *, new_trace: bool = False, **attributes: Any) -> Iterator[Span]:
+    """Trace the block as a span under the current one, or as the root of a new trace."""
+    current = start_span(name, new_trace=new_trace, **attributes)
+    try:
+        with use_context(current.context):
+            yield current
+    except BaseException as e:
+        if isinstance(e, DeadlineExceededError):
+            status = "timeout"
+        else:
+            status = "error" if isinstance(e, Exception) else "cancelled"
+        current.finish(status, error=repr(e))
+        raise
+    current.finish()
+
+
+def run_in_context(context: SpanContext | None, func: Callable[[], T]) -> T:
+    """Run `func` under the given span, e.g. in a worker process, which does not inherit context variables."""
+    with use_context(context):
+        return func()
+
+
+def trace_update(name: str, callback: Callable[..., Coroutine[Any, Any, T]]) -> Callable[..., Coroutine[Any, Any, T]]:
+    """Wrap a handler to trace each update it handles as a new trace."""
+
+    @functools.wraps(callback)
+    async def wrapper(update: object, *args: Any, **kwargs: Any) -> T:
+        attributes = {}
+        if isinstance(update, Update):
+            attributes["update_id"] = update.update_id
+            if update.effective_chat:
+                attributes["chat_id"] = update.effective_chat.id
+
+        with span(f"handler {name}", new_trace=True, **attributes):
+            return await callback(update, *args, **kwargs)
+
+    return wrapper
+
+
+class TracedRequest(HTTPXRequest):
+    """Traces every Bot API call made while handling a traced update."""
+
+    async def do_request(self, url: str, *args: Any, **kwargs: Any) -> tuple[int, bytes]:
+        if _current.get() is None:
+            return await super().do_request(url, *args, **kwargs)
+
+        # The URL contains the bot token, so only the method name is kept
+        method = url.rsplit("/", 1)[-1]
+        with span(f"telegram {method}") as current:
+            status, payload = await super().do_request(url, *args, **kwargs)
+            current.set(http_status=status)
+            return status, payload
+
+
+def read_traces(path: Path) -> dict[str, list[dict[str, Any]]]:
+    traces: defaultdict[str, list[dict[str, Any]]] = defaultdict(list)
+    with path.open(encoding="utf-8") as fp:
+        for line in fp:
+            if line.strip():
+                record = json.loads(line)
+                traces[record["trace_id"]].append(record)
+    return dict(traces)
+
+
+def format_trace(spans: list[dict[str, Any]]) -> str:
+    """Render the spans of one trace as a tree, children in the order they started."""
+    children: defaultdict[str | None, list[dict[str, Any]]] = defaultdict(list)
+    ids = {record["span_id"] for record in spans}
+    for record in sorted(spans, key=lambda record: record["start"]):
+        parent = record["parent_id"] if record["parent_id"] in ids else None
+        children[parent].append(record)
+
+    roots = children[None]
+    origin = roots[0]["start"] if roots else 0.0
+    lines = []
+
+    def visit(record: dict[str, Any], depth: int) -> None:
+        offset = record["start"] - origin
+        status = "" if record["status"] == "ok" else f" [{record['status']}]"
+        lines.append(f"{offset:8.3f}s {record['duration']:8.3f}s {'  ' * depth}{record['name']}{status}")
+        for child in children[record["span_id"]]:
+            visit(child, depth + 1)
+
+    for root in roots:
+        visit(root, 0)
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """Print one trace from a trace file, the slowest one unless a trace ID is given."""
+    if len(sys.argv) not in (2, 3):
+        sys.exit("usage: bot-trace TRACE_FILE [TRACE_ID]")
+
+    traces = read_traces(Path(sys.argv[1]))
+    if not traces:
+        sys.exit("No traces found")
+
+    if len(sys.argv) == 3:
+        trace_id = sys.argv[2]
+    else:
+        trace_id = max(traces, key=lambda key: max(record["duration"] for record in traces[key]))
+    if trace_id not in traces:
+        sys.exit(f"Trace not found: {trace_id}")
+
+    print(f"trace {trace_id}")
+    print(format_trace(traces[trace_id]))
@@ -3,9 +3,15 @@ import json
 import re
 from pathlib import Path
 from typing import Any
+from urllib.parse import parse_qsl
+from urllib.parse import urlencode
+from urllib.parse import urlparse
+from urllib.parse import urlunparse
 
 import telegraph
 
+from .tracing import span
+
 
 def save_text(text: str, f: str) -> None:
     with open(f, "w") as fp:
@@ -27,6 +33,30 @@ def parse_url(s: str) -> str:
     return ""
 
 
+TRACKING_PARAMS = {"fbclid", "gclid", "igsh", "igshid", "si", "ref_src"}
+DEFAULT_PORTS = {"http": ":80", "https": ":443"}
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL so that links to the same page compare equal.
+
+    Lowercases the scheme and host, drops default ports, fragments and tracking parameters,
+    and sorts the remaining query parameters.
+    """
+    parsed = urlparse(url.strip())
+
+    scheme = parsed.scheme.lower()
+    netloc = parsed.netloc.lower().removesuffix(DEFAULT_PORTS.get(scheme, ""))
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+            if key not in TRACKING_PARAMS and not key.startswith("utm_")
+        )
+    )
+    return urlunparse((scheme, netloc, parsed.path or "/", parsed.params, query, ""))
+
+
 @functools.cache
 def get_telegraph_client() -> telegraph.Telegraph:
     client = telegraph.Telegraph()
@@ -35,7 +65,8 @@ def get_telegraph_client() -> telegraph.Telegraph:
 
 
 def create_page(title: str, **kwargs) -> str:
-    client = get_telegraph_client()
+    with span("telegraph create_page"):
+        client = get_telegraph_client()
 
-    resp = client.create_page(title=title, **kwargs)
-    return resp["url"]
+        resp = client.create_page(title=title, **kwargs)
+        return resp["url"]
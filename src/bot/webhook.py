@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Final
+from urllib.parse import urlparse
+
+import tornado.web
+from loguru import logger
+from telegram import Update
+from telegram.ext import Application
+from tornado.httpserver import HTTPServer
+
+from .metrics import REGISTRY
+
+DEFAULT_LISTEN: Final[str] = "0.0.0.0"
+DEFAULT_PORT: Final[int] = 8080
+DEFAULT_HEALTH_PORT: Final[int] = 8081
+# Telegram only accepts these characters in a secret token
+SECRET_TOKEN_PATTERN: Final[re.Pattern[str]] = re.compile(r"[A-Za-z0-9_-]{1,256}")
+HEALTH_PATH: Final[str] = "/healthz"
+METRICS_PATH: Final[str] = "/metrics"
+DEFAULT_METRICS_LISTEN: Final[str] = "127.0.0.1"
+PROMETHEUS_CONTENT_TYPE: Final[str] = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@dataclass(frozen=True)
+class WebhookConfig:
+    """Where Telegram sends updates, and where the bot listens for them.
+
+    Attributes:
+        url: Public URL registered with Telegram, e.g. behind a load balancer.
+        secret_token: Sent back by Telegram with every update, so requests from anyone else are refused.
+        listen: Address the server binds to.
+        port: Port the server binds to.
+        health_listen: Address the health check server binds to, reachable by the load balancer.
+        health_port: Port the health check server binds to.
+    """
+
+    url: str
+    secret_token: str
+    listen: str = DEFAULT_LISTEN
+    port: int = DEFAULT_PORT
+    health_listen: str = DEFAULT_LISTEN
+    health_port: int = DEFAULT_HEALTH_PORT
+
+    @property
+    def path(self) -> str:
+        return urlparse(self.url).path or "/"
+
+
+def get_webhook_config() -> WebhookConfig | None:
+    """Return the webhook settings if BOT_WEBHOOK_URL is set, None to use long polling."""
+    url = os.getenv("BOT_WEBHOOK_URL")
+    if not url:
+        return None
+
+    secret_token = os.getenv("BOT_WEBHOOK_SECRET")
+    if not secret_token:
+        raise ValueError("BOT_WEBHOOK_SECRET is not set")
+    if not SECRET_TOKEN_PATTERN.fullmatch(secret_token):
+        raise ValueError("BOT_WEBHOOK_SECRET must be 1-256 characters of A-Z, a-z, 0-9, _ and -")
+
+    return WebhookConfig(
+        url=url,
+        secret_token=secret_token,
+        listen=os.getenv("BOT_WEBHOOK_LISTEN", DEFAULT_LISTEN),
+        port=int(os.getenv("BOT_WEBHOOK_PORT", str(DEFAULT_PORT))),
+        health_listen=os.getenv("BOT_HEALTH_LISTEN", DEFAULT_LISTEN),
+        health_port=int(os.getenv("BOT_HEALTH_PORT", str(DEFAULT_HEALTH_PORT))),
+    )
+
+
+class HealthHandler(tornado.web.RequestHandler):
+    def initialize(self, app: Application) -> None:
+        self.app = app
+
+    def get(self) -> None:
+        # Unhealthy until updates are processed, so a load balancer only sends them to ready instances
+        if not self.app.running:
+            self.set_status(HTTPStatus.SERVICE_UNAVAILABLE)
+            self.write({"status": "starting"})
+            return
+        self.write({"status": "ok"})
+
+
+class MetricsHandler(tornado.web.RequestHandler):
+    def get(self) -> None:
+        self.set_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+        self.write(REGISTRY.render())
+
+
+def start_health_server(app: Application, port: int, listen: str = DEFAULT_LISTEN) -> HTTPServer:
+    """Serve /healthz on its own port, as PTB's webhook server only serves the update path."""
+    server = HTTPServer(tornado.web.Application([(HEALTH_PATH, HealthHandler, {"app": app})]))
+    server.listen(port, listen)
+    logger.info("Serving health checks on {}:{}{}", listen, port, HEALTH_PATH)
+    return server
+
+
+def start_metrics_server(port: int, listen: str = DEFAULT_METRICS_LISTEN) -> HTTPServer:
+    """Serve /metrics on its own port, which unlike the webhook is not meant to be public."""
+    server = HTTPServer(tornado.web.Application([(METRICS_PATH, MetricsHandler)]))
+    server.listen(port, listen)
+    logger.info("Serving metrics on {}:{}{}", listen, port, METRICS_PATH)
+    return server
+
+
+def run_webhook(app: Application, config: WebhookConfig) -> None:
+    """Serve updates pushed by Telegram until stopped by SIGINT or SIGTERM, and health checks next to them.
+
+    Every instance behind the same URL registers the same webhook, and leaves it registered on exit for
+    the others.
+    """
+    # Read by the post_init hook, which starts the health check server on the application's event loop
+    app.bot_data["webhook_config"] = config
+    logger.info("Listening for updates on {}:{}{}", config.listen, config.port, config.path)
+    app.run_webhook(
+        listen=config.listen,
+        port=config.port,
+        url_path=config.path,
+        webhook_url=config.url,
+        secret_token=config.secret_token,
+        allowed_updates=Update.ALL_TYPES,
+    )
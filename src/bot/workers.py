@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+from typing import Final
+from typing import TypeVar
+
+from loguru import logger
+
+from .metrics import LANE_RUNNING
+from .metrics import LANE_WAITING
+from .metrics import REGISTRY
+from .metrics import call_and_drain
+from .tracing import current_context
+from .tracing import run_in_context
+from .tracing import span
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Pool:
+    max_workers: int
+    use_processes: bool = False
+
+
+@dataclass(frozen=True)
+class Lane:
+    """A queue of blocking jobs with its own concurrency limit.
+
+    Attributes:
+        pool: Name of the worker pool the jobs run on.
+        max_concurrency: Maximum number of jobs from this lane running at the same time.
+    """
+
+    pool: str
+    max_concurrency: int
+
+
+POOLS: Final[dict[str, Pool]] = {
+    # Short LLM calls and quote lookups, kept separate so they never wait behind heavy jobs
+    "interactive": Pool(max_workers=8),
+    # Long prompts, e.g. summarizing a whole document
+    "batch": Pool(max_workers=4),
+    # Loaders, which may download media and run whisper
+    "media": Pool(max_workers=2, use_processes=True),
+}
+
+LANES: Final[dict[str, Lane]] = {
+    "t": Lane(pool="interactive", max_concurrency=4),
+    "translate": Lane(pool="interactive", max_concurrency=4),
+    "polish": Lane(pool="interactive", max_concurrency=4),
+    "gpt": Lane(pool="interactive", max_concurrency=4),
+    "yt": Lane(pool="interactive", max_concurrency=2),
+    "recipe": Lane(pool="interactive", max_concurrency=2),
+    "trip": Lane(pool="interactive", max_concurrency=2),
+    "p": Lane(pool="interactive", max_concurrency=2),
+    "error": Lane(pool="interactive", max_concurrency=1),
+    "s": Lane(pool="batch", max_concurrency=2),
+    "g": Lane(pool="batch", max_concurrency=2),
+    "f": Lane(pool="batch", max_concurrency=2),
+    "ljp": Lane(pool="batch", max_concurrency=2),
+    "load": Lane(pool="media", max_concurrency=2),
+}
+
+DEFAULT_LANE: Final[Lane] = Lane(pool="interactive", max_concurrency=4)
+
+_executors: dict[str, Executor] = {}
+
+
+def get_lane(name: str) -> Lane:
+    return LANES.get(name, DEFAULT_LANE)
+
+
+def get_executor(pool_name: str) -> Executor:
+    executor = _executors.get(pool_name)
+    if executor is not None:
+        return executor
+
+    pool = POOLS[pool_name]
+    if pool.use_processes:
+        # Spawned rather than forked, as the bot already runs threads by the time the pool starts
+        executor = ProcessPoolExecutor(max_workers=pool.max_workers, mp_context=multiprocessing.get_context("spawn"))
+    else:
+        executor = ThreadPoolExecutor(max_workers=pool.max_workers, thread_name_prefix=f"bot-{pool_name}")
+
+    logger.info("Started {} pool with {} workers", pool_name, pool.max_workers)
+    _executors[pool_name] = executor
+    return executor
+
+
+@functools.cache
+def get_semaphore(lane_name: str) -> asyncio.Semaphore:
+    return asyncio.Semaphore(get_lane(lane_name).max_concurrency)
+
+
+async def run_blocking(lane_name: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking function on the worker pool of the given lane.
+
+    Jobs beyond the lane's concurrency limit wait in the lane's own queue, so a burst of heavy
+    jobs in one lane does not delay the others.
+
+    Functions sent to a process pool and their arguments must be picklable. The metrics they record
+    are sent back with their result, and the spans they start belong to the caller's trace.
+    """
+    with span(f"lane {lane_name}", function=getattr(func, "__qualname__", repr(func))) as current:
+        lane = get_lane(lane_name)
+        executor = get_executor(lane.pool)
+        call = functools.partial(func, *args, **kwargs)
+        semaphore = get_semaphore(lane_name)
+
+        LANE_WAITING.inc(lane=lane_name)
+        waiting_since = time.perf_counter()
+        try:
+            await semaphore.acquire()
+        finally:
+            LANE_WAITING.dec(lane=lane_name)
+            current.set(wait_seconds=time.perf_counter() - waiting_since)
+
+        LANE_RUNNING.inc(lane=lane_name)
+        try:
+            loop = asyncio.get_running_loop()
+            if not POOLS[lane.pool].use_processes:
+                # Unlike tasks, executors do not copy the context, which holds the current span
+                return await loop.run_in_executor(executor, contextvars.copy_context().run, call)
+
+            traced = functools.partial(run_in_context, current_context(), call)
+            result, samples, error = await loop.run_in_executor(executor, functools.partial(call_and_drain, traced))
+            REGISTRY.merge(samples)
+            if error is not None:
+                raise error
+            return result  # type: ignore[return-value]
+        finally:
+            LANE_RUNNING.dec(lane=lane_name)
+            semaphore.release()
+
+
+def shutdown_workers() -> None:
+    for executor in _executors.values():
+        executor.shutdown(wait=False, cancel_futures=True)
+    _executors.clear()
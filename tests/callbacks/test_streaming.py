@@ -0,0 +1,51 @@
+import asyncio
+from types import SimpleNamespace
+
+from telegram.constants import ChatType
+
+from bot.callbacks import streaming
+from bot.callbacks.streaming import reply_streaming
+
+
+class FakeMessage:
+    def __init__(self) -> None:
+        self.chat = SimpleNamespace(type=ChatType.PRIVATE)
+        self.texts: list[str] = []
+        self.reply: FakeMessage | None = None
+
+    async def reply_text(self, text: str) -> "FakeMessage":
+        self.reply = FakeMessage()
+        self.reply.texts.append(text)
+        return self.reply
+
+    async def edit_text(self, text: str) -> None:
+        self.texts.append(text)
+
+
+async def stream(*chunks: str):
+    for chunk in chunks:
+        yield chunk
+
+
+def test_reply_streaming_edits_placeholder_until_done(monkeypatch):
+    monkeypatch.setattr(streaming, "PRIVATE_EDIT_INTERVAL", 0.0)
+    message = FakeMessage()
+
+    reply, text = asyncio.run(
+        reply_streaming(message, stream('"Hello', ", ", 'world"'), transform=lambda s: s.strip('"'))
+    )  # type: ignore
+
+    assert text == "Hello, world"
+    assert reply.texts == [streaming.PLACEHOLDER, "Hello", "Hello, ", "Hello, world"]
+
+
+def test_reply_streaming_throttles_edits(monkeypatch):
+    monkeypatch.setattr(streaming, "PRIVATE_EDIT_INTERVAL", 60.0)
+    real_sleep = asyncio.sleep
+    monkeypatch.setattr(streaming.asyncio, "sleep", lambda _: real_sleep(0))
+    message = FakeMessage()
+
+    reply, text = asyncio.run(reply_streaming(message, stream("a", "b", "c")))  # type: ignore
+
+    assert text == "abc"
+    assert reply.texts == [streaming.PLACEHOLDER, "a", "abc"]
@@ -0,0 +1,50 @@
+from bot.chains import summary
+from bot.chains.summary import split_text
+from bot.llm import estimate_tokens
+
+
+def test_split_text_respects_token_budget():
+    text = "\n".join(f"line {i} " + "word " * 20 for i in range(100))
+
+    chunks = split_text(text, max_tokens=100)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 100 for chunk in chunks)
+    assert "\n".join(chunks) == text
+
+
+def test_split_text_splits_long_lines():
+    chunks = split_text("字" * 250, max_tokens=100)
+
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
+
+
+def test_summarize_maps_long_text_before_reducing(monkeypatch):
+    prompts = []
+
+    def fake_generate(prompt, system=None, response_format=None, *, chain):
+        prompts.append(chain)
+        if response_format is None:
+            return "重點"
+        return "summary"
+
+    monkeypatch.setattr(summary, "generate", fake_generate)
+    monkeypatch.setattr(summary, "MAX_SINGLE_CALL_TOKENS", 100)
+    monkeypatch.setattr(summary, "CHUNK_TOKENS", 50)
+
+    assert summary.summarize("內容\n" * 200) == "summary"
+    assert prompts.count("summarize_chunk") == 8
+    assert prompts[-1] == "summarize"
+
+
+def test_summarize_keeps_single_call_for_short_text(monkeypatch):
+    prompts = []
+
+    def fake_generate(prompt, system=None, response_format=None, *, chain):
+        prompts.append(chain)
+        return "summary"
+
+    monkeypatch.setattr(summary, "generate", fake_generate)
+
+    assert summary.summarize("short text") == "summary"
+    assert prompts == ["summarize"]
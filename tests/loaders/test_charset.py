@@ -0,0 +1,57 @@
+import codecs
+
+import pytest
+
+from bot.loaders.charset import decode_html
+from bot.loaders.charset import normalize_charset
+from bot.loaders.charset import sniff_charset
+
+TEXT = "<html><body><p>繁體中文測試</p></body></html>"
+
+
+@pytest.mark.parametrize(
+    ("content", "content_type", "expected"),
+    [
+        (codecs.BOM_UTF8 + b"<html></html>", "text/html; charset=big5", "utf-8-sig"),
+        (b"<html></html>", "text/html; charset=Big5", "big5"),
+        (b"<html></html>", 'text/html; charset="UTF-8"', "utf-8"),
+        (b'<html><head><meta charset="shift_jis"></head></html>', "text/html", "shift_jis"),
+        (b'<meta http-equiv="Content-Type" content="text/html; charset=gb2312">', None, "gb2312"),
+        (b"<html></html>", "text/html; charset=iso-8859-1", "cp1252"),
+        (b"<html></html>", "text/html; charset=unknown", None),
+        (b"<html></html>", None, None),
+    ],
+)
+def test_sniff_charset(content: bytes, content_type: str | None, expected: str | None) -> None:
+    assert sniff_charset(content, content_type) == expected
+
+
+def test_normalize_charset() -> None:
+    assert normalize_charset(" UTF8 ") == "utf-8"
+    assert normalize_charset("ascii") == "cp1252"
+    assert normalize_charset("x-unknown") is None
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "big5", "utf-16"])
+def test_decode_html_declared(encoding: str) -> None:
+    content = TEXT.encode(encoding)
+
+    assert decode_html(content, f"text/html; charset={encoding}") == TEXT
+
+
+def test_decode_html_wrong_declaration_falls_back() -> None:
+    assert decode_html(TEXT.encode("utf-8"), "text/html; charset=ascii") == TEXT
+    assert decode_html(TEXT.encode("utf-8"), "text/html; charset=big5") == TEXT
+
+
+def test_decode_html_detects_undeclared() -> None:
+    text = "<html><body>" + "這是一段沒有宣告編碼的繁體中文網頁內容，用來測試編碼偵測。" * 20 + "</body></html>"
+
+    assert decode_html(text.encode("big5")) == text
+
+
+def test_decode_html_detects_undeclared_large_page() -> None:
+    line = "這是一段沒有宣告編碼的繁體中文網頁內容，用來測試編碼偵測。\n"
+    text = "<html><body>" + line * 5000 + "</body></html>"
+
+    assert decode_html(text.encode("big5")) == text
@@ -0,0 +1,50 @@
+from pathlib import Path
+
+import pytest
+
+from bot.loaders.extract import extract_main_content
+from bot.loaders.utils import html_to_markdown
+
+FIXTURES = Path(__file__).parent / "fixtures" / "html"
+
+
+@pytest.mark.parametrize(
+    ("name", "expected", "unexpected"),
+    [
+        (
+            "news.html",
+            ["City council approves new bike lanes", "converts one lane of traffic", "deliveries will work"],
+            ["cookies", "Most read", "Share on Facebook", "waste of taxpayer money", "All rights reserved", "gtag"],
+        ),
+        (
+            "blog_zh.html",
+            ["在家自己烘焙酸種麵包的心得", "鑄鐵鍋"],
+            ["首頁", "分享到", "相關文章", "關於作者", "WordPress"],
+        ),
+        (
+            "docs.html",
+            ["Configuration", "port = 8080", "WIDGET_SERVER_PORT"],
+            ["Navigation", "Changelog", "Created using Sphinx"],
+        ),
+    ],
+)
+def test_html_to_markdown_extracts_main_content(name: str, expected: list[str], unexpected: list[str]) -> None:
+    markdown = html_to_markdown((FIXTURES / name).read_bytes())
+
+    for text in expected:
+        assert text in markdown
+    for text in unexpected:
+        assert text not in markdown
+
+    assert len(markdown) < len(html_to_markdown((FIXTURES / name).read_bytes(), extract=False))
+
+
+def test_html_to_markdown_falls_back_to_whole_page() -> None:
+    content = (FIXTURES / "landing.html").read_text()
+
+    assert extract_main_content(content) is None
+    assert html_to_markdown(content) == html_to_markdown(content, extract=False)
+
+
+def test_extract_main_content_empty() -> None:
+    assert extract_main_content("") is None
@@ -0,0 +1,127 @@
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from pypdf import PdfWriter
+from pypdf.generic import ContentStream
+from pypdf.generic import DictionaryObject
+from pypdf.generic import NameObject
+
+from bot.deadline import Deadline
+from bot.loaders import pdf
+from bot.loaders.pdf import PagePolicy
+from bot.loaders.pdf import iter_pages
+from bot.loaders.pdf import read_pdf_content
+from bot.loaders.pdf import split_pages
+
+
+def make_pdf(num_pages: int) -> bytes:
+    writer = PdfWriter()
+    font = DictionaryObject(
+        {
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/Helvetica"),
+        }
+    )
+    for i in range(num_pages):
+        page = writer.add_blank_page(width=200, height=200)
+        page[NameObject("/Resources")] = DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})}
+        )
+        content = ContentStream(None, writer)
+        content.set_data(f"BT /F1 12 Tf 10 100 Td (Page {i + 1}) Tj ET".encode())
+        page.replace_contents(content)
+
+    chapter = writer.add_outline_item("Chapter 1", 0)
+    writer.add_outline_item("Section 1.1", 1, parent=chapter)
+
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def test_page_policy_select():
+    assert PagePolicy(max_pages=3).select(10) == range(0, 3)
+    assert PagePolicy(start=8, max_pages=3).select(10) == range(8, 10)
+    assert PagePolicy(start=20).select(10) == range(10, 10)
+    assert PagePolicy(max_pages=None).select(10) == range(0, 10)
+
+
+def test_split_pages():
+    assert split_pages(range(0, 50), 3) == [range(0, 17), range(17, 34), range(34, 50)]
+    assert split_pages(range(2, 8), 4) == [range(2, 6), range(6, 8)]
+    assert split_pages(range(0, 3), 4) == [range(0, 3)]
+    assert split_pages(range(0, 0), 4) == []
+
+
+def test_get_max_workers_shares_cpus_among_media_workers(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.delenv("PDF_WORKERS", raising=False)
+    monkeypatch.setattr(os, "cpu_count", lambda: 16)
+    # A quarter of the cores, shared by the two media worker processes
+    assert pdf.get_max_workers() == 2
+
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    assert pdf.get_max_workers() == 1
+
+
+def test_iter_pages_in_order(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("PDF_WORKERS", "2")
+    data = make_pdf(10)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        texts = list(iter_pages(data, range(1, 10), executor=executor))
+
+    assert texts == [f"Page {i}" for i in range(2, 11)]
+
+
+def test_iter_pages_in_worker_processes(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("PDF_WORKERS", "2")
+    pdf.get_pdf_executor.cache_clear()
+
+    try:
+        texts = list(iter_pages(make_pdf(12), range(12)))
+    finally:
+        pdf.get_pdf_executor().shutdown()
+        pdf.get_pdf_executor.cache_clear()
+
+    assert texts == [f"Page {i}" for i in range(1, 13)]
+
+
+def test_iter_pages_stops_at_deadline(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("PDF_WORKERS", "2")
+    extract_pages = pdf._extract_pages
+
+    def slow_extract_pages(source, start, stop):
+        if start > 0:
+            time.sleep(1)
+        return extract_pages(source, start, stop)
+
+    monkeypatch.setattr(pdf, "_extract_pages", slow_extract_pages)
+    data = make_pdf(12)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        texts = list(iter_pages(data, range(12), Deadline.after(0.3), executor=executor))
+
+    assert texts == ["Page 1", "Page 2", "Page 3", "Page 4"]
+
+
+def test_read_pdf_content_with_outline_and_cap(tmp_path: Path):
+    path = tmp_path / "report.pdf"
+    path.write_bytes(make_pdf(3))
+
+    content = read_pdf_content(path, PagePolicy(max_pages=2))
+
+    assert content == "\n".join(
+        [
+            "Outline:",
+            "- Chapter 1",
+            "  - Section 1.1",
+            "Page 1",
+            "Page 2",
+            "(Pages 1-2 of 3)",
+        ]
+    )
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+
+from bot.deadline import NEVER
+from bot.deadline import Deadline
+from bot.deadline import DeadlineExceededError
+from bot.loaders.loader import Loader
+from bot.loaders.loader import LoaderError
+from bot.loaders.pipeline import PipelineLoader
+
+
+class FakeLoader(Loader):
+    def __init__(self, content: str = "", delay: float = 0.0, fail: bool = False, timeout: float = 1.0) -> None:
+        self.content = content
+        self.delay = delay
+        self.fail = fail
+        self.timeout = timeout
+
+    def load(self, url: str, deadline: Deadline = NEVER) -> str:
+        self.deadline = deadline
+        time.sleep(self.delay)
+        if self.fail:
+            raise LoaderError(url)
+        return self.content
+
+
+def make_pipeline(loaders: list[Loader], hedge_delay: float | None) -> PipelineLoader:
+    pipeline = PipelineLoader(hedge_delay=hedge_delay)
+    pipeline.loaders = loaders
+    return pipeline
+
+
+@pytest.mark.parametrize("hedge_delay", [None, 0.0, 0.05])
+def test_load_result_prefers_pipeline_order(hedge_delay):
+    pipeline = make_pipeline(
+        [
+            FakeLoader(fail=True),
+            FakeLoader(content="slow", delay=0.2),
+            FakeLoader(content="fast"),
+        ],
+        hedge_delay=hedge_delay,
+    )
+
+    result = pipeline.load_result("https://example.com")
+
+    assert result.content == "slow"
+    assert result.loader == "FakeLoader"
+    assert [attempt.status for attempt in result.attempts][:2] == ["error", "ok"]
+
+
+def test_load_result_overlaps_timeouts_when_racing():
+    pipeline = make_pipeline(
+        [
+            FakeLoader(content="hangs", delay=1.0, timeout=0.3),
+            FakeLoader(content="fast", delay=0.2),
+        ],
+        hedge_delay=0.0,
+    )
+
+    start = time.perf_counter()
+    result = pipeline.load_result("https://example.com")
+
+    assert result.content == "fast"
+    assert [attempt.status for attempt in result.attempts] == ["timeout", "ok"]
+    assert time.perf_counter() - start < 0.5
+
+
+def test_load_result_raises_when_all_loaders_fail():
+    pipeline = make_pipeline([FakeLoader(fail=True), FakeLoader(content="")], hedge_delay=0.0)
+
+    with pytest.raises(LoaderError):
+        pipeline.load_result("https://example.com")
+
+
+def test_load_result_gives_loaders_the_sooner_deadline():
+    loaders = [FakeLoader(content="ok", timeout=10.0)]
+    pipeline = make_pipeline(loaders, hedge_delay=None)
+
+    deadline = Deadline.after(1.0)
+    pipeline.load_result("https://example.com", deadline)
+
+    assert loaders[0].deadline == deadline
+
+
+def test_load_result_stops_at_the_callers_deadline():
+    pipeline = make_pipeline(
+        [FakeLoader(content="hangs", delay=1.0), FakeLoader(content="hangs", delay=1.0)],
+        hedge_delay=0.0,
+    )
+
+    start = time.perf_counter()
+    with pytest.raises((DeadlineExceededError, LoaderError)):
+        pipeline.load_result("https://example.com", Deadline.after(0.2))
+
+    assert time.perf_counter() - start < 0.5
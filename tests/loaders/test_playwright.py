@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+
+from bot.deadline import Deadline
+from bot.loaders.playwright import BrowserPool
+from bot.loaders.playwright import PlaywrightLoader
+
+
+class FakeSession:
+    launched = 0
+
+    def __init__(self, headless: bool = True, memory: int = 0, delay: float = 0.0) -> None:
+        FakeSession.launched += 1
+        self.headless = headless
+        self._memory = memory
+        self.delay = delay
+        self.connected = True
+        self.closed = False
+        self.thread = threading.current_thread()
+
+    def fetch(self, url: str, wait_until: str, timeout: float | None = None) -> str:
+        # Like Playwright, the session must only be used from the thread that created it
+        assert threading.current_thread() is self.thread
+        time.sleep(self.delay)
+        if url == "crash":
+            self.connected = False
+            raise RuntimeError("browser crashed")
+        return f"<html><body>{url}</body></html>"
+
+    def memory(self) -> int | None:
+        return self._memory
+
+    def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def reset_launches() -> None:
+    FakeSession.launched = 0
+
+
+def test_pool_warms_up_and_reuses_browsers() -> None:
+    pool = BrowserPool(size=2, launch=FakeSession)
+    try:
+        for i in range(10):
+            assert pool.fetch(f"https://example.com/{i}") == f"<html><body>https://example.com/{i}</body></html>"
+    finally:
+        pool.close()
+
+    assert FakeSession.launched == 2
+
+
+def test_pool_recycles_after_max_pages() -> None:
+    pool = BrowserPool(size=1, max_pages=3, launch=FakeSession)
+    try:
+        for i in range(7):
+            pool.fetch(f"https://example.com/{i}")
+    finally:
+        pool.close()
+
+    # The warm browser, then one after each 3 pages
+    assert FakeSession.launched == 3
+    assert pool.recycled == 2
+
+
+def test_pool_recycles_above_max_memory() -> None:
+    pool = BrowserPool(size=1, max_memory_mb=1, launch=lambda headless: FakeSession(headless, memory=2 << 20))
+    try:
+        pool.fetch("https://example.com/1")
+        pool.fetch("https://example.com/2")
+    finally:
+        pool.close()
+
+    assert pool.recycled == 2
+
+
+def test_pool_relaunches_crashed_browser() -> None:
+    pool = BrowserPool(size=1, launch=FakeSession)
+    try:
+        with pytest.raises(RuntimeError):
+            pool.fetch("crash")
+        assert pool.fetch("https://example.com") == "<html><body>https://example.com</body></html>"
+    finally:
+        pool.close()
+
+    assert FakeSession.launched == 2
+
+
+def test_pool_fetch_times_out_at_deadline() -> None:
+    pool = BrowserPool(size=1, launch=lambda headless: FakeSession(headless, delay=0.5))
+    try:
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            pool.fetch("https://example.com", deadline=Deadline.after(0.1))
+        assert time.monotonic() - start < 0.4
+    finally:
+        pool.close()
+
+
+def test_loader_keeps_timeout_in_milliseconds() -> None:
+    loader = PlaywrightLoader()
+
+    assert loader.timeout == 10
+    assert not loader.browser_headless
+    assert PlaywrightLoader(timeout=2_500).timeout == 2.5
@@ -0,0 +1,68 @@
+import os
+
+import numpy as np
+import pytest
+
+from bot.loaders.transcriber import GAP_MARKER
+from bot.loaders.transcriber import get_max_workers
+from bot.loaders.transcriber import split_audio
+from bot.loaders.transcriber import stitch
+from bot.loaders.transcripts import Segment
+
+
+def test_split_audio_overlaps_segments() -> None:
+    audio = np.arange(25, dtype=np.float32)
+
+    segments = split_audio(audio, sr=1, segment_seconds=10, overlap_seconds=2)
+
+    assert [segment[0] for segment in segments] == [0, 8, 16]
+    assert [len(segment) for segment in segments] == [10, 10, 9]
+    np.testing.assert_array_equal(segments[0][-2:], segments[1][:2])
+
+
+def test_split_audio_short_audio() -> None:
+    audio = np.arange(5, dtype=np.float32)
+
+    segments = split_audio(audio, sr=1, segment_seconds=10, overlap_seconds=2)
+
+    assert len(segments) == 1
+    np.testing.assert_array_equal(segments[0], audio)
+
+
+def test_split_audio_empty() -> None:
+    assert split_audio(np.zeros(0, dtype=np.float32)) == []
+
+
+def test_stitch_keeps_overlap_once() -> None:
+    chunks = [
+        [Segment(0.0, 4.0, "one"), Segment(4.0, 9.5, "two")],
+        # Starts at 8 s, so "two" at 8.0 is in the overlap and belongs to the first chunk
+        [Segment(0.0, 1.5, "two"), Segment(1.5, 5.0, "three")],
+    ]
+
+    segments = stitch(chunks, segment_seconds=10, overlap_seconds=2)
+
+    assert segments == [Segment(0.0, 4.0, "one"), Segment(4.0, 9.5, "two"), Segment(9.5, 13.0, "three")]
+
+
+def test_stitch_marks_missing_segments() -> None:
+    chunks = [[Segment(0.0, 5.0, "one")], None, None, [Segment(1.5, 3.0, "four")]]
+
+    segments = stitch(chunks, segment_seconds=10, overlap_seconds=2)
+
+    assert [segment.text for segment in segments] == ["one", GAP_MARKER, "four"]
+    assert segments[1].start == 9.0
+    assert segments[2].start == 25.5
+
+
+def test_get_max_workers_shares_cpus_among_media_workers(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("WHISPER_WORKERS", raising=False)
+    monkeypatch.setattr(os, "cpu_count", lambda: 16)
+    # Half of the cores, shared by the two media worker processes
+    assert get_max_workers() == 4
+
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    assert get_max_workers() == 1
+
+    monkeypatch.setenv("WHISPER_WORKERS", "3")
+    assert get_max_workers() == 3
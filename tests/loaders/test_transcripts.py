@@ -0,0 +1,55 @@
+from pathlib import Path
+
+from bot.loaders.transcripts import Segment
+from bot.loaders.transcripts import StoredTranscript
+from bot.loaders.transcripts import TranscriptStore
+from bot.loaders.transcripts import make_media_id
+
+
+def make_transcript(language: str, text: str = "hello", media_id: str = "youtube:Rz1Kujq73kM") -> StoredTranscript:
+    return StoredTranscript(
+        media_id=media_id,
+        language=language,
+        source="youtube",
+        segments=[Segment(start=0.0, end=1.5, text=f" {text} "), Segment(start=1.5, end=3.0, text="world")],
+    )
+
+
+def test_make_media_id() -> None:
+    assert make_media_id("Youtube", "Rz1Kujq73kM") == "youtube:Rz1Kujq73kM"
+
+
+def test_transcript_text() -> None:
+    assert make_transcript("en").text == "hello\nworld"
+
+
+def test_store_round_trip(tmp_path: Path) -> None:
+    store = TranscriptStore(tmp_path / "transcripts.sqlite3")
+    store.set(make_transcript("en"))
+
+    assert store.get("youtube:Rz1Kujq73kM") == make_transcript("en")
+    assert store.get("youtube:other") is None
+
+
+def test_store_prefers_languages_in_order(tmp_path: Path) -> None:
+    store = TranscriptStore(tmp_path / "transcripts.sqlite3")
+    store.set(make_transcript("en", "hello"))
+    store.set(make_transcript("ja", "こんにちは"))
+
+    transcript = store.get("youtube:Rz1Kujq73kM", ["zh-TW", "en", "ja"])
+    assert transcript is not None
+    assert transcript.language == "en"
+
+    assert store.get("youtube:Rz1Kujq73kM", ["zh-TW", "ko"]) is None
+
+
+def test_store_evicts_least_recently_used(tmp_path: Path) -> None:
+    store = TranscriptStore(tmp_path / "transcripts.sqlite3", max_size=200)
+    store.set(make_transcript("en", media_id="youtube:a"))
+    store.set(make_transcript("en", media_id="youtube:b"))
+    store.get("youtube:a")
+    store.set(make_transcript("en", media_id="youtube:c"))
+
+    assert store.get("youtube:a") is not None
+    assert store.get("youtube:b") is None
+    assert store.get("youtube:c") is not None
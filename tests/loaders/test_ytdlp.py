@@ -0,0 +1,61 @@
+import sys
+
+import numpy as np
+import pytest
+
+from bot.deadline import Deadline
+from bot.loaders import ytdlp
+from bot.loaders.transcriber import Transcript
+from bot.loaders.transcripts import Segment
+from bot.loaders.ytdlp import read_pcm
+
+
+def write_pcm_cmd(samples: list[int]) -> list[str]:
+    data = np.array(samples, dtype=np.int16).tobytes()
+    return [sys.executable, "-c", f"import sys; sys.stdout.buffer.write({data!r})"]
+
+
+@pytest.mark.parametrize("expected_bytes", [0, 4, 6, 1 << 21])
+def test_read_pcm(expected_bytes: int) -> None:
+    audio = read_pcm(write_pcm_cmd([0, 16384, -32768]), expected_bytes=expected_bytes)
+
+    np.testing.assert_array_equal(audio, np.array([0.0, 0.5, -1.0], dtype=np.float32))
+
+
+def test_read_pcm_grows_buffer(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("bot.loaders.ytdlp.READ_CHUNK_SIZE", 4)
+    samples = list(range(100))
+
+    audio = read_pcm(write_pcm_cmd(samples))
+
+    np.testing.assert_array_equal(audio, np.array(samples, dtype=np.float32) / 32768.0)
+
+
+def test_read_pcm_failure() -> None:
+    with pytest.raises(RuntimeError, match="boom"):
+        read_pcm([sys.executable, "-c", "import sys; sys.stderr.write('boom'); sys.exit(1)"])
+
+
+def test_ytdlp_loader_returns_partial_transcript_before_deadline(monkeypatch: pytest.MonkeyPatch) -> None:
+    budgets = []
+
+    class FakeTranscriber:
+        def transcribe(self, audio: np.ndarray, budget: float | None = None) -> Transcript:
+            budgets.append(budget)
+            return Transcript([Segment(0.0, 1.0, "partial")], "en", False, 1, 2)
+
+    class FakeStore:
+        def get(self, media_id: str) -> None:
+            return None
+
+    monkeypatch.setattr(ytdlp, "extract_audio_info", lambda url, deadline: {"extractor_key": "Test", "id": "1"})
+    monkeypatch.setattr(ytdlp, "get_transcript_store", FakeStore)
+    monkeypatch.setattr(ytdlp, "get_transcriber", FakeTranscriber)
+    monkeypatch.setattr(ytdlp, "stream_audio", lambda url, info, deadline: np.zeros(1, dtype=np.float32))
+
+    deadline = Deadline.after(10)
+    text = ytdlp.YtdlpLoader().load("https://example.com/video", deadline)
+
+    assert text == "partial"
+    assert budgets[0] is not None
+    assert budgets[0] <= deadline.remaining() - ytdlp.RETURN_MARGIN + 0.1
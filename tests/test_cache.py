@@ -0,0 +1,57 @@
+from bot.cache import SQLiteCache
+from bot.cache import TTLCache
+
+
+def test_sqlite_cache_round_trip(tmp_path):
+    cache = SQLiteCache(tmp_path / "cache.sqlite3", max_size=1024)
+    cache.set("key", "value", ttl=60, metadata={"loader": "HttpxLoader"})
+
+    entry = cache.get("key")
+    assert entry is not None
+    assert entry.value == "value"
+    assert entry.metadata == {"loader": "HttpxLoader"}
+    assert not entry.expired
+    assert cache.get("missing") is None
+
+
+def test_sqlite_cache_keeps_expired_entries_until_touched(tmp_path):
+    cache = SQLiteCache(tmp_path / "cache.sqlite3", max_size=1024)
+    cache.set("key", "value", ttl=-1)
+
+    entry = cache.get("key")
+    assert entry is not None and entry.expired
+
+    cache.touch("key", ttl=60)
+    entry = cache.get("key")
+    assert entry is not None and not entry.expired
+
+
+def test_sqlite_cache_evicts_least_recently_used(tmp_path):
+    cache = SQLiteCache(tmp_path / "cache.sqlite3", max_size=10)
+    cache.set("a", "x" * 4, ttl=60)
+    cache.set("b", "x" * 4, ttl=60)
+    cache.get("a")
+    cache.set("c", "x" * 4, ttl=60)
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache: TTLCache[int] = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries():
+    cache: TTLCache[int] = TTLCache(maxsize=2, ttl=0)
+    cache.set("a", 1)
+
+    assert cache.get("a") is None
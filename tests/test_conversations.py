@@ -0,0 +1,59 @@
+import pytest
+
+from bot.conversations import ConversationStore
+from bot.conversations import MemoryConversationStore
+from bot.conversations import SQLiteConversationStore
+from bot.conversations import TieredConversationStore
+
+
+def user(text: str) -> dict[str, str]:
+    return {"role": "user", "content": text}
+
+
+def assistant(text: str) -> dict[str, str]:
+    return {"role": "assistant", "content": text}
+
+
+@pytest.fixture(params=["memory", "sqlite", "tiered"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryConversationStore()
+    if request.param == "sqlite":
+        return SQLiteConversationStore(tmp_path / "conversations.sqlite3")
+    return TieredConversationStore(
+        front=MemoryConversationStore(maxsize=1),
+        back=SQLiteConversationStore(tmp_path / "conversations.sqlite3"),
+    )
+
+
+def test_load_concatenates_deltas(store):
+    store.save("1:1", [user("hi"), assistant("hello")])
+    store.save("3:1", [user("how are you"), assistant("fine")], parent="1:1")
+
+    assert store.load("3:1") == [user("hi"), assistant("hello"), user("how are you"), assistant("fine")]
+    assert store.load("1:1") == [user("hi"), assistant("hello")]
+
+
+def test_replies_to_older_messages_branch(store):
+    store.save("1:1", [user("hi"), assistant("hello")])
+    store.save("3:1", [user("a"), assistant("b")], parent="1:1")
+    store.save("5:1", [user("c"), assistant("d")], parent="1:1")
+
+    assert store.load("5:1") == [user("hi"), assistant("hello"), user("c"), assistant("d")]
+
+
+def test_expired_threads_are_forgotten(tmp_path):
+    store = SQLiteConversationStore(tmp_path / "conversations.sqlite3", ttl=-1)
+    store.save("1:1", [user("hi")])
+
+    assert store.load("1:1") == []
+    assert store.load("missing") == []
+
+
+def test_incomplete_store_cannot_be_created():
+    class Incomplete(ConversationStore):
+        def get_node(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
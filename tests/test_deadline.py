@@ -0,0 +1,36 @@
+import math
+import time
+
+import pytest
+
+from bot.deadline import NEVER
+from bot.deadline import Deadline
+from bot.deadline import DeadlineExceededError
+
+
+def test_child_is_never_later_than_parent():
+    parent = Deadline.after(1.0)
+
+    assert parent.child(10.0) == parent
+    assert parent.child(0.1).expires_at < parent.expires_at
+
+
+def test_expired_deadline():
+    deadline = Deadline(time.monotonic() - 1)
+
+    assert deadline.expired
+    assert deadline.remaining() == 0.0
+    with pytest.raises(DeadlineExceededError):
+        deadline.check()
+    with pytest.raises(DeadlineExceededError):
+        deadline.timeout()
+
+
+def test_timeout():
+    assert NEVER.timeout() is None
+    assert NEVER.timeout(5.0) == 5.0
+    assert math.isinf(NEVER.remaining())
+
+    deadline = Deadline.after(1.0)
+    assert 0.9 < deadline.timeout() <= 1.0
+    assert deadline.timeout(0.5) == 0.5
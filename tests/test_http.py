@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from bot.http import AsyncLimitedTransport
+from bot.http import LimitedTransport
+from bot.http import _pool_stats
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def do_GET(self) -> None:  # noqa: N802
+        with Handler.lock:
+            Handler.active += 1
+            Handler.max_active = max(Handler.max_active, Handler.active)
+        time.sleep(0.05)
+        with Handler.lock:
+            Handler.active -= 1
+
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server_url() -> Iterator[str]:
+    Handler.max_active = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+
+
+def test_reuses_connections(server_url: str) -> None:
+    transport = LimitedTransport()
+    with httpx.Client(transport=transport) as client:
+        for _ in range(3):
+            assert client.get(server_url).text == "ok"
+
+        stats = _pool_stats(transport)
+
+    assert stats.requests == 3
+    assert stats.in_flight == 0
+    assert stats.connections == 1
+    assert stats.idle_connections == 1
+
+
+def test_limits_requests_per_host(server_url: str) -> None:
+    transport = LimitedTransport(max_per_host=2)
+    with httpx.Client(transport=transport) as client, ThreadPoolExecutor(max_workers=6) as executor:
+        responses = list(executor.map(lambda _: client.get(server_url), range(6)))
+
+    assert all(response.text == "ok" for response in responses)
+    assert Handler.max_active <= 2
+    assert _pool_stats(transport).in_flight_by_host == {}
+
+
+def test_async_limits_requests_per_host(server_url: str) -> None:
+    async def fetch_all() -> list[httpx.Response]:
+        transport = AsyncLimitedTransport(max_per_host=2)
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await asyncio.gather(*[client.get(server_url) for _ in range(6)])
+
+    responses = asyncio.run(fetch_all())
+
+    assert all(response.text == "ok" for response in responses)
+    assert Handler.max_active <= 2
+
+
+def test_waiting_for_a_slot_times_out(server_url: str) -> None:
+    transport = LimitedTransport(max_per_host=1)
+    with httpx.Client(transport=transport) as client, client.stream("GET", server_url):
+        with pytest.raises(httpx.PoolTimeout):
+            client.get(server_url, timeout=httpx.Timeout(5.0, pool=0.1))
+
+        assert _pool_stats(transport).in_flight_by_host == {"127.0.0.1": 1}
+
+
+def test_async_waiting_for_a_slot_times_out(server_url: str) -> None:
+    async def fetch() -> None:
+        transport = AsyncLimitedTransport(max_per_host=1)
+        async with httpx.AsyncClient(transport=transport) as client, client.stream("GET", server_url):
+            await client.get(server_url, timeout=httpx.Timeout(5.0, pool=0.1))
+
+    with pytest.raises(httpx.PoolTimeout):
+        asyncio.run(fetch())
@@ -0,0 +1,64 @@
+from pydantic import BaseModel
+
+from bot import llm
+
+
+class Answer(BaseModel):
+    text: str
+
+
+def test_generate_reuses_cached_responses(monkeypatch):
+    calls = []
+
+    def fake_generate(prompt, system=None, response_format=None):
+        calls.append(prompt)
+        return Answer(text=prompt.upper())
+
+    monkeypatch.setattr(llm.lazyopenai, "generate", fake_generate)
+
+    first = llm.generate("cache me", system="system", response_format=Answer, chain="test")
+    second = llm.generate("cache me", system="system", response_format=Answer, chain="test")
+
+    assert first == second == Answer(text="CACHE ME")
+    assert calls == ["cache me"]
+
+
+def test_generate_bypasses_cache_for_listed_chains(monkeypatch):
+    calls = []
+
+    def fake_generate(prompt, system=None, response_format=None):
+        calls.append(prompt)
+        return prompt
+
+    monkeypatch.setattr(llm.lazyopenai, "generate", fake_generate)
+    monkeypatch.setenv("LLM_CACHE_BYPASS", "bypassed")
+    llm.get_bypassed_chains.cache_clear()
+
+    llm.generate("do not cache me", chain="bypassed")
+    llm.generate("do not cache me", chain="bypassed")
+
+    llm.get_bypassed_chains.cache_clear()
+    assert calls == ["do not cache me", "do not cache me"]
+
+
+def test_cache_key_depends_on_schema():
+    assert llm.make_cache_key("prompt", None, Answer) != llm.make_cache_key("prompt", None, None)
+
+
+def test_cache_key_depends_on_model(monkeypatch):
+    key = llm.make_cache_key("prompt", None, None)
+    monkeypatch.setattr(llm.get_settings(), "openai_model", "gpt-4o")
+    assert llm.make_cache_key("prompt", None, None) != key
+
+
+def test_async_client_uses_azure_settings(monkeypatch):
+    settings = llm.get_settings()
+    monkeypatch.setattr(settings, "openai_api_key", None)
+    monkeypatch.setattr(settings, "azure_openai_api_key", "key")
+    monkeypatch.setattr(settings, "azure_openai_endpoint", "https://example.openai.azure.com")
+    llm.get_async_openai_client.cache_clear()
+
+    client = llm.get_async_openai_client()
+
+    llm.get_async_openai_client.cache_clear()
+    assert isinstance(client, llm.AsyncAzureOpenAI)
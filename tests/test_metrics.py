@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from bot.metrics import COMMAND_DURATION
+from bot.metrics import TOOL_RUNS
+from bot.metrics import Counter
+from bot.metrics import Gauge
+from bot.metrics import Histogram
+from bot.metrics import Registry
+from bot.metrics import call_and_drain
+from bot.metrics import track_command
+from bot.workers import run_blocking
+
+
+@pytest.fixture
+def registry() -> Registry:
+    return Registry()
+
+
+def test_render(registry: Registry) -> None:
+    counter = registry.register(Counter("jobs_total", "Jobs done.", ("status",)))
+    gauge = registry.register(Gauge("queue_size", "Jobs waiting."))
+    histogram = registry.register(Histogram("job_seconds", "Job duration.", buckets=(0.5, 1.0)))
+
+    counter.inc(status="ok")
+    counter.inc(2, status='a "b"')
+    gauge.set(3)
+    histogram.observe(0.2)
+    histogram.observe(0.7)
+    histogram.observe(5)
+
+    assert registry.render().splitlines() == [
+        "# HELP jobs_total Jobs done.",
+        "# TYPE jobs_total counter",
+        'jobs_total{status="a \\"b\\""} 2',
+        'jobs_total{status="ok"} 1',
+        "# HELP queue_size Jobs waiting.",
+        "# TYPE queue_size gauge",
+        "queue_size 3",
+        "# HELP job_seconds Job duration.",
+        "# TYPE job_seconds histogram",
+        'job_seconds_bucket{le="0.5"} 1',
+        'job_seconds_bucket{le="1"} 2',
+        'job_seconds_bucket{le="+Inf"} 3',
+        "job_seconds_sum 5.9",
+        "job_seconds_count 3",
+    ]
+
+
+def test_labels_must_match(registry: Registry) -> None:
+    counter = registry.register(Counter("jobs_total", "Jobs done.", ("status",)))
+
+    with pytest.raises(ValueError):
+        counter.inc(lane="s")
+    with pytest.raises(ValueError):
+        registry.register(Counter("jobs_total", "Again."))
+
+
+def test_collectors_run_before_render(registry: Registry) -> None:
+    gauge = registry.register(Gauge("queue_size", "Jobs waiting."))
+    registry.add_collector(lambda: gauge.set(7))
+
+    assert "queue_size 7" in registry.render()
+
+
+def test_drain_and_merge(registry: Registry) -> None:
+    counter = registry.register(Counter("jobs_total", "Jobs done.", ("status",)))
+    gauge = registry.register(Gauge("queue_size", "Jobs waiting."))
+    histogram = registry.register(Histogram("job_seconds", "Job duration.", buckets=(1.0,)))
+    counter.inc(status="ok")
+    gauge.set(5)
+    histogram.observe(2)
+
+    samples = registry.drain()
+    assert set(samples) == {"jobs_total", "job_seconds"}
+    assert counter.value(status="ok") == 0
+    assert gauge.value() == 5
+
+    counter.inc(status="ok")
+    registry.merge(samples)
+    registry.merge(samples)
+    assert counter.value(status="ok") == 3
+    assert histogram.value() == 2
+
+
+def test_call_and_drain_returns_errors() -> None:
+    def fail() -> None:
+        raise RuntimeError("boom")
+
+    result, _, error = call_and_drain(fail)
+
+    assert result is None
+    assert isinstance(error, RuntimeError)
+
+
+def test_track_command() -> None:
+    async def ok() -> str:
+        return "done"
+
+    async def fail() -> None:
+        raise RuntimeError("boom")
+
+    assert asyncio.run(track_command("test-ok", ok)()) == "done"
+    with pytest.raises(RuntimeError):
+        asyncio.run(track_command("test-fail", fail)())
+
+    assert COMMAND_DURATION.value(command="test-ok", status="ok") == 1
+    assert COMMAND_DURATION.value(command="test-fail", status="error") == 1
+
+
+def record_tool_run() -> int:
+    TOOL_RUNS.inc(tool="test", status="ok")
+    return 1
+
+
+def test_run_blocking_merges_metrics_from_worker_processes() -> None:
+    before = TOOL_RUNS.value(tool="test", status="ok")
+
+    async def main() -> list[int]:
+        return await asyncio.gather(*[run_blocking("load", record_tool_run) for _ in range(3)])
+
+    assert asyncio.run(main()) == [1, 1, 1]
+    assert TOOL_RUNS.value(tool="test", status="ok") == before + 3
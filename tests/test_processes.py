@@ -0,0 +1,121 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from bot.deadline import Deadline
+from bot.deadline import DeadlineExceededError
+from bot.processes import WORKSPACE_PREFIX
+from bot.processes import Supervisor
+from bot.processes import clean_stale_workspaces
+from bot.processes import process_tree_rss
+
+
+@pytest.fixture
+def supervisor(tmp_path: Path) -> Supervisor:
+    return Supervisor(limits={"python": 2}, scratch_root=tmp_path)
+
+
+def python(code: str) -> list[str]:
+    return [sys.executable, "-c", code]
+
+
+def test_run(supervisor: Supervisor) -> None:
+    result = supervisor.run("python", python("print('hello')"), stdout=subprocess.PIPE, text=True)
+
+    assert result.returncode == 0
+    assert result.stdout == "hello\n"
+
+    stats = supervisor.stats["python"]
+    assert stats.runs == 1
+    assert stats.running == 0
+    assert stats.failures == 0
+    assert stats.max_rss > 0
+
+
+def test_run_counts_failures(supervisor: Supervisor) -> None:
+    result = supervisor.run("python", python("raise SystemExit(3)"))
+
+    assert result.returncode == 3
+    assert supervisor.stats["python"].failures == 1
+
+
+def test_run_kills_process_group_at_deadline(supervisor: Supervisor, tmp_path: Path) -> None:
+    # The child starts a grandchild which would write its pid after the deadline
+    pid_file = tmp_path / "grandchild.pid"
+    grandchild = f"import os, time; time.sleep(1); open({str(pid_file)!r}, 'w').write(str(os.getpid()))"
+    code = f"import subprocess, sys, time; subprocess.Popen([sys.executable, '-c', {grandchild!r}]); time.sleep(10)"
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        supervisor.run("python", python(code), Deadline.after(0.5))
+
+    assert time.monotonic() - start < 2
+    time.sleep(1.5)
+    assert not pid_file.exists()
+    assert supervisor.stats["python"].timeouts == 1
+
+
+def test_limits_concurrent_processes(supervisor: Supervisor) -> None:
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def run() -> None:
+        nonlocal running, peak
+        with supervisor.slot("python"):
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.2)
+            with lock:
+                running -= 1
+
+    threads = [threading.Thread(target=run) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak == 2
+    assert supervisor.stats["python"].runs == 5
+
+
+def test_slot_times_out_waiting(supervisor: Supervisor) -> None:
+    with (
+        supervisor.slot("python"),
+        supervisor.slot("python"),
+        pytest.raises(DeadlineExceededError),
+        supervisor.slot("python", Deadline.after(0.1)),
+    ):
+        pass
+
+
+def test_workspace_is_removed(supervisor: Supervisor, tmp_path: Path) -> None:
+    with pytest.raises(RuntimeError), supervisor.workspace() as directory:
+        (directory / "page.html").write_text("<html></html>")
+        assert directory.parent == tmp_path
+        raise RuntimeError
+
+    assert not directory.exists()
+
+
+def test_clean_stale_workspaces(tmp_path: Path) -> None:
+    process = subprocess.run(python("import os; print(os.getpid())"), capture_output=True, text=True)
+    stale = tmp_path / f"{WORKSPACE_PREFIX}{process.stdout.strip()}-abc"
+    live = tmp_path / f"{WORKSPACE_PREFIX}{os.getpid()}-abc"
+    stale.mkdir()
+    live.mkdir()
+
+    clean_stale_workspaces(tmp_path)
+
+    assert not stale.exists()
+    assert live.exists()
+
+
+def test_process_tree_rss() -> None:
+    assert process_tree_rss(os.getpid()) > 0
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from bot.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_result() -> None:
+    flights = SingleFlight()
+    calls = 0
+
+    async def work() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "summary"
+
+    async def main() -> list[str]:
+        return await asyncio.gather(*[flights.do("s", "https://example.com/", work) for _ in range(5)])
+
+    assert asyncio.run(main()) == ["summary"] * 5
+    assert calls == 1
+    assert flights.stats["s"].leaders == 1
+    assert flights.stats["s"].coalesced == 4
+    assert flights.in_flight() == 0
+
+
+def test_different_keys_and_commands_do_not_coalesce() -> None:
+    flights = SingleFlight()
+    calls: list[str] = []
+
+    def work(name: str):
+        async def run() -> str:
+            calls.append(name)
+            await asyncio.sleep(0.01)
+            return name
+
+        return run
+
+    async def main() -> list[str]:
+        return await asyncio.gather(
+            flights.do("s", "a", work("s:a")),
+            flights.do("s", "b", work("s:b")),
+            flights.do("f", "a", work("f:a")),
+        )
+
+    assert asyncio.run(main()) == ["s:a", "s:b", "f:a"]
+    assert sorted(calls) == ["f:a", "s:a", "s:b"]
+
+
+def test_calls_after_completion_run_again() -> None:
+    flights = SingleFlight()
+    calls = 0
+
+    async def work() -> int:
+        nonlocal calls
+        calls += 1
+        return calls
+
+    async def main() -> list[int]:
+        return [await flights.do("s", "a", work), await flights.do("s", "a", work)]
+
+    assert asyncio.run(main()) == [1, 2]
+
+
+def test_failures_are_shared_and_not_kept() -> None:
+    flights = SingleFlight()
+
+    async def fail() -> str:
+        await asyncio.sleep(0.01)
+        raise RuntimeError("load failed")
+
+    async def main() -> list[BaseException | str]:
+        return await asyncio.gather(*[flights.do("load", "a", fail) for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flights.stats["load"].failures == 1
+    assert flights.in_flight() == 0
+
+
+def test_cancelled_caller_does_not_cancel_others() -> None:
+    flights = SingleFlight()
+
+    async def work() -> str:
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main() -> str:
+        first = asyncio.create_task(flights.do("s", "a", work))
+        second = asyncio.create_task(flights.do("s", "a", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "done"
@@ -0,0 +1,105 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from bot.deadline import DeadlineExceededError
+from bot.tracing import current_context
+from bot.tracing import format_trace
+from bot.tracing import read_traces
+from bot.tracing import span
+from bot.tracing import start_span
+from bot.tracing import trace_update
+from bot.workers import run_blocking
+from bot.workers import shutdown_workers
+
+
+@pytest.fixture
+def trace_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setenv("BOT_TRACE_FILE", str(path))
+    return path
+
+
+def read_spans(path: Path) -> dict[str, dict]:
+    return {record["name"]: record for record in map(json.loads, path.read_text().splitlines())}
+
+
+def test_spans_nest_under_the_current_one(trace_file: Path) -> None:
+    with span("root", new_trace=True, url="https://example.com") as root, span("child"):
+        assert current_context() is not None
+    assert current_context() is None
+
+    spans = read_spans(trace_file)
+    assert spans["child"]["trace_id"] == spans["root"]["trace_id"] == root.context.trace_id
+    assert spans["child"]["parent_id"] == spans["root"]["span_id"]
+    assert spans["root"]["parent_id"] is None
+    assert spans["root"]["attributes"] == {"url": "https://example.com"}
+
+
+def test_span_records_errors(trace_file: Path) -> None:
+    with pytest.raises(RuntimeError), span("failing"):
+        raise RuntimeError("boom")
+    with pytest.raises(DeadlineExceededError), span("slow"):
+        raise DeadlineExceededError("too slow")
+
+    spans = read_spans(trace_file)
+    assert spans["failing"]["status"] == "error"
+    assert "boom" in spans["failing"]["attributes"]["error"]
+    assert spans["slow"]["status"] == "timeout"
+
+
+def test_nothing_is_written_without_trace_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("BOT_TRACE_FILE", raising=False)
+    monkeypatch.chdir(tmp_path)
+
+    with span("root"):
+        pass
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def record_span(name: str) -> str:
+    with span(name):
+        return name
+
+
+def test_run_blocking_propagates_the_trace(trace_file: Path) -> None:
+    # Worker processes read BOT_TRACE_FILE from the environment they were started with
+    shutdown_workers()
+
+    async def handle(update: object) -> list[str]:
+        return list(
+            await asyncio.gather(
+                run_blocking("polish", record_span, "thread"), run_blocking("load", record_span, "process")
+            )
+        )
+
+    assert asyncio.run(trace_update("s", handle)(object())) == ["thread", "process"]
+
+    spans = read_spans(trace_file)
+    trace_id = spans["handler s"]["trace_id"]
+    assert {record["trace_id"] for record in spans.values()} == {trace_id}
+    assert spans["lane polish"]["parent_id"] == spans["handler s"]["span_id"]
+    assert spans["thread"]["parent_id"] == spans["lane polish"]["span_id"]
+    assert spans["process"]["parent_id"] == spans["lane load"]["span_id"]
+    assert spans["process"]["pid"] != spans["handler s"]["pid"]
+
+
+def test_format_trace(trace_file: Path) -> None:
+    with span("handler s", new_trace=True):
+        started = start_span("loader HttpxLoader")
+        with span("llm generate"):
+            pass
+        started.finish("timeout")
+
+    [spans] = read_traces(trace_file).values()
+    lines = format_trace(spans).splitlines()
+
+    assert [line.split("s ", 2)[-1].strip() for line in lines] == [
+        "handler s",
+        "loader HttpxLoader [timeout]",
+        "llm generate",
+    ]
+    assert lines[1].index("loader") > lines[0].index("handler")
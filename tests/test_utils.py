@@ -1,5 +1,6 @@
 import pytest
 
+from bot.utils import normalize_url
 from bot.utils import parse_url
 
 
@@ -14,3 +15,17 @@ from bot.utils import parse_url
 )
 def test_parse_url(s, expected):
     assert parse_url(s) == expected
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://Example.com", "https://example.com/"),
+        ("https://example.com:443/a?b=2&a=1#top", "https://example.com/a?a=1&b=2"),
+        ("https://example.com/a?utm_source=x&id=3&fbclid=abc", "https://example.com/a?id=3"),
+        ("https://youtu.be/Rz1Kujq73kM?si=share", "https://youtu.be/Rz1Kujq73kM"),
+        ("http://example.com:8080/", "http://example.com:8080/"),
+    ],
+)
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
@@ -0,0 +1,108 @@
+import asyncio
+import socket
+
+import httpx
+import pytest
+from telegram import Update
+
+from bot.webhook import WebhookConfig
+from bot.webhook import get_webhook_config
+from bot.webhook import run_webhook
+from bot.webhook import start_health_server
+from bot.webhook import start_metrics_server
+
+SECRET = "s3cret_token-1"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeApplication:
+    """Stands in for the Application, recording how the webhook is run."""
+
+    def __init__(self) -> None:
+        self.running = False
+        self.bot_data: dict = {}
+        self.webhooks: list[dict] = []
+
+    def run_webhook(self, **kwargs) -> None:
+        self.webhooks.append(kwargs)
+
+
+def test_run_webhook() -> None:
+    app = FakeApplication()
+    config = WebhookConfig(url="https://bot.example.com/telegram", secret_token=SECRET, port=9000)
+
+    run_webhook(app, config)  # type: ignore[arg-type]
+
+    assert app.webhooks == [
+        {
+            "listen": "0.0.0.0",
+            "port": 9000,
+            "url_path": "/telegram",
+            "webhook_url": config.url,
+            "secret_token": SECRET,
+            "allowed_updates": Update.ALL_TYPES,
+        }
+    ]
+    assert app.bot_data["webhook_config"] == config
+
+
+def test_health_server_answers_health_checks() -> None:
+    async def get_statuses() -> list[int]:
+        app = FakeApplication()
+        port = free_port()
+        server = start_health_server(app, port, "127.0.0.1")  # type: ignore[arg-type]
+
+        statuses = []
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+            statuses.append((await client.get("/healthz")).status_code)
+            app.running = True
+            statuses.append((await client.get("/healthz")).status_code)
+            # Metrics stay on their own, private server
+            statuses.append((await client.get("/metrics")).status_code)
+
+        server.stop()
+        return statuses
+
+    assert asyncio.run(get_statuses()) == [503, 200, 404]
+
+
+def test_metrics_server_serves_only_metrics() -> None:
+    async def get_statuses() -> list[int]:
+        port = free_port()
+        server = start_metrics_server(port, "127.0.0.1")
+
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+            statuses = [(await client.get(path)).status_code for path in ("/metrics", "/healthz")]
+
+        server.stop()
+        return statuses
+
+    assert asyncio.run(get_statuses()) == [200, 404]
+
+
+def test_get_webhook_config(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("BOT_WEBHOOK_URL", raising=False)
+    assert get_webhook_config() is None
+
+    monkeypatch.setenv("BOT_WEBHOOK_URL", "https://bot.example.com/telegram")
+    monkeypatch.delenv("BOT_WEBHOOK_SECRET", raising=False)
+    with pytest.raises(ValueError, match="BOT_WEBHOOK_SECRET"):
+        get_webhook_config()
+
+    monkeypatch.setenv("BOT_WEBHOOK_SECRET", "not valid!")
+    with pytest.raises(ValueError, match="BOT_WEBHOOK_SECRET"):
+        get_webhook_config()
+
+    monkeypatch.setenv("BOT_WEBHOOK_SECRET", SECRET)
+    monkeypatch.setenv("BOT_WEBHOOK_PORT", "9000")
+    monkeypatch.setenv("BOT_HEALTH_PORT", "9001")
+    config = get_webhook_config()
+    assert config == WebhookConfig(
+        url="https://bot.example.com/telegram", secret_token=SECRET, port=9000, health_port=9001
+    )
+    assert config.path == "/telegram"
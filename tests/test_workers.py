@@ -0,0 +1,61 @@
+import asyncio
+import os
+import threading
+import time
+
+from bot.workers import get_lane
+from bot.workers import run_blocking
+from bot.workers import shutdown_workers
+
+
+def test_run_blocking_runs_off_the_event_loop_thread():
+    async def main() -> str:
+        return await run_blocking("polish", lambda: threading.current_thread().name)
+
+    assert asyncio.run(main()) != threading.current_thread().name
+
+
+def test_run_blocking_respects_lane_concurrency():
+    running = 0
+    max_running = 0
+    lock = threading.Lock()
+
+    def job() -> None:
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+
+    async def main() -> None:
+        await asyncio.gather(*[run_blocking("s", job) for _ in range(6)])
+
+    asyncio.run(main())
+    assert max_running == get_lane("s").max_concurrency
+
+
+# Set by the test, so only a forked worker would see it
+set_in_parent = False
+
+
+def get_set_in_parent() -> bool:
+    return set_in_parent
+
+
+def test_run_blocking_runs_media_jobs_in_spawned_processes():
+    global set_in_parent
+    set_in_parent = True
+
+    async def main() -> tuple[int, bool]:
+        return await run_blocking("load", os.getpid), await run_blocking("load", get_set_in_parent)
+
+    try:
+        pid, inherited = asyncio.run(main())
+    finally:
+        shutdown_workers()
+        set_in_parent = False
+
+    assert pid != os.getpid()
+    assert not inherited
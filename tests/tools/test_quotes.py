@@ -0,0 +1,84 @@
+import threading
+import time
+
+from bot.tools.quotes import QuoteService
+from bot.tools.quotes import QuoteSource
+from bot.tools.quotes import normalize_symbols
+
+
+class FakeSource:
+    def __init__(self, quotes: dict[str, str], delay: float = 0.0) -> None:
+        self.quotes = quotes
+        self.delay = delay
+        self.calls: list[list[str]] = []
+        self._lock = threading.Lock()
+
+    def fetch(self, symbols: list[str]) -> dict[str, str]:
+        with self._lock:
+            self.calls.append(symbols)
+        time.sleep(self.delay)
+        return {symbol: self.quotes[symbol] for symbol in symbols if symbol in self.quotes}
+
+
+def test_normalize_symbols() -> None:
+    assert normalize_symbols([" aapl", "2330", "AAPL", "", "msft "]) == ["AAPL", "2330", "MSFT"]
+
+
+def test_query_orders_results_by_source_and_symbol() -> None:
+    yahoo = FakeSource({"AAPL": "apple", "MSFT": "microsoft"})
+    twse = FakeSource({"2330": "tsmc", "0050": "etf"})
+    service = QuoteService(sources=[QuoteSource("yahoo", yahoo.fetch, batch_size=1), QuoteSource("twse", twse.fetch)])
+
+    assert service.query(["msft", "2330", "aapl", "0050"]) == ["microsoft", "apple", "tsmc", "etf"]
+    assert sorted(yahoo.calls) == [["0050"], ["2330"], ["AAPL"], ["MSFT"]]
+    assert twse.calls == [["MSFT", "2330", "AAPL", "0050"]]
+
+
+def test_query_caches_quotes_and_misses() -> None:
+    source = FakeSource({"AAPL": "apple"})
+    service = QuoteService(sources=[QuoteSource("yahoo", source.fetch)])
+
+    assert service.query(["AAPL", "NOPE"]) == ["apple"]
+    assert service.query(["AAPL", "NOPE"]) == ["apple"]
+    assert source.calls == [["AAPL", "NOPE"]]
+
+
+def test_query_refetches_after_ttl() -> None:
+    source = FakeSource({"AAPL": "apple"})
+    service = QuoteService(sources=[QuoteSource("yahoo", source.fetch)], ttl=0.05)
+
+    service.query(["AAPL"])
+    time.sleep(0.1)
+    service.query(["AAPL"])
+
+    assert len(source.calls) == 2
+
+
+def test_concurrent_queries_share_one_fetch() -> None:
+    source = FakeSource({"AAPL": "apple"}, delay=0.1)
+    service = QuoteService(sources=[QuoteSource("yahoo", source.fetch, batch_size=1)])
+    results: list[list[str]] = []
+
+    threads = [threading.Thread(target=lambda: results.append(service.query(["AAPL"]))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [["apple"]] * 5
+    assert source.calls == [["AAPL"]]
+
+
+def test_query_skips_failed_and_slow_sources() -> None:
+    def fail(symbols: list[str]) -> dict[str, str]:
+        raise RuntimeError("upstream down")
+
+    slow = FakeSource({"AAPL": "slow apple"}, delay=0.5)
+    fast = FakeSource({"AAPL": "apple"})
+    service = QuoteService(
+        sources=[QuoteSource("fail", fail), QuoteSource("slow", slow.fetch), QuoteSource("fast", fast.fetch)]
+    )
+
+    assert service.query(["AAPL"], timeout=0.1) == ["apple"]
+    # Failures are not cached
+    assert service.cache.get("fail:AAPL") is None
@@ -0,0 +1,33 @@
+import httpx
+import pytest
+
+from bot.tools import twse
+
+
+def test_query_twse_quotes_sends_only_numeric_codes(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[list[str]] = []
+
+    def fetch(symbols: list[str]) -> dict[str, str]:
+        calls.append(symbols)
+        return {symbol: f"quote of {symbol}" for symbol in symbols}
+
+    monkeypatch.setattr(twse, "fetch_twse_quotes", fetch)
+
+    assert twse.query_twse_quotes(["AAPL", "2330", "0050"]) == {"2330": "quote of 2330", "0050": "quote of 0050"}
+    assert twse.query_twse_quotes(["AAPL"]) == {}
+    assert calls == [["2330", "0050"]]
+
+
+def test_query_twse_quotes_falls_back_to_one_by_one(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[list[str]] = []
+
+    def fetch(symbols: list[str]) -> dict[str, str]:
+        calls.append(symbols)
+        if "9999" in symbols:
+            raise httpx.HTTPError("bad symbol")
+        return {symbol: f"quote of {symbol}" for symbol in symbols}
+
+    monkeypatch.setattr(twse, "fetch_twse_quotes", fetch)
+
+    assert twse.query_twse_quotes(["2330", "9999", "0050"]) == {"2330": "quote of 2330", "0050": "quote of 0050"}
+    assert calls == [["2330", "9999", "0050"], ["2330"], ["9999"], ["0050"]]
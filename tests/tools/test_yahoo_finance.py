@@ -1,6 +1,46 @@
+import pandas as pd
+import pytest
+
+from bot.tools import yahoo_finance
+from bot.tools.yahoo_finance import TickerProfile
 from bot.tools.yahoo_finance import query_tickers
 
 
 def test_query_tickers() -> None:
     s = query_tickers("AAPL")
     assert "AAPL" in s
+
+
+def test_query_yahoo_quotes_downloads_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    downloads: list[tuple[list[str], str]] = []
+    profiles: list[str] = []
+
+    def download(symbols: list[str], period: str, **kwargs) -> pd.DataFrame:
+        downloads.append((symbols, period))
+        columns = pd.MultiIndex.from_product([symbols, ["Open", "High", "Low", "Close", "Adj Close", "Volume"]])
+        # Only the first symbol has prices
+        padding = [float("nan")] * 6 * (len(symbols) - 1)
+        rows = [[10.0, 12.0, 9.0, 11.0, 11.0, 100] + padding, [11.0, 13.0, 8.0, 12.1, 12.1, 200] + padding]
+        return pd.DataFrame(rows, columns=columns)
+
+    def fetch_profile(symbol: str) -> TickerProfile:
+        profiles.append(symbol)
+        return TickerProfile(short_name="Apple Inc.", fifty_two_week_low=150.0, fifty_two_week_high=200.0)
+
+    monkeypatch.setattr(yahoo_finance.yf, "download", download)
+    monkeypatch.setattr(yahoo_finance, "fetch_profile", fetch_profile)
+    yahoo_finance.get_profile_cache.cache_clear()
+
+    quotes = yahoo_finance.query_yahoo_quotes(["AAPL", "NOPE"])
+    yahoo_finance.query_yahoo_quotes(["AAPL"])
+
+    assert downloads == [(["AAPL", "NOPE"], "5d"), (["AAPL"], "5d")]
+    # Profiles are only looked up for symbols with prices, once until they expire
+    assert profiles == ["AAPL"]
+    assert list(quotes) == ["AAPL"]
+    assert quotes["AAPL"].startswith("📊 *Apple Inc\\. \\(AAPL\\)*")
+    assert "Last: `12\\.10`" in quotes["AAPL"]
+    assert "Change: 🔺 `10\\.00%`" in quotes["AAPL"]
+    # Today's low is below the profile's range
+    assert "52 Week Low: `8\\.00`" in quotes["AAPL"]
+    assert "52 Week High: `200\\.00`" in quotes["AAPL"]